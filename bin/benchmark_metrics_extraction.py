@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+出版商指标提取基准测试
+对比旧版正则提取与单遍扫描提取：输出必须一致，并报告耗时
+
+用法:
+  python bin/benchmark_metrics_extraction.py                       # 仓库中保存的页面 + 合成的大页面
+  python bin/benchmark_metrics_extraction.py --wiley page.html     # 使用其他保存的 FlareSolverr 页面（可为 .gz）
+  python bin/benchmark_metrics_extraction.py --tf page.html --repeat 20
+"""
+
+import os
+import re
+import sys
+import gzip
+import time
+import argparse
+import logging
+from typing import Callable, Dict, List, Optional
+
+from journal_ranking_updater import WileyCrawler, TaylorFrancisCrawler
+
+logging.getLogger().setLevel(logging.WARNING)
+
+
+# ==========================================
+# 旧版正则实现（仅作为对照基准）
+# ==========================================
+def legacy_wiley(html: str) -> Dict[str, str]:
+    metrics = {'acceptance_rate': '', 'first_decision_time': '', 'review_time': '',
+               'acceptance_time': '', 'publication_time': '', 'publisher': 'Wiley'}
+    flags = re.DOTALL | re.IGNORECASE
+    m = re.search(r'Acceptance\s+rate.*?<p>\s*(\d+(?:\.\d+)?)%', html, flags)
+    if m:
+        metrics['acceptance_rate'] = f"{m.group(1)}%"
+    for field, label in [('first_decision_time', r'Submission\s+to\s+first\s+decision'),
+                         ('review_time', r'Submission\s+to\s+decision\s+after\s+review'),
+                         ('acceptance_time', r'Submission\s+to\s+acceptance'),
+                         ('publication_time', r'Acceptance\s+to\s+publication')]:
+        m = re.search(label + r'.*?<p>\s*(\d+)\s*days', html, flags)
+        if m:
+            metrics[field] = f"{m.group(1)} days"
+    return metrics
+
+
+def legacy_taylor_francis(html: str) -> Dict[str, str]:
+    metrics = {'acceptance_rate': '', 'first_decision_time': '', 'review_time': '',
+               'publication_time': '', 'acceptance_time': '', 'publisher': 'Taylor & Francis'}
+    flags = re.DOTALL | re.IGNORECASE
+    m = re.search(r'<strong>\s*(\d+(?:\.\d+)?)\s*%?\s*</strong>(?:(?!<strong>).)*?acceptance\s+rate', html, flags)
+    if m and float(m.group(1)) > 0:
+        metrics['acceptance_rate'] = f"{m.group(1)}%"
+    for field, label in [('first_decision_time', r'submission\s+to\s+first\s+decision'),
+                         ('review_time', r'submission\s+to\s+first\s+post-review\s+decision'),
+                         ('publication_time', r'acceptance\s+to\s+online\s+publication'),
+                         ('acceptance_time', r'submission\s+to\s+acceptance')]:
+        m = re.search(r'<strong>\s*(\d+)\s*</strong>(?:(?!<strong>).)*?' + label, html, flags)
+        if m and m.group(1) != '0':
+            metrics[field] = f"{m.group(1)} days"
+    return metrics
+
+
+# ==========================================
+# 保存的页面（bin/fixtures）及其应提取出的指标
+# ==========================================
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+SAVED_PAGES = {
+    'wiley_journal_metrics.html.gz': {
+        'acceptance_rate': '11%', 'first_decision_time': '29 days', 'review_time': '',
+        'acceptance_time': '214 days', 'publication_time': '15 days', 'publisher': 'Wiley'},
+    'tf_about_this_journal.html.gz': {
+        'acceptance_rate': '6%', 'first_decision_time': '', 'review_time': '50 days',
+        'publication_time': '30 days', 'acceptance_time': '', 'publisher': 'Taylor & Francis'},
+}
+
+
+def read_page(path: str) -> str:
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rt', encoding='utf-8', errors='replace') as f:
+        return f.read()
+
+
+# ==========================================
+# 合成页面：真实指标片段 + 大量无关标记
+# ==========================================
+WILEY_SNIPPET = (
+    '<div class="journal-metrics"><h4><span class="label">Acceptance rate: </span></h4><p> 11%</p>'
+    '<h4><span class="label">Submission to first decision <span> (median) </span>: </span></h4><p> 29 days </p>'
+    '<h4><span class="label">Submission to acceptance <span> (median) </span>: </span></h4><p> 214 days </p>'
+    '<h4><span class="label">Acceptance to publication <span> (median) </span>: </span></h4><p> 15 days </p></div>'
+)
+TF_SNIPPET = (
+    '<ul class="metrics"><li><strong>6%</strong> acceptance rate</li>'
+    '<li><strong>0</strong> days avg from submission to first decision</li>'
+    '<li><strong>50</strong> days avg from submission to first post-review decision</li>'
+    '<li><strong>30</strong> days avg from acceptance to online publication</li></ul>'
+)
+FILLER = ('<div class="card"><strong>Related</strong><p>Lorem ipsum dolor sit amet, submission '
+          'guidelines and <a href="/x">links</a> for authors.</p></div>\n')
+
+
+def synthetic_page(snippet: str, size_mb: float) -> str:
+    filler = FILLER * int(size_mb * 1024 * 1024 / len(FILLER))
+    half = len(filler) // 2
+    return f"<html><body>{filler[:half]}{snippet}{filler[half:]}</body></html>"
+
+
+def bench(func: Callable[[str], Dict], html: str, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func(html)
+    return (time.perf_counter() - start) / repeat
+
+
+def run_case(name: str, html: str, legacy: Callable, current: Callable, repeat: int,
+             expected: Optional[Dict] = None) -> bool:
+    old, new = legacy(html), current(html)
+    same = old == new and (expected is None or new == expected)
+    t_old, t_new = bench(legacy, html, repeat), bench(current, html, repeat)
+    print(f"{name:32} {len(html) / 1024 / 1024:6.2f} MB | regex {t_old * 1000:9.1f} ms | "
+          f"single-pass {t_new * 1000:8.1f} ms | {'✅ same output' if same else '❌ DIFFERENT'}")
+    if not same:
+        print(f"   regex:       {old}")
+        print(f"   single-pass: {new}")
+        if expected is not None:
+            print(f"   expected:    {expected}")
+    return same
+
+
+def main():
+    parser = argparse.ArgumentParser(description='对比旧版正则与单遍扫描的指标提取结果和耗时')
+    parser.add_argument('--wiley', nargs='*', default=[], help='保存的 Wiley journal-metrics 页面')
+    parser.add_argument('--tf', nargs='*', default=[], help='保存的 T&F about-this-journal 页面')
+    parser.add_argument('--size-mb', type=float, default=4.0, help='合成页面大小 (默认 4 MB)')
+    parser.add_argument('--repeat', '-r', type=int, default=5, help='每个用例重复次数')
+    args = parser.parse_args()
+
+    wiley, tf = WileyCrawler(None), TaylorFrancisCrawler(None)
+    cases: List[tuple] = []
+    for path in args.wiley:
+        cases.append((f"wiley:{path}", read_page(path), legacy_wiley, wiley.parse_metrics, None))
+    for path in args.tf:
+        cases.append((f"tf:{path}", read_page(path), legacy_taylor_francis, tf.parse_metrics, None))
+    if not cases:
+        for name, expected in SAVED_PAGES.items():
+            legacy, current = ((legacy_wiley, wiley.parse_metrics) if name.startswith('wiley')
+                               else (legacy_taylor_francis, tf.parse_metrics))
+            cases.append((f"{name.split('.')[0]} (saved)", read_page(os.path.join(FIXTURE_DIR, name)),
+                          legacy, current, expected))
+        cases += [(name, html, legacy, current, None) for name, html, legacy, current in [
+            ("wiley (synthetic)", synthetic_page(WILEY_SNIPPET, args.size_mb), legacy_wiley, wiley.parse_metrics),
+            ("wiley (no metrics)", synthetic_page('<p>Acceptance rate</p>', args.size_mb),
+             legacy_wiley, wiley.parse_metrics),
+            # 标签在正文中反复出现但没有数值：旧正则在每次出现处都扫描到文末（平方级，故缩小页面）
+            ("wiley (repeated labels)", synthetic_page('', args.size_mb / 8).replace(
+                'submission guidelines', 'acceptance rate guidelines'), legacy_wiley, wiley.parse_metrics),
+            ("t&f (synthetic)", synthetic_page(TF_SNIPPET, args.size_mb),
+             legacy_taylor_francis, tf.parse_metrics),
+            ("t&f (no metrics)", synthetic_page('', args.size_mb), legacy_taylor_francis, tf.parse_metrics),
+        ]]
+
+    ok = all([run_case(name, html, legacy, current, args.repeat, expected)
+              for name, html, legacy, current, expected in cases])
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""
+HTTP 录制 / 回放 (cassette)
+录制模式下把所有网络响应（curl_cffi、FlareSolverr /v1、EasyScholar、DrissionPage 页面 HTML）
+按请求写入压缩的 cassette；回放模式下直接返回录制的响应，完全不访问网络，
+用于离线复现一次抓取、分析 CPU 耗时以及调试合并/评分逻辑
+
+通过环境变量启用（子进程自动继承）:
+  FETCH_CASSETTE_RECORD=.cache/cassettes/2025-06 python bin/journal_data_manager.py --all
+  FETCH_CASSETTE_REPLAY=.cache/cassettes/2025-06 python bin/journal_data_manager.py --all --dry-run
+
+cassette 是一个目录：每个进程写入自己的 <脚本名>-<pid>.jsonl.gz，回放时读取目录下全部文件
+"""
+
+import os
+import sys
+import atexit
+import glob
+import gzip
+import json
+import time
+import hashlib
+import logging
+import threading
+from collections import defaultdict, deque
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+RECORD_ENV = 'FETCH_CASSETTE_RECORD'
+REPLAY_ENV = 'FETCH_CASSETTE_REPLAY'
+
+# 不参与请求匹配的参数：密钥不写入 cassette，session/UA/超时每次运行都不同
+SECRET_PARAMS = ('secretKey',)
+VOLATILE_FIELDS = ('session', 'userAgent', 'maxTimeout')
+
+
+class CassetteMiss(Exception):
+    """Replay mode got a request that was never recorded"""
+
+
+class ReplayHTTPError(Exception):
+    pass
+
+
+class ReplayResponse:
+    """Minimal stand-in for requests / curl_cffi responses"""
+
+    def __init__(self, status_code: int, text: str, url: str):
+        self.status_code = status_code
+        self.text = text
+        self.url = url
+
+    def json(self) -> Any:
+        return json.loads(self.text)
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise ReplayHTTPError(f"{self.status_code} for {self.url}")
+
+
+def _request_key(kind: str, method: str, url: str, params: Optional[Dict] = None,
+                 body: Optional[Dict] = None) -> str:
+    params = {k: v for k, v in (params or {}).items() if k not in SECRET_PARAMS}
+    body = {k: v for k, v in (body or {}).items() if k not in VOLATILE_FIELDS}
+    raw = json.dumps([kind, method, url, params, body], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+class Cassette:
+    """Records or replays network responses; mode is 'off', 'record' or 'replay'"""
+
+    def __init__(self, mode: str = 'off', path: Optional[str] = None):
+        self._lock = threading.Lock()
+        self._writer = None
+        self.configure(mode, path)
+
+    def configure(self, mode: str, path: Optional[str] = None):
+        """Switch mode in place (the shared CASSETTE is imported by reference everywhere)"""
+        self.close()
+        self.mode = mode
+        self.path = path
+        self._entries: Dict[str, deque] = defaultdict(deque)
+        self._last: Dict[str, Dict[str, Any]] = {}
+        if mode == 'replay':
+            self._load()
+        elif mode == 'record':
+            os.makedirs(path, exist_ok=True)
+            script = os.path.splitext(os.path.basename(sys.argv[0] or 'python'))[0] or 'python'
+            self._writer_path = os.path.join(path, f"{script}-{os.getpid()}.jsonl.gz")
+            logger.info(f"📼 Recording network responses to {self._writer_path}")
+
+    @classmethod
+    def from_env(cls) -> 'Cassette':
+        if os.environ.get(REPLAY_ENV):
+            return cls('replay', os.environ[REPLAY_ENV])
+        if os.environ.get(RECORD_ENV):
+            return cls('record', os.environ[RECORD_ENV])
+        return cls()
+
+    @property
+    def recording(self) -> bool:
+        return self.mode == 'record'
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == 'replay'
+
+    # ------------------------------------------
+    # 存取
+    # ------------------------------------------
+    def _load(self):
+        files = sorted(glob.glob(os.path.join(self.path, '*.jsonl.gz')))
+        count = 0
+        for file_path in files:
+            try:
+                with gzip.open(file_path, 'rt', encoding='utf-8') as f:
+                    for line in f:
+                        entry = json.loads(line)
+                        self._entries[entry['key']].append(entry)
+                        count += 1
+            except (EOFError, OSError, json.JSONDecodeError) as e:
+                # 录制进程中断时最后一段可能不完整，已读出的条目照常使用
+                logger.warning(f"⚠️ Cassette file {file_path} truncated: {e}")
+        logger.info(f"📼 Replaying {count} recorded responses from {len(files)} files in {self.path}")
+
+    def _write(self, entry: Dict[str, Any]):
+        with self._lock:
+            if self._writer is None:
+                self._writer = gzip.open(self._writer_path, 'at', encoding='utf-8')
+            self._writer.write(json.dumps(entry, ensure_ascii=False) + '\n')
+            self._writer.flush()
+
+    def _take(self, key: str, description: str) -> Dict[str, Any]:
+        with self._lock:
+            queue = self._entries.get(key)
+            if queue:
+                # 同一请求录制了多次（重试等）时按顺序返回，用完后重复最后一次
+                self._last[key] = queue.popleft()
+            if key not in self._last:
+                raise CassetteMiss(f"No recorded response for {description}")
+            return self._last[key]
+
+    def close(self):
+        with self._lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+
+    # ------------------------------------------
+    # HTTP
+    # ------------------------------------------
+    def request(self, kind: str, call: Callable, method: str, url: str, params: Optional[Dict] = None,
+                json_body: Optional[Dict] = None, **kwargs) -> Any:
+        """Send call(url, ...) — or serve it from the cassette — and record the response if recording"""
+        if self.mode == 'off':
+            return self._call(call, url, params, json_body, **kwargs)
+        key = _request_key(kind, method, url, params, json_body)
+        if self.replaying:
+            entry = self._take(key, f"{kind} {method} {url}")
+            return ReplayResponse(entry['status'], entry['text'], url)
+
+        response = self._call(call, url, params, json_body, **kwargs)
+        self._write({'key': key, 'kind': kind, 'method': method, 'url': url,
+                     'status': response.status_code, 'text': response.text})
+        return response
+
+    @staticmethod
+    def _call(call: Callable, url: str, params: Optional[Dict], json_body: Optional[Dict], **kwargs) -> Any:
+        if params is not None:
+            kwargs['params'] = params
+        if json_body is not None:
+            kwargs['json'] = json_body
+        return call(url, **kwargs)
+
+    def get(self, kind: str, call: Callable, url: str, params: Optional[Dict] = None, **kwargs) -> Any:
+        return self.request(kind, call, 'GET', url, params=params, **kwargs)
+
+    def post(self, kind: str, call: Callable, url: str, json: Optional[Dict] = None, **kwargs) -> Any:
+        return self.request(kind, call, 'POST', url, json_body=json, **kwargs)
+
+    # ------------------------------------------
+    # DrissionPage
+    # ------------------------------------------
+    def open_page(self, factory: Callable, *args, **kwargs) -> Any:
+        """factory(*args, **kwargs) wrapped for recording, or a browser-less replay page"""
+        if self.replaying:
+            return ReplayPage(self)
+        page = factory(*args, **kwargs)
+        return RecordingPage(page, self) if self.recording else page
+
+    def record_page(self, url: str, html: str):
+        self._write({'key': _request_key('page', 'GET', url), 'kind': 'page', 'method': 'GET',
+                     'url': url, 'status': 200, 'text': html})
+
+    def page_html(self, url: str) -> str:
+        return self._take(_request_key('page', 'GET', url), f"page {url}")['text']
+
+    # ------------------------------------------
+    # 礼貌性等待
+    # ------------------------------------------
+    def sleep(self, seconds: float):
+        """time.sleep for politeness delays; skipped when replaying"""
+        if not self.replaying:
+            time.sleep(seconds)
+
+
+class RecordingPage:
+    """Proxy for a DrissionPage page that records the final HTML of each visited URL"""
+
+    def __init__(self, page: Any, cassette: Cassette):
+        self._page = page
+        self._cassette = cassette
+        self._url: Optional[str] = None
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._page, name)
+
+    def _flush(self):
+        # 在离开页面时记录（此时等待和渲染都已完成）
+        if self._url is not None:
+            try:
+                self._cassette.record_page(self._url, self._page.html)
+            except Exception as e:
+                logger.warning(f"⚠️ Could not record page {self._url}: {e}")
+            self._url = None
+
+    def get(self, url: str, *args, **kwargs) -> Any:
+        self._flush()
+        result = self._page.get(url, *args, **kwargs)
+        self._url = url
+        return result
+
+    def quit(self, *args, **kwargs) -> Any:
+        self._flush()
+        return self._page.quit(*args, **kwargs)
+
+    def close(self, *args, **kwargs) -> Any:
+        self._flush()
+        return self._page.close(*args, **kwargs)
+
+    def new_tab(self, *args, **kwargs) -> 'RecordingPage':
+        return RecordingPage(self._page.new_tab(*args, **kwargs), self._cassette)
+
+
+class _NoOp:
+    """wait.* / scroll.* on a replay page: nothing to wait for"""
+
+    def __getattr__(self, name: str) -> Callable:
+        return lambda *args, **kwargs: True
+
+
+class ReplayPage:
+    """Browser-less page that serves recorded HTML with DrissionPage's static element API"""
+
+    def __init__(self, cassette: Cassette):
+        from DrissionPage.common import make_session_ele
+        self._make_ele = make_session_ele
+        self._cassette = cassette
+        self._root = None
+        self.html = ''
+        self.url = None
+        self.wait = _NoOp()
+        self.scroll = _NoOp()
+
+    def get(self, url: str, *args, **kwargs) -> bool:
+        self.url = url
+        self.html = self._cassette.page_html(url)
+        self._root = self._make_ele(self.html)
+        return True
+
+    def ele(self, locator: Any, *args, **kwargs) -> Any:
+        return self._root.ele(locator) if self._root is not None else None
+
+    def eles(self, locator: Any, *args, **kwargs) -> list:
+        return self._root.eles(locator) if self._root is not None else []
+
+    def run_js(self, *args, **kwargs) -> None:
+        return None
+
+    def quit(self, *args, **kwargs) -> None:
+        return None
+
+    def close(self, *args, **kwargs) -> None:
+        return None
+
+    def new_tab(self, *args, **kwargs) -> 'ReplayPage':
+        return ReplayPage(self._cassette)
+
+
+CASSETTE = Cassette.from_env()
+atexit.register(CASSETTE.close)
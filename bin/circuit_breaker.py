@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+按主机的熔断器 (closed / open / half-open)
+某个主机连续失败 N 次后熔断，冷却期内不再向它发请求；冷却结束后放行一次试探请求，
+成功则恢复，失败则重新熔断
+"""
+
+import time
+import logging
+import threading
+from typing import Callable, Dict, Any
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half-open'
+
+
+def host_of(url: str) -> str:
+    """Breaker key for a URL: the registrable domain, so subdomains share one circuit
+
+    'https://bera-journals.onlinelibrary.wiley.com/x' -> 'wiley.com'
+    'http://localhost:8191' -> 'localhost:8191'
+    """
+    host = urlparse(url).netloc.lower() or url.lower()
+    name = host.split(':')[0]
+    labels = name.split('.')
+    if len(labels) <= 2 or name.replace('.', '').isdigit():
+        return host
+    # co.uk / ac.uk / com.cn 这类二级后缀保留三段
+    keep = 3 if len(labels[-2]) <= 3 and len(labels[-1]) == 2 else 2
+    return '.'.join(labels[-keep:])
+
+
+def is_host_failure(status_code: int) -> bool:
+    """Whether an HTTP status says the host is unhealthy (5xx, 429) rather than the URL being wrong (4xx)"""
+    return status_code == 429 or status_code >= 500
+
+
+class CircuitBreaker:
+    """Per-host circuit breaker shared by all worker threads"""
+
+    def __init__(self, failure_threshold: int = 3, cooldown: float = 300.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = max(1, failure_threshold)
+        self.cooldown = cooldown
+        self._clock = clock
+        self._hosts: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def _host_state(self, host: str) -> Dict[str, Any]:
+        return self._hosts.setdefault(host, {'state': CLOSED, 'failures': 0, 'opened_at': 0.0,
+                                             'trial_at': None, 'skipped': 0})
+
+    def _cooled_down(self, entry: Dict[str, Any]) -> bool:
+        return self._clock() - entry['opened_at'] >= self.cooldown
+
+    def state(self, url: str) -> str:
+        with self._lock:
+            entry = self._host_state(host_of(url))
+            if entry['state'] == OPEN and self._cooled_down(entry):
+                return HALF_OPEN
+            return entry['state']
+
+    def is_open(self, url: str) -> bool:
+        """Peek without claiming the half-open trial: True while requests to the host would be refused"""
+        with self._lock:
+            entry = self._host_state(host_of(url))
+            if entry['state'] == CLOSED:
+                return False
+            if entry['state'] == OPEN:
+                return not self._cooled_down(entry)
+            # half-open: 试探请求进行中（且未超时）时其他请求继续被拒绝
+            return entry['trial_at'] is not None and self._clock() - entry['trial_at'] < self.cooldown
+
+    def allow(self, url: str) -> bool:
+        """Whether a request may be sent now (claims the single trial request when half-open)"""
+        host = host_of(url)
+        with self._lock:
+            entry = self._host_state(host)
+            now = self._clock()
+            if entry['state'] == OPEN and self._cooled_down(entry):
+                entry['state'] = HALF_OPEN
+                entry['trial_at'] = None
+                logger.info(f"🟡 Circuit half-open for {host}, sending one trial request")
+            if entry['state'] == CLOSED:
+                return True
+            if entry['state'] == HALF_OPEN and (entry['trial_at'] is None
+                                                or now - entry['trial_at'] >= self.cooldown):
+                entry['trial_at'] = now
+                return True
+            entry['skipped'] += 1
+            return False
+
+    def record_success(self, url: str):
+        host = host_of(url)
+        with self._lock:
+            entry = self._host_state(host)
+            if entry['state'] != CLOSED:
+                logger.info(f"🟢 Circuit closed for {host}")
+            entry.update(state=CLOSED, failures=0, trial_at=None)
+
+    def record_failure(self, url: str):
+        host = host_of(url)
+        with self._lock:
+            entry = self._host_state(host)
+            entry['failures'] += 1
+            if entry['state'] == HALF_OPEN or entry['failures'] >= self.failure_threshold:
+                if entry['state'] != OPEN:
+                    logger.warning(f"🔴 Circuit open for {host} after {entry['failures']} consecutive "
+                                   f"failures, pausing requests for {self.cooldown:.0f}s")
+                entry.update(state=OPEN, opened_at=self._clock(), trial_at=None)
+
+    def skipped(self) -> Dict[str, int]:
+        """{host: number of refused requests} for hosts that were ever skipped"""
+        with self._lock:
+            return {host: entry['skipped'] for host, entry in self._hosts.items() if entry['skipped']}
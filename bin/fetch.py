@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+所有 bin/ 脚本共用的 HTTP 客户端
+基于 curl_cffi：每个线程一个长连接 Session（同一主机的 TLS / keep-alive 连接被复用，包括本地 FlareSolverr），
+gzip / deflate / br 由 libcurl 解码；需要时按请求模拟 Chrome 指纹 (impersonate)
+
+统一的超时、重试与退避（连接错误和 429/5xx，遵守 Retry-After），每次请求调用计时钩子并按主机汇总统计；
+所有请求经过 cassette，录制/回放照常生效；进程退出时关闭所有连接
+
+同步:  FETCH.get('easyscholar', url, params={...})
+异步:  await FETCH.aget('scholar', url)            # 在线程池中运行，共享同一组连接
+批量:  FETCH.fetch_many('curl_cffi', urls, concurrency=4)
+"""
+
+import time
+import atexit
+import random
+import asyncio
+import logging
+import threading
+from collections import defaultdict
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from curl_cffi import requests as curl_requests
+
+from cassette import CASSETTE
+from circuit_breaker import host_of
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TIMEOUT = 30
+DEFAULT_RETRIES = 2
+BACKOFF_BASE = 1.0      # 第 n 次重试前等待 BACKOFF_BASE * 2^n 秒（加随机抖动）
+BACKOFF_MAX = 60.0      # 单次等待上限（包括 Retry-After）
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+# 模拟浏览器访问网页时的请求头
+BROWSER_HEADERS = {
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "en-US,en;q=0.9",
+}
+
+_exceptions = getattr(curl_requests, 'exceptions', None)
+_CONNECTION_ERRORS = tuple(getattr(_exceptions, name) for name in ('ConnectionError', 'Timeout')
+                           if hasattr(_exceptions, name))
+
+
+class FetchError(Exception):
+    """Request failed after all retries"""
+
+
+class FetchConnectionError(FetchError):
+    """Could not connect / timed out (the server never answered)"""
+
+
+def _is_connection_error(error: Exception) -> bool:
+    # 旧版 curl_cffi 只有 RequestsError：按 libcurl 错误码判断 (6 解析失败, 7 无法连接, 28 超时)
+    return isinstance(error, _CONNECTION_ERRORS) or getattr(error, 'code', None) in (6, 7, 28)
+
+
+def _retry_after(response: Any) -> Optional[float]:
+    headers = getattr(response, 'headers', None) or {}
+    try:
+        return float(headers.get('Retry-After'))
+    except (TypeError, ValueError):
+        return None
+
+
+class Fetcher:
+    """Pooled, retrying HTTP client with per-request timing hooks"""
+
+    def __init__(self, timeout: float = DEFAULT_TIMEOUT, retries: int = DEFAULT_RETRIES,
+                 backoff: float = BACKOFF_BASE, retry_statuses: Iterable[int] = RETRY_STATUSES):
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.retry_statuses = set(retry_statuses)
+        self._local = threading.local()  # curl_cffi Session 不保证线程安全，每个线程一个
+        self._sessions: List[Any] = []
+        self._hooks: List[Callable[[Dict[str, Any]], None]] = []
+        self._stats: Dict[str, Dict[str, float]] = defaultdict(
+            lambda: {'requests': 0, 'errors': 0, 'retries': 0, 'seconds': 0.0, 'bytes': 0})
+        self._lock = threading.Lock()
+
+    # ------------------------------------------
+    # 连接池与钩子
+    # ------------------------------------------
+    def _session(self) -> Any:
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = self._local.session = curl_requests.Session()
+            with self._lock:
+                self._sessions.append(session)
+        return session
+
+    def add_hook(self, hook: Callable[[Dict[str, Any]], None]):
+        """hook(event) after every attempt; event has kind, method, url, host, attempt, status,
+        elapsed, bytes and error"""
+        self._hooks.append(hook)
+
+    def _emit(self, event: Dict[str, Any]):
+        with self._lock:
+            stats = self._stats[event['host']]
+            stats['requests'] += 1
+            stats['seconds'] += event['elapsed']
+            stats['bytes'] += event['bytes']
+            stats['retries'] += event['attempt'] > 0
+            stats['errors'] += bool(event['error']) or (event['status'] or 0) >= 400
+        for hook in self._hooks:
+            try:
+                hook(event)
+            except Exception as e:
+                logger.debug(f"fetch hook failed: {e}")
+
+    # ------------------------------------------
+    # 同步接口
+    # ------------------------------------------
+    def request(self, kind: str, method: str, url: str, params: Optional[Dict] = None,
+                json: Optional[Dict] = None, timeout: Optional[float] = None,
+                retries: Optional[int] = None, **kwargs) -> Any:
+        """Send one request (through the cassette) with retries; returns the last response
+
+        kind 是 cassette 中的请求类别；非重试状态码的响应（包括 4xx）原样返回，由调用方判断。
+        连接错误在重试用尽后抛出 FetchConnectionError，其他异常抛出 FetchError
+        """
+        retries = self.retries if retries is None else retries
+        kwargs['timeout'] = timeout or self.timeout
+        host = host_of(url)
+        for attempt in range(retries + 1):
+            call = getattr(self._session(), method.lower())
+            start = time.perf_counter()
+            response, error = None, None
+            try:
+                response = CASSETTE.request(kind, call, method, url, params=params, json_body=json, **kwargs)
+            except Exception as e:
+                error = e
+            content = getattr(response, 'content', None)
+            self._emit({'kind': kind, 'method': method, 'url': url, 'host': host, 'attempt': attempt,
+                        'status': getattr(response, 'status_code', None),
+                        'elapsed': time.perf_counter() - start,
+                        'bytes': len(content) if isinstance(content, bytes) else len(getattr(response, 'text', '') or ''),
+                        'error': repr(error) if error else None})
+
+            if error is None and response.status_code not in self.retry_statuses:
+                return response
+            if attempt == retries:
+                if error is None:
+                    return response
+                if _is_connection_error(error):
+                    raise FetchConnectionError(f"{method} {url}: {error}") from error
+                raise FetchError(f"{method} {url}: {error}") from error
+
+            wait = _retry_after(response) if response is not None else None
+            if wait is None:
+                wait = self.backoff * 2 ** attempt * (1 + random.random() / 2)
+            wait = min(wait, BACKOFF_MAX)
+            reason = f"HTTP {response.status_code}" if response is not None else error
+            logger.info(f"   🔁 [{kind}] {reason} for {url}, retry {attempt + 1}/{retries} in {wait:.1f}s")
+            CASSETTE.sleep(wait)
+
+    def get(self, kind: str, url: str, params: Optional[Dict] = None, **kwargs) -> Any:
+        return self.request(kind, 'GET', url, params=params, **kwargs)
+
+    def post(self, kind: str, url: str, json: Optional[Dict] = None, **kwargs) -> Any:
+        return self.request(kind, 'POST', url, json=json, **kwargs)
+
+    # ------------------------------------------
+    # 异步接口（在线程中运行同步请求，连接池与统计共用）
+    # ------------------------------------------
+    async def arequest(self, kind: str, method: str, url: str, **kwargs) -> Any:
+        return await asyncio.to_thread(self.request, kind, method, url, **kwargs)
+
+    async def aget(self, kind: str, url: str, params: Optional[Dict] = None, **kwargs) -> Any:
+        return await self.arequest(kind, 'GET', url, params=params, **kwargs)
+
+    async def apost(self, kind: str, url: str, json: Optional[Dict] = None, **kwargs) -> Any:
+        return await self.arequest(kind, 'POST', url, json=json, **kwargs)
+
+    async def agather(self, kind: str, urls: Iterable[str], concurrency: int = 4, **kwargs) -> List[Any]:
+        """GET every URL with at most `concurrency` in flight; failed requests yield the exception"""
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+
+        async def one(url: str) -> Any:
+            async with semaphore:
+                return await self.aget(kind, url, **kwargs)
+
+        return await asyncio.gather(*(one(url) for url in urls), return_exceptions=True)
+
+    def fetch_many(self, kind: str, urls: Iterable[str], concurrency: int = 4, **kwargs) -> List[Any]:
+        """Synchronous wrapper around agather (for scripts without an event loop)"""
+        return asyncio.run(self.agather(kind, list(urls), concurrency, **kwargs))
+
+    # ------------------------------------------
+    # 统计
+    # ------------------------------------------
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """{host: {requests, errors, retries, seconds, bytes}}"""
+        with self._lock:
+            return {host: dict(stats) for host, stats in self._stats.items()}
+
+    def log_stats(self):
+        stats = self.stats()
+        if not stats:
+            return
+        logger.info(f"🌐 HTTP: {sum(s['requests'] for s in stats.values()):.0f} requests to {len(stats)} hosts")
+        for host, s in sorted(stats.items(), key=lambda item: -item[1]['seconds']):
+            logger.info(f"   {host:32} {s['requests']:4.0f} req | {s['errors']:3.0f} err | {s['retries']:3.0f} retry | "
+                        f"{s['seconds']:7.1f}s | {s['bytes'] / 1024:8.0f} KB")
+
+    def close(self):
+        with self._lock:
+            sessions, self._sessions = self._sessions, []
+        for session in sessions:
+            try:
+                session.close()
+            except Exception:
+                pass
+        self._local = threading.local()
+
+
+FETCH = Fetcher()
+atexit.register(FETCH.close)
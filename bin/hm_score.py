@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+HM (Haoming) 评分引擎
+逐条计算 (calculate_hm_score) 与整表批量计算 (batch_hm_scores) 两种实现，结果逐位一致
+
+批量实现先把整表的数值字段一次性解析为列（每个字段一个列表），再按列累加；
+仍是纯 Python 的列表运算（未引入 NumPy，耗时与逐条计算相当），
+用于修改权重后不重新爬取、离线重算全部 hm_score
+
+自检:
+  python bin/hm_score.py                 # 对 _data/jrank.yml 做一致性校验并计时
+"""
+
+import sys
+import time
+import argparse
+from typing import Dict, List, Any
+
+import yaml
+
+JRANK_FILE = '_data/jrank.yml'
+
+# 计算权重
+QUARTILE_POINTS = (('Q1', 20), ('Q2', 15), ('Q3', 10), ('Q4', 5))  # 紫色分区，按顺序匹配
+PURPLE_SCORE_WEIGHT = 2
+ORANGE_SCORE_WEIGHT = 1
+ORANGE_PERCENTILE_WEIGHT = 0.2
+DEFAULT_ACCEPTANCE_POINTS = 4
+DOCS_POINTS = ((200, 10), (100, 5), (50, 3))  # 发文量 > 阈值 -> 加分，按顺序匹配
+
+
+def calculate_hm_score(journal_data: Dict[str, Any]) -> float:
+    """Calculate HM (Haoming) custom score based on multiple factors
+
+    计算公式:
+    - 紫色分区 (purple_quartile): 20分 (Q1=20, Q2=15, Q3=10, Q4=5)
+    - 紫色分数 (purple_score): 乘以2直接加
+    - 橙色分数 (orange_score): 直接加
+    - 橙色百分位 (orange_percentile): 20分 (按百分比计算)
+    - 接受率 (acceptance_rate): 直接加，默认4分
+    - 发文量 (documents_last_year): >200加10分, >100加5分, >50加3分
+    """
+    score = 0
+
+    # 1. 紫色分区 scoring (20分满分)
+    jcr = str(journal_data.get('purple_quartile') or '').upper()
+    for quartile, points in QUARTILE_POINTS:
+        if quartile in jcr:
+            score += points
+            break
+
+    # 2. 紫色分数 - 乘以2直接加
+    try:
+        purple_score = float(journal_data.get('purple_score', 0) or 0)
+        score += purple_score * PURPLE_SCORE_WEIGHT
+    except (ValueError, TypeError):
+        pass
+
+    # 3. 橙色分数 - 直接加
+    try:
+        orange_score = float(journal_data.get('orange_score', 0) or 0)
+        score += orange_score * ORANGE_SCORE_WEIGHT
+    except (ValueError, TypeError):
+        pass
+
+    # 4. 橙色百分位 scoring (20分满分，按百分比计算)
+    try:
+        orange_percentile = float(journal_data.get('orange_percentile', 0) or 0)
+        score += orange_percentile * ORANGE_PERCENTILE_WEIGHT  # 99 -> 19.8, 50 -> 10
+    except (ValueError, TypeError):
+        pass
+
+    # 5. 接受率 - 直接加分，默认4分
+    try:
+        acceptance_rate = journal_data.get('acceptance_rate', '')
+        if acceptance_rate and '%' in str(acceptance_rate):
+            rate = float(str(acceptance_rate).replace('%', ''))
+            # 接受率直接加: 10% -> 10分, 20% -> 20分
+            score += rate
+        else:
+            # 没有接受率数据，默认加4分
+            score += DEFAULT_ACCEPTANCE_POINTS
+    except (ValueError, TypeError):
+        score += DEFAULT_ACCEPTANCE_POINTS
+
+    # 6. 发文量加分 (documents_last_year)
+    try:
+        docs_last_year = journal_data.get('documents_last_year', '')
+        if docs_last_year:
+            # 格式可能是 "127 (2024)" 或纯数字
+            docs_str = str(docs_last_year).split('(')[0].strip()
+            docs_count = int(docs_str)
+            for threshold, points in DOCS_POINTS:
+                if docs_count > threshold:
+                    score += points
+                    break
+    except (ValueError, TypeError):
+        pass
+
+    return round(score, 1)  # 四舍五入到小数点后1位
+
+
+# ==========================================
+# 列式批量计算
+# ==========================================
+def _float_or_zero(value: Any) -> float:
+    try:
+        return float(value or 0)
+    except (ValueError, TypeError):
+        return 0.0
+
+
+def _quartile_points(value: Any) -> int:
+    jcr = str(value or '').upper()
+    for quartile, points in QUARTILE_POINTS:
+        if quartile in jcr:
+            return points
+    return 0
+
+
+def _acceptance_points(value: Any) -> float:
+    try:
+        if value and '%' in str(value):
+            return float(str(value).replace('%', ''))
+    except (ValueError, TypeError):
+        pass
+    return DEFAULT_ACCEPTANCE_POINTS
+
+
+def _docs_points(value: Any) -> int:
+    try:
+        if value:
+            docs_count = int(str(value).split('(')[0].strip())
+            for threshold, points in DOCS_POINTS:
+                if docs_count > threshold:
+                    return points
+    except (ValueError, TypeError):
+        pass
+    return 0
+
+
+def parse_columns(records: List[Dict[str, Any]]) -> Dict[str, List[float]]:
+    """Parse the scoring inputs of the whole table once into numeric columns"""
+    return {
+        'quartile_points': [_quartile_points(r.get('purple_quartile')) for r in records],
+        'purple_score': [_float_or_zero(r.get('purple_score')) for r in records],
+        'orange_score': [_float_or_zero(r.get('orange_score')) for r in records],
+        'orange_percentile': [_float_or_zero(r.get('orange_percentile')) for r in records],
+        'acceptance_points': [_acceptance_points(r.get('acceptance_rate')) for r in records],
+        'docs_points': [_docs_points(r.get('documents_last_year')) for r in records],
+    }
+
+
+def batch_hm_scores(records: List[Dict[str, Any]]) -> List[float]:
+    """HM scores for all records, computed column by column
+
+    各列按 calculate_hm_score 中相同的顺序累加，保证浮点结果逐位一致
+    """
+    cols = parse_columns(records)
+    score = [0] * len(records)
+    score = [s + q for s, q in zip(score, cols['quartile_points'])]
+    score = [s + v * PURPLE_SCORE_WEIGHT for s, v in zip(score, cols['purple_score'])]
+    score = [s + v * ORANGE_SCORE_WEIGHT for s, v in zip(score, cols['orange_score'])]
+    score = [s + v * ORANGE_PERCENTILE_WEIGHT for s, v in zip(score, cols['orange_percentile'])]
+    score = [s + v for s, v in zip(score, cols['acceptance_points'])]
+    score = [s + v for s, v in zip(score, cols['docs_points'])]
+    return [round(s, 1) for s in score]
+
+
+def rescore(records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Recompute hm_score in place; returns [{'journal', 'old', 'new'}] for changed records"""
+    changes = []
+    for record, new_score in zip(records, batch_hm_scores(records)):
+        old_score = record.get('hm_score')
+        if old_score != new_score:
+            changes.append({'journal': record.get('journal', ''), 'old': old_score, 'new': new_score})
+        record['hm_score'] = new_score
+    return changes
+
+
+def check_parity(records: List[Dict[str, Any]]) -> List[str]:
+    """Journals whose batch score differs from calculate_hm_score (empty list = parity)"""
+    return [r.get('journal', '') for r, batch in zip(records, batch_hm_scores(records))
+            if calculate_hm_score(r) != batch]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='HM 评分批量计算与逐条计算一致性自检')
+    parser.add_argument('--file', '-f', default=JRANK_FILE, help=f'期刊数据文件 (默认 {JRANK_FILE})')
+    args = parser.parse_args()
+
+    with open(args.file, 'r', encoding='utf-8') as f:
+        records = yaml.safe_load(f) or []
+
+    start = time.perf_counter()
+    per_record = [calculate_hm_score(r) for r in records]
+    t_single = time.perf_counter() - start
+    start = time.perf_counter()
+    batch = batch_hm_scores(records)
+    t_batch = time.perf_counter() - start
+
+    mismatches = check_parity(records)
+    print(f"📊 {len(records)} 个期刊 | 逐条 {t_single * 1000:.2f} ms | 批量 {t_batch * 1000:.2f} ms")
+    if mismatches or per_record != batch:
+        print(f"❌ 不一致: {mismatches}")
+        sys.exit(1)
+    print("✅ 批量结果与逐条计算完全一致")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,16 +5,25 @@
 """
 
 import json
-import yaml
 import os
 import sys
 import argparse
 import subprocess
+import time
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, Future
 from datetime import datetime
 from typing import Dict, List, Any, Optional
 from copy import deepcopy
 
+from hm_score import rescore, batch_hm_scores
+from journal_store import open_store, STORE_FILE
+from metric_history import MetricHistory
+from stable_yaml import record_hash
+from journal_selector import JournalSelector, add_selector_arguments, selector_cli_args
+from cassette import CASSETTE, RECORD_ENV, REPLAY_ENV
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -24,25 +33,38 @@ JRANK_FILE = '_data/jrank.yml'
 JOURNAL_RANK_FILE = '_data/journal_rank.json'
 
 
+class PipelineProgress:
+    """Live progress of the concurrent stages, logged as each journal finishes"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stages: Dict[str, tuple] = {}
+    
+    def __call__(self, stage: str, done: int, total: int, journal: str):
+        with self._lock:
+            self._stages[stage] = (done, total)
+            summary = ' | '.join(f"{name} {d}/{t}" for name, (d, t) in self._stages.items())
+        logger.info(f"⏳ [{summary}] {stage}: {journal}")
+
+
 class JournalDataManager:
     """期刊数据统一管理器"""
     
     def __init__(self):
         self.jrank_file = JRANK_FILE
         self.journal_rank_file = JOURNAL_RANK_FILE
+        self.store_path = STORE_FILE
+        self.history = MetricHistory('jrank')
         self.original_data = None
         self.current_data = None
     
     def load_data(self) -> List[Dict]:
-        """加载当前 jrank.yml 数据"""
+        """从期刊数据库加载当前数据（jrank.yml 在库外被修改时先同步进来）"""
         try:
-            with open(self.jrank_file, 'r', encoding='utf-8') as f:
-                data = yaml.safe_load(f) or []
+            with open_store(self.store_path, self.jrank_file) as store:
+                data = store.all_records()
             logger.info(f"📖 加载了 {len(data)} 个期刊数据")
             return data
-        except FileNotFoundError:
-            logger.warning(f"⚠️ 文件不存在: {self.jrank_file}")
-            return []
         except Exception as e:
             logger.error(f"❌ 加载数据失败: {e}")
             return []
@@ -58,21 +80,50 @@ class JournalDataManager:
             logger.error(f"❌ 加载期刊列表失败: {e}")
             return []
     
-    def save_data(self, data: List[Dict]) -> bool:
-        """保存数据到 jrank.yml"""
+    def save_data(self, data: List[Dict], source: str = 'manager') -> bool:
+        """把数据写入期刊数据库（只更新变化的字段）并导出 jrank.yml"""
         if not data:
             logger.warning("⚠️ 数据为空，跳过保存")
             return False
         
         try:
-            with open(self.jrank_file, 'w', encoding='utf-8') as f:
-                yaml.dump(data, f, default_flow_style=False, allow_unicode=True)
-            logger.info(f"✅ 成功保存 {len(data)} 个期刊数据")
+            with open_store(self.store_path, self.jrank_file) as store:
+                changed = store.upsert_many({item['journal']: item for item in data}, source=source)
+                store.export_yaml(self.jrank_file)
+            logger.info(f"✅ 成功保存 {len(data)} 个期刊数据 ({changed} 个字段变化)")
             return True
         except Exception as e:
             logger.error(f"❌ 保存数据失败: {e}")
             return False
     
+    def export_data(self) -> bool:
+        """从期刊数据库导出 jrank.yml（各阶段只写数据库时的最后一步）"""
+        try:
+            with open_store(self.store_path, self.jrank_file) as store:
+                store.export_yaml(self.jrank_file)
+            return True
+        except Exception as e:
+            logger.error(f"❌ 导出数据失败: {e}")
+            return False
+    
+    def record_history(self, source: str) -> Optional[int]:
+        """把当前数据追加到指标历史（只记录变化），返回最新的运行编号"""
+        data = self.load_data()
+        snapshot = {item['journal']: {k: v for k, v in item.items() if k != 'journal'} for item in data}
+        return self.history.record_run(snapshot, source)
+    
+    def begin_update(self, dry_run: bool) -> Optional[int]:
+        """更新前的基准运行编号（jrank.yml 在历史之外被修改过时先补记一次）"""
+        if dry_run:
+            return self.history.latest_run
+        return self.record_history('baseline')
+    
+    def finish_update(self, base_run: Optional[int], dry_run: bool, show_diff: bool, source: str):
+        """记录本次更新结果，并从历史索引输出与基准的差异"""
+        new_run = base_run if dry_run else self.record_history(source)
+        if show_diff:
+            self.print_diff(self.history.changes_between(base_run, new_run))
+    
     def compare_data(self, old_data: List[Dict], new_data: List[Dict]) -> Dict:
         """对比新旧数据差异"""
         old_dict = {item.get('journal', ''): item for item in old_data}
@@ -91,6 +142,10 @@ class JournalDataManager:
                 diff['added'].append(name)
             else:
                 old_item = old_dict[name]
+                # 内容哈希相同则整条未变，只对哈希不同的条目逐字段对比
+                if record_hash(old_item) == record_hash(new_item):
+                    diff['unchanged'].append(name)
+                    continue
                 changes = self._compare_items(old_item, new_item)
                 if changes:
                     diff['modified'].append({
@@ -194,7 +249,8 @@ class JournalDataManager:
         
         print("="*80 + "\n")
     
-    def run_scopus_update(self, dry_run: bool = False) -> bool:
+    def run_scopus_update(self, dry_run: bool = False, export: bool = True,
+                          extra_args: Optional[List[str]] = None) -> bool:
         """运行橙色系指标更新脚本"""
         logger.info("🔶 运行橙色系指标更新...")
         script_path = 'bin/update_scopus_metrics.py'
@@ -206,18 +262,21 @@ class JournalDataManager:
         cmd = [sys.executable, script_path]
         if dry_run:
             cmd.append('--dry-run')
+        if not export:
+            cmd.append('--no-export')
+        cmd.extend(extra_args or [])
         
         try:
-            result = subprocess.run(cmd, capture_output=True, text=True)
-            print(result.stdout)
-            if result.stderr:
-                print(result.stderr)
+            # 不捕获输出，子进程的日志实时显示
+            result = subprocess.run(cmd)
             return result.returncode == 0
         except Exception as e:
             logger.error(f"❌ 运行脚本失败: {e}")
             return False
     
-    def run_publisher_update(self, dry_run: bool = False, easyscholar_key: str = None) -> bool:
+    def run_publisher_update(self, dry_run: bool = False, easyscholar_key: str = None,
+                             refresh_easyscholar: bool = False, export: bool = True,
+                             extra_args: Optional[List[str]] = None) -> bool:
         """运行出版商+EasyScholar 更新脚本"""
         logger.info("🔷 运行出版商+EasyScholar 更新...")
         script_path = 'bin/journal_ranking_updater.py'
@@ -231,45 +290,182 @@ class JournalDataManager:
             cmd.append('--dry-run')
         if easyscholar_key:
             cmd.extend(['--easyscholar-key', easyscholar_key])
+        if refresh_easyscholar:
+            cmd.append('--refresh-easyscholar')
+        if not export:
+            cmd.append('--no-export')
+        cmd.extend(extra_args or [])
         
         try:
-            result = subprocess.run(cmd, capture_output=True, text=True)
-            print(result.stdout)
-            if result.stderr:
-                print(result.stderr)
+            # 不捕获输出，子进程的日志实时显示
+            result = subprocess.run(cmd)
             return result.returncode == 0
         except Exception as e:
             logger.error(f"❌ 运行脚本失败: {e}")
             return False
     
+    def run_rescore(self, dry_run: bool = False, show_diff: bool = True) -> bool:
+        """仅用现有数据批量重算 hm_score（不访问网络）"""
+        data = self.load_data()
+        if not data:
+            return False
+        old_data = deepcopy(data)
+        
+        start = time.perf_counter()
+        changes = rescore(data)
+        elapsed = (time.perf_counter() - start) * 1000
+        logger.info(f"🧮 重算 {len(data)} 个期刊 HM Score 用时 {elapsed:.2f} ms，{len(changes)} 个发生变化")
+        
+        if show_diff:
+            self.print_diff(self.compare_data(old_data, data))
+        if dry_run:
+            logger.info("🔍 DRY-RUN: 跳过保存")
+            return True
+        if not changes:
+            logger.info("ℹ️ HM Score 无变化，跳过保存")
+            return True
+        # 只写 hm_score 字段，不覆盖其他阶段可能同时写入的指标
+        scores = [{'journal': c['journal'], 'hm_score': c['new']} for c in changes]
+        if not self.save_data(scores, source='hm_score'):
+            return False
+        self.record_history('rescore')
+        return True
+    
+    def run_pipeline(self, dry_run: bool = False, show_diff: bool = True,
+                     easyscholar_key: str = None, refresh_easyscholar: bool = False,
+                     selector: Optional[JournalSelector] = None, scopus_tabs: Optional[int] = None,
+                     force: bool = False) -> bool:
+        """进程内并行运行 Scopus 与出版商两个阶段，合并字段更新后统一计算 HM Score 并一次写入
+        
+        两个阶段访问的主机互不相同（Scopus 走本地 Chrome，出版商走 curl_cffi / FlareSolverr，
+        另有 EasyScholar API），数据只加载一次，两阶段都只返回各自负责的字段更新
+        
+        未指定期刊选择条件时 Scopus 阶段只抓取还没有当前 CiteScore 年份数据的期刊（force=True 时抓取全部）
+        """
+        # 爬虫依赖（DrissionPage / curl_cffi）只在真正抓取时导入，--status 等模式不需要
+        from update_scopus_metrics import collect_scopus_updates, select_due_journals, SCOPUS_FIELDS, SCOPUS_TABS
+        from journal_ranking_updater import JournalRankingUpdater, PUBLISHER_FIELDS, EASYSCHOLAR_FIELDS
+        
+        journal_list = self.load_journal_list()
+        if not journal_list:
+            return False
+        
+        try:
+            store = open_store(self.store_path, self.jrank_file)
+        except Exception as e:
+            logger.error(f"❌ 无法打开期刊数据库: {e}")
+            return False
+        
+        try:
+            existing_data = store.all_records()
+            logger.info(f"📖 加载了 {len(existing_data)} 个期刊数据")
+            # 每个阶段按自己负责字段的最后取得时间单独筛选
+            scopus_list = publisher_list = journal_list
+            if selector and selector.active:
+                timestamps = store.field_timestamps()
+                scopus_list = selector.select(journal_list, existing_data, timestamps,
+                                              SCOPUS_FIELDS, stage='scopus')
+                publisher_list = selector.select(journal_list, existing_data, timestamps,
+                                                 PUBLISHER_FIELDS + EASYSCHOLAR_FIELDS, stage='publisher')
+            elif not force:
+                scopus_list = select_due_journals(journal_list, existing_data)
+            updater = JournalRankingUpdater(
+                easyscholar_key=easyscholar_key or os.environ.get('EASYSCHOLAR_KEY'),
+                refresh_easyscholar=refresh_easyscholar,
+                store_path=self.store_path,
+                dry_run=dry_run
+            )
+            progress = PipelineProgress()
+            
+            start = time.perf_counter()
+            executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='stage')
+            try:
+                scopus_future = executor.submit(collect_scopus_updates, scopus_list,
+                                                {item['journal'] for item in existing_data}, progress,
+                                                tabs=scopus_tabs or SCOPUS_TABS)
+                # 指定了期刊选择条件时，选中的期刊绕过出版商指标和 EasyScholar 缓存
+                publisher_future = executor.submit(updater.collect_updates, publisher_list,
+                                                   existing_data, progress,
+                                                   refresh=bool(selector and selector.active))
+                scopus_updates, _ = self._stage_result('scopus', scopus_future, ({}, 0))
+                _, publisher_updates, easyscholar_updates = self._stage_result(
+                    'publisher', publisher_future, ({}, {}, {}))
+            except KeyboardInterrupt:
+                # 不等待仍在运行的阶段（FlareSolverr 请求最长 190 秒），销毁 session 后交给 main 退出
+                updater.session_pool.close()
+                raise
+            finally:
+                executor.shutdown(wait=False)
+            logger.info(f"⏱️ 两个阶段并行用时 {time.perf_counter() - start:.1f} s")
+            
+            # 合并：Scopus 最后写入，新期刊的橙色字段以 Scopus 为准而不是出版商阶段的空占位
+            batches = [('publisher', publisher_updates), ('easyscholar', easyscholar_updates),
+                       ('scopus', scopus_updates)]
+            merged = {item['journal']: dict(item) for item in existing_data}
+            for _, updates in batches:
+                for journal, fields in updates.items():
+                    merged.setdefault(journal, {'journal': journal}).update(fields)
+            
+            # 所有输入就绪后一次性批量计算 HM Score
+            records = list(merged.values())
+            scores = {}
+            for record, score in zip(records, batch_hm_scores(records)):
+                if record.get('hm_score') != score:
+                    scores[record['journal']] = {'hm_score': score}
+                record['hm_score'] = score
+            batches.append(('hm_score', scores))
+            
+            if dry_run:
+                logger.info("🔍 DRY-RUN: 跳过保存")
+                if show_diff:
+                    self.print_diff(self.compare_data(existing_data, records))
+                return True
+            
+            # 一个事务写入所有阶段的字段，再导出一次 jrank.yml
+            changed = store.upsert_batches(batches)
+            store.export_yaml(self.jrank_file)
+            logger.info(f"✅ 写入 {len(records)} 个期刊 ({changed} 个字段变化)")
+            return True
+        except Exception as e:
+            logger.error(f"❌ 并行更新失败: {e}")
+            return False
+        finally:
+            store.close()
+    
+    @staticmethod
+    def _stage_result(stage: str, future: Future, default: tuple) -> tuple:
+        """一个阶段失败时记录错误并返回空更新，另一个阶段的结果照常写入"""
+        try:
+            return future.result()
+        except Exception as e:
+            logger.error(f"❌ {stage} 阶段失败: {e}")
+            return default
+    
     def run_all(self, dry_run: bool = False, show_diff: bool = True, 
-                easyscholar_key: str = None):
-        """运行所有更新"""
+                easyscholar_key: str = None, refresh_easyscholar: bool = False,
+                selector: Optional[JournalSelector] = None, scopus_tabs: Optional[int] = None,
+                force: bool = False) -> bool:
+        """运行所有更新；并行更新失败时返回 False"""
         print("\n" + "="*80)
         print("🚀 期刊数据统一更新")
         print(f"   时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
         print("="*80 + "\n")
         
-        # 保存更新前的数据
-        old_data = deepcopy(self.load_data())
+        # 记录更新前的状态
+        base_run = self.begin_update(dry_run)
         
-        # 1. 先运行橙色系指标更新（获取 orange_score 等数据）
-        print("\n[1/2] 橙色系指标更新")
-        print("-"*40)
-        self.run_scopus_update(dry_run=dry_run)
-        
-        # 2. 再运行出版商更新（此时 HM score 计算可以使用 orange 数据）
-        print("\n[2/2] 出版商 + EasyScholar 更新 (含 HM Score 计算)")
-        print("-"*40)
-        self.run_publisher_update(dry_run=dry_run, easyscholar_key=easyscholar_key)
+        # 橙色系指标 与 出版商 + EasyScholar 在同一进程内并行更新，HM Score 在合并后计算
+        if not self.run_pipeline(dry_run=dry_run, show_diff=show_diff and dry_run,
+                                 easyscholar_key=easyscholar_key, refresh_easyscholar=refresh_easyscholar,
+                                 selector=selector, scopus_tabs=scopus_tabs, force=force):
+            print("\n❌ 更新失败!")
+            return False
         
-        # 3. 对比差异
-        if show_diff:
-            new_data = self.load_data()
-            diff = self.compare_data(old_data, new_data)
-            self.print_diff(diff)
+        # 记录历史并对比差异
+        self.finish_update(base_run, dry_run, show_diff and not dry_run, source='all')
         
         print("\n✅ 更新完成!")
+        return True
 
 
 def main():
@@ -282,7 +478,13 @@ def main():
   python bin/journal_data_manager.py --orange-only      # 仅更新橙色系指标
   python bin/journal_data_manager.py --publisher-only   # 仅更新出版商数据
   python bin/journal_data_manager.py --status           # 查看数据状态
-  python bin/journal_data_manager.py --dry-run --diff   # 测试模式+显示差异
+  python bin/journal_data_manager.py --rescore-only     # 仅重算 HM Score（不联网）
+  python bin/journal_data_manager.py --diff             # 最近两次运行之间的差异
+  python bin/journal_data_manager.py --all --journal "Educational Psychologist"   # 只更新一个期刊
+  python bin/journal_data_manager.py --publisher-only --publisher wiley --missing-field acceptance_rate
+  python bin/journal_data_manager.py --all --stale-older-than 30d                 # 只更新 30 天未取得的期刊
+  python bin/journal_data_manager.py --all --record .cache/cassettes/run1       # 录制网络响应
+  python bin/journal_data_manager.py --all --replay .cache/cassettes/run1 -n    # 离线回放
         """
     )
     
@@ -297,7 +499,9 @@ def main():
     mode_group.add_argument('--status', '-s', action='store_true',
                            help='显示当前数据状态')
     mode_group.add_argument('--diff', action='store_true',
-                           help='对比当前数据与初始状态')
+                           help='显示最近两次运行之间的差异（来自指标历史）')
+    mode_group.add_argument('--rescore-only', action='store_true',
+                           help='仅用现有 jrank.yml 数据重算 HM Score，不运行爬虫')
     
     # 可选参数
     parser.add_argument('--dry-run', '-n', action='store_true',
@@ -306,48 +510,90 @@ def main():
                        help='EasyScholar API key')
     parser.add_argument('--no-diff', action='store_true',
                        help='不显示差异报告')
+    parser.add_argument('--refresh-easyscholar', action='store_true',
+                       help='忽略 EasyScholar 本地缓存，重新查询所有期刊')
+    parser.add_argument('--scopus-tabs', type=int, metavar='N',
+                       help='Scopus 阶段在同一浏览器内并行处理的标签页数')
+    parser.add_argument('--force', action='store_true',
+                       help='Scopus 阶段忽略 CiteScore 发布年份，重新抓取所有期刊')
+    add_selector_arguments(parser)
+    cassette_group = parser.add_mutually_exclusive_group()
+    cassette_group.add_argument('--record', metavar='DIR',
+                               help='录制所有网络响应到 cassette 目录')
+    cassette_group.add_argument('--replay', metavar='DIR',
+                               help='从 cassette 目录回放网络响应，不访问网络')
     
     args = parser.parse_args()
     
+    # 进程内的抓取直接切换模式，子进程通过环境变量继承
+    if args.record:
+        os.environ[RECORD_ENV] = args.record
+        CASSETTE.configure('record', args.record)
+    if args.replay:
+        os.environ[REPLAY_ENV] = args.replay
+        CASSETTE.configure('replay', args.replay)
+    
     manager = JournalDataManager()
+    selector = JournalSelector.from_args(args)
     
     if args.status:
         manager.show_status()
     elif args.all:
-        manager.run_all(
+        if not manager.run_all(
             dry_run=args.dry_run, 
             show_diff=not args.no_diff,
-            easyscholar_key=args.easyscholar_key
-        )
+            easyscholar_key=args.easyscholar_key,
+            refresh_easyscholar=args.refresh_easyscholar,
+            selector=selector,
+            scopus_tabs=args.scopus_tabs,
+            force=args.force
+        ):
+            sys.exit(1)
     elif args.orange_only:
-        old_data = deepcopy(manager.load_data())
-        manager.run_scopus_update(dry_run=args.dry_run)
-        if not args.no_diff:
-            new_data = manager.load_data()
-            diff = manager.compare_data(old_data, new_data)
-            manager.print_diff(diff)
+        base_run = manager.begin_update(args.dry_run)
+        scopus_args = ['--tabs', str(args.scopus_tabs)] if args.scopus_tabs else []
+        if args.force:
+            scopus_args.append('--force')
+        manager.run_scopus_update(dry_run=args.dry_run, extra_args=scopus_args + selector_cli_args(args))
+        manager.finish_update(base_run, args.dry_run, not args.no_diff, source='scopus')
     elif args.publisher_only:
-        old_data = deepcopy(manager.load_data())
+        base_run = manager.begin_update(args.dry_run)
         manager.run_publisher_update(
             dry_run=args.dry_run, 
-            easyscholar_key=args.easyscholar_key
+            easyscholar_key=args.easyscholar_key,
+            refresh_easyscholar=args.refresh_easyscholar,
+            extra_args=selector_cli_args(args)
         )
-        if not args.no_diff:
-            new_data = manager.load_data()
-            diff = manager.compare_data(old_data, new_data)
-            manager.print_diff(diff)
+        manager.finish_update(base_run, args.dry_run, not args.no_diff, source='publisher')
+    elif args.rescore_only:
+        if not manager.run_rescore(dry_run=args.dry_run, show_diff=not args.no_diff):
+            sys.exit(1)
     elif args.diff:
-        # 仅载入当前数据并显示状态
-        manager.show_status()
+        # 最近两次运行之间的差异（来自历史索引）
+        latest = manager.history.latest_run
+        previous = latest - 1 if latest else None
+        manager.print_diff(manager.history.changes_between(previous, latest))
     else:
         # 默认运行所有更新
         logger.info("未指定参数，默认运行所有更新...")
-        manager.run_all(
+        if not manager.run_all(
             dry_run=args.dry_run, 
             show_diff=not args.no_diff,
-            easyscholar_key=args.easyscholar_key
-        )
+            easyscholar_key=args.easyscholar_key,
+            refresh_easyscholar=args.refresh_easyscholar,
+            selector=selector,
+            scopus_tabs=args.scopus_tabs,
+            force=args.force
+        ):
+            sys.exit(1)
 
 
 if __name__ == "__main__":
-    main()
+    try:
+        main()
+    except KeyboardInterrupt:
+        # 并行阶段的线程可能还在等待 FlareSolverr（最长 190 秒），不等它们结束直接退出
+        logger.info("⏹️ 已中断")
+        CASSETTE.close()
+        logging.shutdown()
+        os._exit(130)
@@ -6,19 +6,31 @@ Collects journal ranking data from multiple sources using FlareSolverr
 
 import json
 import yaml
-import requests
 import time
 import re
 import os
 import sys
 import argparse
-from datetime import datetime
+from datetime import datetime, timedelta
 import logging
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Callable, Tuple
 from urllib.parse import urlparse
 import random
+import threading
+import unicodedata
+import itertools
+import bisect
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, Future, as_completed
 from dotenv import load_dotenv
 
+from hm_score import calculate_hm_score, batch_hm_scores
+from journal_store import JournalStore, open_store, STORE_FILE
+from circuit_breaker import CircuitBreaker, host_of, OPEN as CIRCUIT_OPEN
+from cassette import CASSETTE
+from fetch import FETCH, BROWSER_HEADERS, FetchConnectionError
+from journal_selector import JournalSelector, add_selector_arguments
+
 load_dotenv()
 
 # Configure logging
@@ -34,12 +46,51 @@ USER_AGENTS = [
     'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.2 Safari/605.1.15'
 ]
 
+# 并发配置：session 池大小 & 每个出版商同时处理的期刊数上限
+MIN_SESSIONS = 1
+MAX_SESSIONS = 3
+SESSION_IDLE_TIMEOUT = 60  # 空闲超过该秒数的 session 会被回收（不低于 MIN_SESSIONS）
+DEFAULT_PUBLISHER_CAP = 2
+PUBLISHER_CAPS = {
+    'wiley': 1,  # Wiley 的五秒盾最敏感，单独限流
+}
+
+# 分级抓取：先用 curl_cffi 模拟 Chrome 直接请求，遇到挑战页/空页面再交给 FlareSolverr
+HTTP_IMPERSONATE = 'chrome120'
+HTTP_TIMEOUT = 30
+TIER_HTTP = 'curl_cffi'
+TIER_BROWSER = 'flaresolverr'
+TIER_FAILED = 'failed'
+
+# 熔断：同一主机连续失败（每个页面最多计一次）达到阈值后，冷却期内跳过该主机的期刊
+BREAKER_FAILURES = 5
+BREAKER_COOLDOWN = 600
+
+# EasyScholar 开放接口限流：每秒 2 次（原实现每次调用后 sleep 0.5 秒）
+EASYSCHOLAR_RATE = 2.0
+EASYSCHOLAR_BURST = 1
+EASYSCHOLAR_WORKERS = 2
+EASYSCHOLAR_FIELDS = ('purple_quartile', 'red_division', 'purple_score')  # 写入期刊数据库时来源记为 easyscholar
+PUBLISHER_FIELDS = ('publisher', 'acceptance_rate', 'first_decision_time', 'review_time',
+                    'acceptance_time', 'publication_time')  # 来源记为 publisher
+
+# 本地缓存（随仓库提交，供每月任务复用）
+CACHE_DIR = '.cache/journal_rankings'
+EASYSCHOLAR_CACHE_FILE = os.path.join(CACHE_DIR, 'easyscholar.json')
+EASYSCHOLAR_TTL_DAYS = 90           # JCR/CAS 每年更新一次，季度刷新足够
+EASYSCHOLAR_NEGATIVE_TTL_DAYS = 30  # 查不到的期刊隔一个月再试
+METRICS_CACHE_FILE = os.path.join(CACHE_DIR, 'publisher_metrics.json')
+METRICS_TTL_DAYS = 60               # 接受率/审稿周期一年只变几次
+
+_session_counter = itertools.count(1)
+
 class FlareSolverrClient:
     """Client for FlareSolverr to bypass anti-bot protection (Enhanced for Wiley)"""
     
-    def __init__(self, base_url: str = FLARESOLVERR_URL):
+    def __init__(self, base_url: str = FLARESOLVERR_URL, breaker: Optional[CircuitBreaker] = None):
         self.base_url = base_url
         self.session = None
+        self.breaker = breaker
         
     def create_session(self) -> Optional[str]:
         """Create a new FlareSolverr session"""
@@ -48,8 +99,14 @@ class FlareSolverrClient:
             if self.session:
                 self.destroy_session()
                 
-            session_id = f"journal_session_{int(time.time())}"
-            response = requests.post(f"{self.base_url}/v1", json={
+            # FlareSolverr 服务本身也按主机熔断
+            if self.breaker and not self.breaker.allow(self.base_url):
+                logger.warning(f"   ⛔ Circuit open for FlareSolverr ({host_of(self.base_url)}), not creating a session")
+                return None
+            
+            # 多个 session 可能在同一秒内创建，加序号避免重名
+            session_id = f"journal_session_{int(time.time())}_{next(_session_counter)}"
+            response = FETCH.post('flaresolverr', f"{self.base_url}/v1", json={
                 "cmd": "sessions.create",
                 "session": session_id,
                 # 显式指定浏览器参数，尝试模拟真实环境
@@ -60,41 +117,63 @@ class FlareSolverrClient:
             if data.get("status") == "ok":
                 self.session = session_id
                 logger.info(f"Created FlareSolverr session: {self.session}")
+                self._record(self.base_url, True)
                 return self.session
             else:
                 logger.error(f"Failed to create session: {data}")
+                self._record(self.base_url, False)
                 return None
         except Exception as e:
             logger.error(f"Error creating FlareSolverr session: {e}")
+            self._record(self.base_url, False)
             return None
     
+    def _record(self, url: str, success: bool):
+        if self.breaker:
+            if success:
+                self.breaker.record_success(url)
+            else:
+                self.breaker.record_failure(url)
+    
     def get_page(self, url: str) -> Optional[str]:
         """Get page content using FlareSolverr with Retry Logic"""
         # 增加最大超时时间到 3 分钟 (180000ms)
         # Wiley 的五秒盾有时候会卡很久
         max_timeout = 180000 
         
+        # 熔断只按页面计数：两次尝试都失败才记一次失败，避免一个期刊就让整个出版商域名熔断
+        if self.breaker and not self.breaker.allow(url):
+            logger.warning(f"   ⛔ Circuit open for {host_of(url)}, skipping {url}")
+            return None
+        target_failed = service_failed = False
+        
         for attempt in range(2): # 尝试 2 次
+            # 其他线程已让该主机熔断：直接放弃，不再消耗 190 秒的超时
+            if attempt and self.breaker and self.breaker.state(url) == CIRCUIT_OPEN:
+                logger.warning(f"   ⛔ Circuit open for {host_of(url)}, skipping {url}")
+                break
+            
             if not self.session:
                 if not self.create_session():
-                    return None
+                    break
             
             try:
                 logger.info(f"   🔄 Requesting page (Attempt {attempt+1}): {url}")
                 
-                # 注意：Python 的 requests timeout 必须比 FlareSolverr 的 maxTimeout 大
-                # 这里设为 190秒，给 FlareSolverr 留出 180秒 处理时间
-                response = requests.post(f"{self.base_url}/v1", json={
+                # 注意：HTTP timeout 必须比 FlareSolverr 的 maxTimeout 大
+                # 这里设为 190秒，给 FlareSolverr 留出 180秒 处理时间；重试由本循环负责
+                response = FETCH.post('flaresolverr', f"{self.base_url}/v1", json={
                     "cmd": "request.get",
                     "url": url,
                     "maxTimeout": max_timeout,
                     "session": self.session,
                     # 只要 HTML 下载完就算成功，不需要等所有图片加载完 (networkidle0有时会卡死)
                     "returnOnlyHtml": True 
-                }, timeout=190) 
+                }, timeout=190, retries=0) 
                 
                 if response.status_code == 500:
                     logger.warning(f"   ⚠️ FlareSolverr 500 Error (Timeout?). Destroying session and retrying...")
+                    target_failed = True
                     self.destroy_session() # 销毁当前 session，下次循环会重建
                     continue
 
@@ -108,40 +187,382 @@ class FlareSolverrClient:
                     # 简单检查是否真的拿到了内容，而不是 blocked 页面
                     if "Just a moment" in html and len(html) < 5000:
                          logger.warning("   ⚠️ Still stuck on Cloudflare challenge.")
+                         target_failed = True
                          self.destroy_session()
                          continue
-                         
+                    
+                    self._record(url, True)
                     return html
                 else:
                     logger.error(f"FlareSolverr request failed: {data}")
+                    target_failed = True
                     self.destroy_session() # 失败就销毁，保持环境干净
                     
+            except FetchConnectionError as e:
+                # 连不上 FlareSolverr 本身，不算目标主机的失败
+                logger.error(f"Error connecting to FlareSolverr for {url}: {e}")
+                service_failed = True
+                self.destroy_session()
             except Exception as e:
                 logger.error(f"Error fetching page {url}: {e}")
+                target_failed = True
                 self.destroy_session()
-                
+        
+        if target_failed:
+            self._record(url, False)
+        if service_failed:
+            self._record(self.base_url, False)
         return None
     
     def destroy_session(self):
         """Destroy the FlareSolverr session"""
         if self.session:
             try:
-                requests.post(f"{self.base_url}/v1", json={
+                FETCH.post('flaresolverr', f"{self.base_url}/v1", json={
                     "cmd": "sessions.destroy",
                     "session": self.session
-                }, timeout=10)
+                }, timeout=10, retries=0)
                 logger.info(f"Destroyed FlareSolverr session: {self.session}")
             except Exception as e:
                 logger.error(f"Error destroying session: {e}")
             finally:
                 self.session = None
 
+class FlareSolverrSessionPool:
+    """Pool of FlareSolverr sessions; each session is checked out by one worker at a time"""
+    
+    def __init__(self, base_url: str = FLARESOLVERR_URL, min_size: int = MIN_SESSIONS,
+                 max_size: int = MAX_SESSIONS, idle_timeout: float = SESSION_IDLE_TIMEOUT,
+                 breaker: Optional[CircuitBreaker] = None):
+        self.base_url = base_url
+        self.breaker = breaker
+        self.min_size = max(0, min_size)
+        self.max_size = max(1, max_size, self.min_size)
+        self.idle_timeout = idle_timeout
+        self._clients: List[FlareSolverrClient] = []
+        self._idle: List[tuple] = []  # (client, released_at)
+        self._cond = threading.Condition()
+        self._closed = False
+    
+    def acquire(self) -> FlareSolverrClient:
+        """Check out an idle client, or create one while the pool is below max_size"""
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise RuntimeError("FlareSolverr session pool is closed")
+                if self._idle:
+                    client, _ = self._idle.pop()
+                    return client
+                if len(self._clients) < self.max_size:
+                    client = FlareSolverrClient(self.base_url, breaker=self.breaker)
+                    self._clients.append(client)
+                    logger.info(f"🧵 Session pool expanded to {len(self._clients)}/{self.max_size}")
+                    return client
+                self._cond.wait()
+    
+    def release(self, client: FlareSolverrClient):
+        """Return a client to the pool and shrink idle sessions above min_size"""
+        with self._cond:
+            if self._closed or client not in self._clients:
+                expired = [client]
+            else:
+                self._idle.append((client, time.monotonic()))
+                expired = self._shrink_locked()
+                self._cond.notify()
+        # 销毁 session 是一次 FlareSolverr 请求（最长 10 秒），不能持锁进行，否则阻塞所有等待借出的线程
+        for expired_client in expired:
+            expired_client.destroy_session()
+    
+    def _shrink_locked(self) -> List[FlareSolverrClient]:
+        """Remove idle clients above min_size; the caller destroys them after releasing the lock"""
+        now = time.monotonic()
+        expired = []
+        for client, released_at in list(self._idle):
+            if len(self._clients) <= self.min_size:
+                break
+            if now - released_at >= self.idle_timeout:
+                self._idle.remove((client, released_at))
+                self._clients.remove(client)
+                expired.append(client)
+                logger.info(f"🧵 Session pool shrunk to {len(self._clients)}/{self.max_size}")
+        return expired
+    
+    @contextmanager
+    def session(self):
+        client = self.acquire()
+        try:
+            yield client
+        finally:
+            self.release(client)
+    
+    def get_page(self, url: str) -> Optional[str]:
+        """Fetch a page with whichever pooled session is free"""
+        with self.session() as client:
+            return client.get_page(url)
+    
+    def open(self):
+        """Allow checkouts again after close() (the updater reopens the pool for every run)"""
+        with self._cond:
+            self._closed = False
+    
+    def close(self):
+        """Destroy every session in the pool (safe to call more than once)
+        
+        Clients still checked out are destroyed when they are released; acquire() fails until open()
+        """
+        with self._cond:
+            self._closed = True
+            clients, self._clients, self._idle = self._clients, [], []
+            self._cond.notify_all()
+        for client in clients:
+            client.destroy_session()
+
+def exit_now(code: int):
+    """Exit without joining worker threads
+    
+    进行中的 FlareSolverr 请求（最长 190 秒）跑在线程池的非守护线程里，sys.exit 会等它们全部结束；
+    中断时先销毁 session，再刷新日志和 cassette 后直接退出
+    """
+    CASSETTE.close()
+    logging.shutdown()
+    sys.stdout.flush()
+    sys.stderr.flush()
+    os._exit(code)
+
+def looks_blocked(html: Optional[str]) -> bool:
+    """Empty page or Cloudflare challenge instead of real content"""
+    if not html or not html.strip():
+        return True
+    if "Just a moment" in html and len(html) < 5000:
+        return True
+    return '_cf_chl_opt' in html
+
+# 挑战页 / 拦截页的标记：200、403、503 的响应中出现挑战标记，或 403 的拦截页，
+# 认为该主机拦截了直接请求
+CHALLENGE_STATUSES = (200, 403, 503)
+CHALLENGE_MARKERS = ('_cf_chl_opt', 'cf-browser-verification', 'Attention Required! | Cloudflare')
+BLOCK_MARKERS = ('Access Denied', 'Request blocked')
+
+def is_challenge_page(status: int, html: Optional[str]) -> bool:
+    """Challenge or block page served instead of the requested one"""
+    if status not in CHALLENGE_STATUSES or not html:
+        return False
+    if "Just a moment" in html and len(html) < 5000:
+        return True
+    if any(marker in html for marker in CHALLENGE_MARKERS):
+        return True
+    return status == 403 and any(marker in html for marker in BLOCK_MARKERS)
+
+class TieredFetcher:
+    """get_page(url): impersonated HTTP first, a pooled FlareSolverr session only when needed
+    
+    某个主机在 HTTP 层遇到挑战页后，本次运行内该主机的后续请求直接走 FlareSolverr；
+    其他失败（404、超时、临时错误）只让当前 URL 改用 FlareSolverr
+    """
+    
+    def __init__(self, session_pool: FlareSolverrSessionPool, http_timeout: float = HTTP_TIMEOUT):
+        self.session_pool = session_pool
+        self.http_timeout = http_timeout
+        self._browser_hosts: set = set()
+        self._tiers: Dict[str, str] = {}
+        self._lock = threading.Lock()
+    
+    def fetch_http(self, url: str) -> Tuple[Optional[str], bool]:
+        """One impersonated HTTP request; returns (html, challenged)
+        
+        html is None on errors, non-200 responses and challenge pages; challenged is True only when
+        the host answered with a challenge or block page
+        """
+        try:
+            # 不重试：挑战页/错误直接交给 FlareSolverr
+            response = FETCH.get(TIER_HTTP, url, impersonate=HTTP_IMPERSONATE, timeout=self.http_timeout,
+                                 headers=BROWSER_HEADERS, retries=0)
+            if is_challenge_page(response.status_code, response.text):
+                logger.info(f"   ↪️ [{TIER_HTTP}] HTTP {response.status_code} challenge for {url}, "
+                            f"using FlareSolverr for {host_of(url)} from now on")
+                return None, True
+            if response.status_code == 200 and not looks_blocked(response.text):
+                return response.text, False
+            logger.info(f"   ↪️ [{TIER_HTTP}] HTTP {response.status_code} for {url}, falling back to FlareSolverr")
+        except Exception as e:
+            logger.info(f"   ↪️ [{TIER_HTTP}] {e} for {url}, falling back to FlareSolverr")
+        return None, False
+    
+    def get_page(self, url: str) -> Optional[str]:
+        host = host_of(url)
+        with self._lock:
+            http_allowed = host not in self._browser_hosts
+        if http_allowed:
+            html, challenged = self.fetch_http(url)
+            if html:
+                self._record(url, TIER_HTTP)
+                return html
+            if challenged:
+                with self._lock:
+                    self._browser_hosts.add(host)
+        return self.get_rendered_page(url)
+    
+    def get_rendered_page(self, url: str) -> Optional[str]:
+        """Fetch through FlareSolverr directly (e.g. when the HTTP page lacks script-rendered content)"""
+        html = self.session_pool.get_page(url)
+        self._record(url, TIER_BROWSER if html else TIER_FAILED)
+        return html
+    
+    def _record(self, url: str, tier: str):
+        logger.info(f"   📡 [{tier}] {url}")
+        with self._lock:
+            self._tiers[url] = tier
+    
+    def tier_of(self, url: str) -> Optional[str]:
+        with self._lock:
+            return self._tiers.get(url)
+    
+    def log_report(self):
+        """Which tier answered each request in this run"""
+        with self._lock:
+            tiers = dict(self._tiers)
+        if not tiers:
+            return
+        counts = {tier: sum(1 for t in tiers.values() if t == tier) for tier in (TIER_HTTP, TIER_BROWSER, TIER_FAILED)}
+        logger.info(f"📡 Fetch tiers: {TIER_HTTP} {counts[TIER_HTTP]} | {TIER_BROWSER} {counts[TIER_BROWSER]} | "
+                    f"{TIER_FAILED} {counts[TIER_FAILED]}")
+        for url, tier in sorted(tiers.items(), key=lambda item: (item[1], item[0])):
+            logger.info(f"   {tier:12} {url}")
+
+class JsonTTLCache:
+    """Persistent key -> value cache with per-entry expiry, stored as one JSON file"""
+    
+    def __init__(self, path: str, ttl_days: float):
+        self.path = path
+        self.ttl = timedelta(days=ttl_days)
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self.hits = 0
+        self.misses = 0
+        self._dirty = False
+        self.read_only = False  # dry-run: 照常读取和更新内存中的条目，但不写回文件
+        self._lock = threading.Lock()
+        self.load()
+    
+    def load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.entries = json.load(f).get('entries', {})
+            logger.info(f"Loaded {len(self.entries)} cache entries from {self.path}")
+        except FileNotFoundError:
+            self.entries = {}
+        except Exception as e:
+            logger.warning(f"⚠️ Ignoring unreadable cache {self.path}: {e}")
+            self.entries = {}
+    
+    def get_entry(self, key: str, allow_stale: bool = False) -> Optional[Dict[str, Any]]:
+        """Return the raw entry ({value, fetched_at, expires_at}) if present and fresh"""
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry and (allow_stale or datetime.now().isoformat() < entry.get('expires_at', '')):
+                self.hits += 1
+                return entry
+            self.misses += 1
+            return None
+    
+    def get(self, key: str) -> Optional[Any]:
+        entry = self.get_entry(key)
+        return entry['value'] if entry else None
+    
+    def put(self, key: str, value: Any, ttl: Optional[timedelta] = None):
+        now = datetime.now()
+        with self._lock:
+            self.entries[key] = {
+                'value': value,
+                'fetched_at': now.isoformat(timespec='seconds'),
+                'expires_at': (now + (ttl or self.ttl)).isoformat(timespec='seconds'),
+            }
+            self._dirty = True
+    
+    def save(self):
+        """Write the cache atomically (only if something changed)"""
+        with self._lock:
+            if not self._dirty:
+                return
+            if self.read_only:
+                logger.info(f"DRY-RUN: not saving {len(self.entries)} cache entries to {self.path}")
+                return
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'entries': self.entries}, f, ensure_ascii=False, indent=1, sort_keys=True)
+            os.replace(tmp_path, self.path)
+            self._dirty = False
+        logger.info(f"💾 Saved {len(self.entries)} cache entries to {self.path} "
+                    f"(hits={self.hits}, misses={self.misses})")
+
+def normalize_journal_name(name: str) -> str:
+    """Cache key for a journal: case/punctuation/'&' insensitive"""
+    text = unicodedata.normalize('NFKC', name or '').lower().replace('&', ' and ')
+    text = re.sub(r'[^\w\s]', ' ', text)
+    return re.sub(r'\s+', ' ', text).strip()
+
+class EasyScholarCache(JsonTTLCache):
+    """EasyScholar rankings keyed by normalized journal name, with negative caching"""
+    
+    def __init__(self, path: str = EASYSCHOLAR_CACHE_FILE, ttl_days: float = EASYSCHOLAR_TTL_DAYS,
+                 negative_ttl_days: float = EASYSCHOLAR_NEGATIVE_TTL_DAYS):
+        super().__init__(path, ttl_days)
+        self.negative_ttl = timedelta(days=negative_ttl_days)
+    
+    def get_rank(self, journal_name: str) -> Optional[Dict[str, Any]]:
+        """Cached result ({} means a cached "not found"), or None on a miss"""
+        return self.get(normalize_journal_name(journal_name))
+    
+    def put_rank(self, journal_name: str, result: Dict[str, Any]):
+        ttl = self.ttl if any(result.values()) else self.negative_ttl
+        self.put(normalize_journal_name(journal_name), result, ttl)
+
+class MetricsCache(JsonTTLCache):
+    """Extracted publisher-page metrics keyed by (publisher, URL)"""
+    
+    def __init__(self, path: str = METRICS_CACHE_FILE, ttl_days: float = METRICS_TTL_DAYS):
+        super().__init__(path, ttl_days)
+    
+    @staticmethod
+    def make_key(publisher_key: str, url: str) -> str:
+        return f"{publisher_key}|{url}"
+
+class TokenBucket:
+    """Thread-safe token bucket; acquire() blocks until a token is available"""
+    
+    def __init__(self, rate: float, capacity: int = 1):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def acquire(self):
+        # 先在锁内预留令牌（允许为负），再在锁外等待，调用方按到达顺序获得发送时间
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0
+        if wait > 0:
+            time.sleep(wait)
+
 class EasyScholarCrawler:
     """Crawler for EasyScholar API - 紫色分区、红色分区、紫色分数"""
     
-    def __init__(self, secret_key: str):
+    def __init__(self, secret_key: str, rate: float = EASYSCHOLAR_RATE,
+                 burst: int = EASYSCHOLAR_BURST, max_workers: int = EASYSCHOLAR_WORKERS,
+                 cache: Optional[EasyScholarCache] = None, refresh: bool = False):
         self.api_url = "https://www.easyscholar.cc/open/getPublicationRank"
         self.secret_key = secret_key
+        # refresh=True 时忽略缓存命中，但仍会写回最新结果
+        self.cache = cache
+        self.refresh = refresh
+        # 按接口公布的限流精确放行，取代每次调用后的固定 sleep
+        self.rate_limiter = TokenBucket(rate, burst)
+        self.max_workers = max_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
         
     def get_journal_rank(self, journal_name: str) -> Dict[str, Any]:
         """
@@ -157,11 +578,34 @@ class EasyScholarCrawler:
                 'impact_factor': '5.4'     # 紫色分数
             }
         """
+        return self.lookup(journal_name)[0]
+    
+    def lookup(self, journal_name: str, refresh: bool = False) -> Tuple[Dict[str, Any], bool]:
+        """(result as in get_journal_rank, whether it came from the API rather than the cache)"""
+        if self.cache and not (self.refresh or refresh):
+            cached = self.cache.get_rank(journal_name)
+            if cached is not None:
+                logger.info(f"   💾 [EasyScholar] 缓存命中: {journal_name}")
+                return dict(cached), False
+        
+        result = self._fetch_journal_rank(journal_name)
+        if result is None:
+            # 网络/接口错误不写缓存，下次运行重试
+            return {}, False
+        if self.cache:
+            self.cache.put_rank(journal_name, result)
+        return result, True
+    
+    def _fetch_journal_rank(self, journal_name: str) -> Optional[Dict[str, Any]]:
+        """Query the API; {} for "not found", None for errors that should not be cached"""
         try:
             logger.info(f"   🔍 [EasyScholar] 查询期刊: {journal_name}")
             
-            response = requests.get(
-                self.api_url,
+            if not CASSETTE.replaying:
+                self.rate_limiter.acquire()
+            # 共用的 HTTP 客户端：每个工作线程复用自己的 TLS 连接，429/5xx 自动退避重试
+            response = FETCH.get(
+                'easyscholar', self.api_url,
                 params={
                     'secretKey': self.secret_key,
                     'publicationName': journal_name
@@ -172,7 +616,7 @@ class EasyScholarCrawler:
             data = response.json()
             
             if data.get('code') == 200:
-                official_rank = data.get('data', {}).get('officialRank', {}).get('select', {})
+                official_rank = ((data.get('data') or {}).get('officialRank') or {}).get('select') or {}
                 
                 result = {
                     'purple_quartile': official_rank.get('ssci', ''),      # SSCI/SCI分区
@@ -180,39 +624,156 @@ class EasyScholarCrawler:
                     'purple_score': official_rank.get('sciif', '')     # Impact Factor
                 }
                 
+                if not any(result.values()):
+                    logger.info(f"   ➖ [EasyScholar] 未收录: {journal_name}")
+                    return {}
+                
                 logger.info(f"   ✅ [EasyScholar] 紫色分区={result['purple_quartile']}, "
                           f"红色分区={result['red_division']}, 紫色分数={result['purple_score']}")
                 
-                # 必须的 0.5 秒延迟
-                time.sleep(0.5)
-                
                 return result
             else:
                 logger.warning(f"   ⚠️ [EasyScholar] API 错误: {data.get('msg')}")
-                time.sleep(0.5)  # 即使失败也延迟
-                return {}
+                return None
                 
         except Exception as e:
             logger.error(f"   ❌ [EasyScholar] 调用失败: {e}")
-            time.sleep(0.5)  # 确保总是延迟
-            return {}
+            return None
+    
+    def get_journal_rank_async(self, journal_name: str, refresh: bool = False) -> Future:
+        """Queue a lookup in the background; the result is (dict, fetched) as in lookup"""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                thread_name_prefix='easyscholar')
+        return self._executor.submit(self.lookup, journal_name, refresh)
+    
+    def get_journal_ranks_async(self, journal_names: List[str], refresh: bool = False) -> Dict[str, Future]:
+        """Queue a batch of lookups; they run alongside the publisher crawls"""
+        return {name: self.get_journal_rank_async(name, refresh) for name in dict.fromkeys(journal_names)}
+    
+    def close(self, cancel: bool = False):
+        if self._executor is not None:
+            self._executor.shutdown(wait=not cancel, cancel_futures=cancel)
+            self._executor = None
+        if self.cache:
+            self.cache.save()
 
 
 class PublisherCrawler:
     """Base class for publisher crawlers"""
     
+    PUBLISHER = ''
+    # 指标区域锚点（小写，纯子串查找）：取包含最多种锚点的 REGION_MAX 窗口（导航、简介中零星出现的
+    # 锚点词不会截断真正的指标区域），从其中第一个锚点前 REGION_BEFORE 到最后一个锚点后 REGION_AFTER
+    REGION_ANCHORS: tuple = ()
+    REGION_BEFORE = 0
+    REGION_AFTER = 2000
+    REGION_MAX = 64 * 1024
+    
     def __init__(self, flaresolverr_client: FlareSolverrClient):
+        # 任何提供 get_page(url) 的对象均可（单个 client、session 池中签出的 client 或 TieredFetcher）
         self.client = flaresolverr_client
     
+    def metrics_url(self, url: str) -> str:
+        """Page that carries the metrics for a journal URL"""
+        return url
+    
     def extract_metrics(self, url: str) -> Dict[str, Any]:
-        """Extract metrics from publisher page - to be implemented by subclasses"""
+        """Fetch the metrics page, cut out the metrics region and parse it"""
+        url = self.metrics_url(url)
+        logger.info(f"Fetching {self.PUBLISHER} data from: {url}")
+        html = self.client.get_page(url)
+        if not html:
+            return {}
+        
+        regions = self.metrics_regions(html)
+        if not regions and getattr(self.client, 'tier_of', lambda u: None)(url) == TIER_HTTP:
+            # 直接请求拿到的页面没有指标区域（可能由脚本渲染），改用 FlareSolverr 渲染后再找
+            html = self.client.get_rendered_page(url)
+            if not html:
+                return {}
+            regions = self.metrics_regions(html)
+        if not regions:
+            logger.warning(f"⚠️ {self.PUBLISHER} metrics anchors {self.REGION_ANCHORS} not found "
+                           f"on {url} - page layout may have changed")
+            return {}
+        
+        for region in regions:
+            metrics = self.parse_metrics(region)
+            if self._has_metrics(metrics):
+                break
+        else:
+            # 所有窗口里都没有解析出指标：在整个页面上重新解析
+            logger.info(f"   {self.PUBLISHER} metrics regions of {url} yielded nothing, parsing the whole page")
+            metrics = self.parse_metrics(html)
+        logger.info(f"Extracted {self.PUBLISHER} metrics: {metrics}")
+        return metrics
+    
+    @staticmethod
+    def _has_metrics(metrics: Dict[str, Any]) -> bool:
+        return any(value for key, value in metrics.items() if key != 'publisher')
+    
+    def metrics_regions(self, html: str) -> List[str]:
+        """Bounded windows around clusters of metrics anchors, densest first; empty if no anchor is present"""
+        if not self.REGION_ANCHORS:
+            return [html]
+        lower = html.lower()
+        found = []
+        for anchor in self.REGION_ANCHORS:
+            i = lower.find(anchor)
+            while i != -1:
+                found.append((i, i + len(anchor), anchor))
+                i = lower.find(anchor, i + 1)
+        found.sort()
+        # 每个锚点出现处作为窗口起点，窗口内锚点种类越多越靠前（相同时靠前的优先）；
+        # 起点落在已选窗口内的窗口跳过
+        positions = [item[0] for item in found]
+        windows = []
+        for n, (first, _, _) in enumerate(found):
+            window = found[n:bisect.bisect_left(positions, first + self.REGION_MAX)]
+            windows.append((-len({anchor for _, _, anchor in window}), first, max(item[1] for item in window)))
+        regions, taken = [], []
+        for _, first, last in sorted(windows):
+            if any(start <= first < end for start, end in taken):
+                continue
+            start = max(0, first - self.REGION_BEFORE)
+            end = min(len(html), last + self.REGION_AFTER, start + self.REGION_MAX)
+            taken.append((first, end))
+            regions.append(html[start:end])
+        return regions
+    
+    def parse_metrics(self, html: str) -> Dict[str, Any]:
+        """Extract metrics from page HTML - to be implemented by subclasses"""
         return {}
 
 class WileyCrawler(PublisherCrawler):
-    """Crawler for Wiley journals - 优化版"""
+    """Crawler for Wiley journals - 单遍扫描版"""
     
-    def extract_metrics(self, url: str) -> Dict[str, Any]:
-        """Extract metrics from Wiley journal-metrics page"""
+    PUBLISHER = 'Wiley'
+    # journal-metrics 页面上的各指标标签；值在标签之后的 <p> 中
+    REGION_ANCHORS = ('acceptance rate', 'submission to first decision', 'submission to decision after review',
+                      'submission to acceptance', 'acceptance to publication')
+    REGION_AFTER = 1000
+    
+    # 一次扫描全文的词法规则：只识别标签文字和 "<p> 数值" 两类记号，
+    # 没有 .*? 跨文档回溯，运行时间与页面大小成线性
+    # HTML: <span class="label">Submission to first decision <span> (median) </span>: </span></h4><p> 29 days </p>
+    # 在小写化的页面上匹配；开头的 (?=[as<]) 让引擎快速跳过不可能开始记号的位置
+    LABELS = {
+        'acceptance_rate': r'acceptance\s+rate',
+        'first_decision_time': r'submission\s+to\s+first\s+decision',
+        'review_time': r'submission\s+to\s+decision\s+after\s+review',  # 部分期刊页面中不存在，作为预留
+        'acceptance_time': r'submission\s+to\s+acceptance',
+        'publication_time': r'acceptance\s+to\s+publication',
+    }
+    TOKEN_RE = re.compile(
+        r'(?=[as<])(?:'
+        + '|'.join(f'(?P<{field}>{label})' for field, label in LABELS.items())
+        + r'|<p>\s*(?P<num>\d+(?:\.\d+)?)(?P<unit>%|\s*days))'
+    )
+    
+    def metrics_url(self, url: str) -> str:
+        """Wiley journal-metrics page"""
         # 确保 URL 指向 metrics 页面
         if "journal-metrics" not in url:
             # 处理类似 /journal/1234/ 的 URL
@@ -221,69 +782,71 @@ class WileyCrawler(PublisherCrawler):
             # 如果结尾不是 metrics
             if not url.endswith("journal-metrics") and "journal-metrics" not in url:
                 url = f"{url.rstrip('/')}/journal-metrics"
-        
-        logger.info(f"Fetching Wiley data from: {url}")
-        html = self.client.get_page(url)
-        if not html:
-            return {}
-        
+        return url
+    
+    def parse_metrics(self, html: str) -> Dict[str, Any]:
+        """Pull all label/value pairs out of the page in one pass"""
         metrics = {
             'acceptance_rate': '',
             'first_decision_time': '',
-            'review_time': '', # 这个指标在你提供的HTML中不存在，作为预留
+            'review_time': '',
             'acceptance_time': '',
             'publication_time': '',
             'publisher': 'Wiley'
         }
         
         try:
-            # 使用 re.DOTALL 让 . 可以匹配换行符
-            # 使用 re.IGNORECASE 忽略大小写
-            
-            # 1. Extract Acceptance rate
-            # HTML: <span class="label">Acceptance rate: </span></h4><p> 11%</p>
-            # 逻辑: 找到 "Acceptance rate"，跳过中间所有字符直到遇到 <p>，然后提取数字
-            ar_match = re.search(r'Acceptance\s+rate.*?<p>\s*(\d+(?:\.\d+)?)%', html, re.DOTALL | re.IGNORECASE)
-            if ar_match:
-                metrics['acceptance_rate'] = f"{ar_match.group(1)}%"
-            
-            # 2. Extract Submission to first decision
-            # HTML: <span class="label">Submission to first decision <span> (median) </span>: </span></h4><p> 29 days </p>
-            # 逻辑: 这里的 .*? 会自动跳过中间的 <span> (median) </span> 结构
-            sfd_match = re.search(r'Submission\s+to\s+first\s+decision.*?<p>\s*(\d+)\s*days', html, re.DOTALL | re.IGNORECASE)
-            if sfd_match:
-                metrics['first_decision_time'] = f"{sfd_match.group(1)} days"
-            
-            # 3. Extract Submission to decision after review
-            # 注意：你提供的 HTML 中没有这一项，但如果其他 Wiley 期刊有，这个正则可以匹配
-            sdar_match = re.search(r'Submission\s+to\s+decision\s+after\s+review.*?<p>\s*(\d+)\s*days', html, re.DOTALL | re.IGNORECASE)
-            if sdar_match:
-                metrics['review_time'] = f"{sdar_match.group(1)} days"
-            
-            # 4. Extract Submission to acceptance
-            # HTML: <span class="label">Submission to acceptance <span> (median) </span>: </span></h4><p> 214 days </p>
-            sa_match = re.search(r'Submission\s+to\s+acceptance.*?<p>\s*(\d+)\s*days', html, re.DOTALL | re.IGNORECASE)
-            if sa_match:
-                metrics['acceptance_time'] = f"{sa_match.group(1)} days"
-            
-            # 5. Extract Acceptance to publication
-            # HTML: <span class="label">Acceptance to publication <span> (median) </span>: </span></h4><p> 15 days </p>
-            ap_match = re.search(r'Acceptance\s+to\s+publication.*?<p>\s*(\d+)\s*days', html, re.DOTALL | re.IGNORECASE)
-            if ap_match:
-                metrics['publication_time'] = f"{ap_match.group(1)} days"
-            
-            logger.info(f"Extracted Wiley metrics: {metrics}")
-            
+            # 标签首次出现后，其后第一个格式匹配的 <p> 数值即为该字段的值
+            # (接受率为 "数字%"，其余为 "整数 days")
+            pending = set(self.LABELS)
+            armed = set()
+            for m in self.TOKEN_RE.finditer(html.lower()):
+                field = m.lastgroup
+                if field in pending:
+                    pending.discard(field)
+                    armed.add(field)
+                elif m.group('num') and armed:
+                    num, is_rate = m.group('num'), m.group('unit') == '%'
+                    for field in list(armed):
+                        if field == 'acceptance_rate' and is_rate:
+                            metrics[field] = f"{num}%"
+                        elif field != 'acceptance_rate' and not is_rate and '.' not in num:
+                            metrics[field] = f"{num} days"
+                        else:
+                            continue
+                        armed.discard(field)
+                    if not pending and not armed:
+                        break
         except Exception as e:
             logger.error(f"Error parsing Wiley HTML: {e}")
         
         return metrics
     
 class TaylorFrancisCrawler(PublisherCrawler):
-    """Crawler for Taylor & Francis journals - 最终防贪婪匹配版"""
+    """Crawler for Taylor & Francis journals - 单遍扫描版"""
     
-    def extract_metrics(self, url: str) -> Dict[str, Any]:
-        """Extract metrics from Taylor & Francis about-this-journal page"""
+    PUBLISHER = 'Taylor & Francis'
+    # 指标标签；数值在标签之前的 <strong> 中
+    REGION_ANCHORS = ('acceptance rate', 'submission to first decision', 'post-review decision',
+                      'acceptance to online publication', 'submission to acceptance')
+    REGION_BEFORE = 500
+    REGION_AFTER = 200
+    
+    # 规则: <strong>数值</strong> 之后、下一个 <strong> 之前出现标签，则该数值属于该标签
+    # (不跨越下一个 <strong>，防止匹配到上面错误的数字)
+    # 按 <strong> 切分页面（str.split 是 C 级别的子串查找），只在以数值开头的区段里查找标签
+    LABELS = {
+        'acceptance_rate': r'acceptance\s+rate',
+        'first_decision_time': r'submission\s+to\s+first\s+decision',
+        'review_time': r'submission\s+to\s+first\s+post-review\s+decision',
+        'publication_time': r'acceptance\s+to\s+online\s+publication',
+        'acceptance_time': r'submission\s+to\s+acceptance',
+    }
+    VALUE_RE = re.compile(r'\s*(?P<num>\d+(?:\.\d+)?)\s*(?P<pct>%?)\s*</strong>')
+    LABEL_RE = re.compile('|'.join(f'(?P<{field}>{label})' for field, label in LABELS.items()))
+    
+    def metrics_url(self, url: str) -> str:
+        """Taylor & Francis about-this-journal page"""
         if "about-this-journal" not in url:
             base_url = url.split('#')[0].rstrip('/')
             url = f"{base_url}/about-this-journal"
@@ -291,12 +854,10 @@ class TaylorFrancisCrawler(PublisherCrawler):
         # 加上锚点方便日志排查
         if "#aims-and-scope" not in url:
             url = f"{url}#aims-and-scope"
-        
-        logger.info(f"Fetching Taylor & Francis data from: {url}")
-        html = self.client.get_page(url)
-        if not html:
-            return {}
-        
+        return url
+    
+    def parse_metrics(self, html: str) -> Dict[str, Any]:
+        """Pair each <strong> number with the labels that follow it (before the next <strong>)"""
         metrics = {
             'acceptance_rate': '',
             'first_decision_time': '',
@@ -307,37 +868,27 @@ class TaylorFrancisCrawler(PublisherCrawler):
         }
         
         try:
-            # 核心修正：使用 (?:(?!<strong>).)*? 代替 .*?
-            # 作用：在寻找关键词时，禁止跨越下一个 <strong> 标签，防止匹配到上面错误的数字。
-            
-            # 1. Acceptance rate
-            ar_match = re.search(r'<strong>\s*(\d+(?:\.\d+)?)\s*%?\s*</strong>(?:(?!<strong>).)*?acceptance\s+rate', html, re.DOTALL | re.IGNORECASE)
-            if ar_match and float(ar_match.group(1)) > 0:
-                metrics['acceptance_rate'] = f"{ar_match.group(1)}%"
-            
-            # 2. Submission to first decision (截图里是0，会被过滤掉)
-            sfd_match = re.search(r'<strong>\s*(\d+)\s*</strong>(?:(?!<strong>).)*?submission\s+to\s+first\s+decision', html, re.DOTALL | re.IGNORECASE)
-            if sfd_match and sfd_match.group(1) != '0':
-                metrics['first_decision_time'] = f"{sfd_match.group(1)} days"
-            
-            # 3. Submission to post-review decision (截图里是50)
-            # 之前的代码会因为贪婪匹配错误地抓成 0，现在会正确抓到 50
-            sprd_match = re.search(r'<strong>\s*(\d+)\s*</strong>(?:(?!<strong>).)*?submission\s+to\s+first\s+post-review\s+decision', html, re.DOTALL | re.IGNORECASE)
-            if sprd_match and sprd_match.group(1) != '0':
-                metrics['review_time'] = f"{sprd_match.group(1)} days"
-            
-            # 4. Acceptance to online publication (截图里是30)
-            ap_match = re.search(r'<strong>\s*(\d+)\s*</strong>(?:(?!<strong>).)*?acceptance\s+to\s+online\s+publication', html, re.DOTALL | re.IGNORECASE)
-            if ap_match and ap_match.group(1) != '0':
-                metrics['publication_time'] = f"{ap_match.group(1)} days"
-
-            # 5. Submission to acceptance (截图里没有)
-            sa_match = re.search(r'<strong>\s*(\d+)\s*</strong>(?:(?!<strong>).)*?submission\s+to\s+acceptance', html, re.DOTALL | re.IGNORECASE)
-            if sa_match and sa_match.group(1) != '0':
-                 metrics['acceptance_time'] = f"{sa_match.group(1)} days"
-
-            logger.info(f"Extracted Taylor & Francis metrics: {metrics}")
-            
+            pending = set(self.LABELS)
+            for segment in html.lower().split('<strong>')[1:]:
+                value = self.VALUE_RE.match(segment)
+                if not value:
+                    continue
+                num, has_pct = value.group('num'), bool(value.group('pct'))
+                for m in self.LABEL_RE.finditer(segment, value.end()):
+                    field = m.lastgroup
+                    if field not in pending:
+                        continue
+                    if field == 'acceptance_rate':
+                        pending.discard(field)
+                        if float(num) > 0:
+                            metrics[field] = f"{num}%"
+                    elif '.' not in num and not has_pct:
+                        pending.discard(field)
+                        # 0 表示期刊未公布该指标，过滤掉
+                        if num != '0':
+                            metrics[field] = f"{num} days"
+                if not pending:
+                    break
         except Exception as e:
             logger.error(f"Error parsing Taylor & Francis HTML: {e}")
         
@@ -346,13 +897,12 @@ class TaylorFrancisCrawler(PublisherCrawler):
 class SpringerCrawler(PublisherCrawler):
     """Crawler for Springer journals - 优化版"""
     
-    def extract_metrics(self, url: str) -> Dict[str, Any]:
+    PUBLISHER = 'Springer'
+    REGION_ANCHORS = ('data-test="metrics-speed-value"',)
+    REGION_AFTER = 1000
+    
+    def parse_metrics(self, html: str) -> Dict[str, Any]:
         """Extract metrics from Springer journal page"""
-        logger.info(f"Fetching Springer data from: {url}")
-        html = self.client.get_page(url)
-        if not html:
-            return {}
-        
         metrics = {
             'first_decision_time': '',
             'publisher': 'Springer'
@@ -369,8 +919,6 @@ class SpringerCrawler(PublisherCrawler):
             if speed_match:
                 metrics['first_decision_time'] = f"{speed_match.group(1)} days"
             
-            logger.info(f"Extracted Springer metrics: {metrics}")
-            
         except Exception as e:
             logger.error(f"Error parsing Springer HTML: {e}")
         
@@ -379,13 +927,12 @@ class SpringerCrawler(PublisherCrawler):
 class SageCrawler(PublisherCrawler):
     """Crawler for SAGE journals - 优化版"""
     
-    def extract_metrics(self, url: str) -> Dict[str, Any]:
+    PUBLISHER = 'SAGE'
+    REGION_ANCHORS = ('first decision:', 'acceptance to publication:', 'acceptance rate:')
+    REGION_AFTER = 1000
+    
+    def parse_metrics(self, html: str) -> Dict[str, Any]:
         """Extract metrics from SAGE journal page"""
-        logger.info(f"Fetching SAGE data from: {url}")
-        html = self.client.get_page(url)
-        if not html:
-            return {}
-        
         metrics = {
             'first_decision_time': '',
             'publication_time': '',
@@ -417,26 +964,22 @@ class SageCrawler(PublisherCrawler):
             if ar_match:
                 metrics['acceptance_rate'] = f"{ar_match.group(1)}%"
             
-            logger.info(f"Extracted SAGE metrics: {metrics}")
-            
         except Exception as e:
             logger.error(f"Error parsing SAGE HTML: {e}")
         
         return metrics
 
-import re
-from typing import Dict, Any
-
 class ElsevierCrawler(PublisherCrawler):
     """Crawler for Elsevier journals - 优化版"""
     
-    def extract_metrics(self, url: str) -> Dict[str, Any]:
+    PUBLISHER = 'Elsevier'
+    # metric-box 写在 <li class="..."> 里，窗口向前留出 <li 标签的开头
+    REGION_ANCHORS = ('metric-box',)
+    REGION_BEFORE = 200
+    REGION_AFTER = 2000
+    
+    def parse_metrics(self, html: str) -> Dict[str, Any]:
         """Extract metrics from Elsevier insights page"""
-        logger.info(f"Fetching Elsevier data from: {url}")
-        html = self.client.get_page(url)
-        if not html:
-            return {}
-        
         # 字段初始化 - 使用下划线命名与其他爬虫保持一致
         metrics = {
             'acceptance_rate': '',
@@ -490,8 +1033,6 @@ class ElsevierCrawler(PublisherCrawler):
                         logger.debug(f"Matched: '{cleaned_label}' -> {field_name} = {cleaned_value}")
                         break
             
-            logger.info(f"Extracted Elsevier metrics: {metrics}")
-            
         except Exception as e:
             import traceback
             logger.error(f"Error parsing Elsevier HTML: {e}")
@@ -500,24 +1041,64 @@ class ElsevierCrawler(PublisherCrawler):
         return metrics
 
 class JournalRankingUpdater:
-    def __init__(self, flaresolverr_url: str = FLARESOLVERR_URL, easyscholar_key: str = None):
-        self.flaresolverr_client = FlareSolverrClient(flaresolverr_url)
+    def __init__(self, flaresolverr_url: str = FLARESOLVERR_URL, easyscholar_key: str = None,
+                 min_sessions: int = MIN_SESSIONS, max_sessions: int = MAX_SESSIONS,
+                 publisher_caps: Optional[Dict[str, int]] = None,
+                 easyscholar_ttl_days: float = EASYSCHOLAR_TTL_DAYS,
+                 easyscholar_negative_ttl_days: float = EASYSCHOLAR_NEGATIVE_TTL_DAYS,
+                 refresh_easyscholar: bool = False,
+                 metrics_ttl_days: float = METRICS_TTL_DAYS, refresh_metrics: bool = False,
+                 store_path: str = STORE_FILE,
+                 breaker_failures: int = BREAKER_FAILURES, breaker_cooldown: float = BREAKER_COOLDOWN,
+                 dry_run: bool = False):
+        self.store_path = store_path
+        self.dry_run = dry_run  # 不写回 EasyScholar / 出版商指标缓存
+        
+        # 按主机熔断（出版商站点和 FlareSolverr 服务本身），熔断期间跳过的期刊保留原有数据
+        self.breaker = CircuitBreaker(failure_threshold=breaker_failures, cooldown=breaker_cooldown)
+        self.skipped_journals: Dict[str, List[str]] = {}
+        self._skipped_lock = threading.Lock()
+        
+        # 每个期刊本次实际取得的字段（值未变也会刷新数据库中的最后检查时间）
+        self.fetched_fields: Dict[str, set] = {}
+        self._fetched_lock = threading.Lock()
+        
+        self.session_pool = FlareSolverrSessionPool(flaresolverr_url, min_size=min_sessions,
+                                                    max_size=max_sessions, breaker=self.breaker)
+        self.max_workers = self.session_pool.max_size
+        self.fetcher = TieredFetcher(self.session_pool)
+        
+        # 每个出版商的并发上限
+        caps = dict(PUBLISHER_CAPS)
+        caps.update(publisher_caps or {})
+        self.publisher_caps = caps
+        self._publisher_slots: Dict[str, threading.Semaphore] = {}
+        self._publisher_slots_lock = threading.Lock()
+        
+        # 出版商页面指标缓存：新鲜条目直接复用，过期条目本次刷新，刷新失败则沿用旧值
+        self.metrics_cache = MetricsCache(ttl_days=metrics_ttl_days)
+        self.metrics_cache.read_only = dry_run
+        self.refresh_metrics = refresh_metrics
         
         # Initialize EasyScholar crawler if key is provided
         if easyscholar_key:
-            self.easyscholar_crawler = EasyScholarCrawler(easyscholar_key)
+            cache = EasyScholarCache(ttl_days=easyscholar_ttl_days,
+                                     negative_ttl_days=easyscholar_negative_ttl_days)
+            cache.read_only = dry_run
+            self.easyscholar_crawler = EasyScholarCrawler(easyscholar_key, cache=cache,
+                                                          refresh=refresh_easyscholar)
             logger.info("EasyScholar API initialized")
         else:
             self.easyscholar_crawler = None
             logger.warning("⚠️ No EasyScholar API key provided - 紫色分区、红色分区、紫色分数 will not be updated from EasyScholar")
         
-        # Initialize publisher crawlers
+        # Publisher crawlers are bound to the tiered fetcher (HTTP first, pooled FlareSolverr session on demand)
         self.publisher_crawlers = {
-            'wiley': WileyCrawler(self.flaresolverr_client),
-            'taylor_francis': TaylorFrancisCrawler(self.flaresolverr_client),
-            'springer': SpringerCrawler(self.flaresolverr_client),
-            'sage': SageCrawler(self.flaresolverr_client),
-            'elsevier': ElsevierCrawler(self.flaresolverr_client)
+            'wiley': WileyCrawler,
+            'taylor_francis': TaylorFrancisCrawler,
+            'springer': SpringerCrawler,
+            'sage': SageCrawler,
+            'elsevier': ElsevierCrawler
         }
         
         # Map publishers to crawlers
@@ -533,10 +1114,9 @@ class JournalRankingUpdater:
             'elsevier.com': 'elsevier'
         }
     
-    def load_journal_data(self):
-        """Load journal data from journal_rank.json and jrank.yml"""
+    def load_journal_data(self, store: JournalStore):
+        """Load the journal list from journal_rank.json and existing data from the journal store"""
         journal_rank_file = '_data/journal_rank.json'
-        jrank_file = '_data/jrank.yml'
         
         # Check if journal_rank.json exists
         if not os.path.exists(journal_rank_file):
@@ -549,14 +1129,9 @@ class JournalRankingUpdater:
                 journal_list = json.load(f)
                 logger.info(f"Loaded {len(journal_list)} journals from {journal_rank_file}")
             
-            # Try to load existing data from jrank.yml
-            try:
-                with open(jrank_file, 'r', encoding='utf-8') as f:
-                    existing_data = yaml.safe_load(f) or []
-                    logger.info(f"Loaded {len(existing_data)} existing entries from {jrank_file}")
-            except FileNotFoundError:
-                logger.info(f"{jrank_file} not found, will create new file")
-                existing_data = []
+            # Existing data comes from the journal store (jrank.yml is synced into it first)
+            existing_data = store.all_records()
+            logger.info(f"Loaded {len(existing_data)} existing entries from {store.path}")
                 
             return journal_list, existing_data
         except json.JSONDecodeError as e:
@@ -598,195 +1173,283 @@ class JournalRankingUpdater:
             logger.error(f"Error determining publisher from URL {url}: {e}")
             return None
     
-    def update_journal_rankings(self, dry_run: bool = False):
-        """Main function to update all journal rankings"""
-        if dry_run:
-            logger.info("Running in DRY-RUN mode - data will NOT be saved")
+    def _publisher_slot(self, publisher_key: str) -> threading.Semaphore:
+        """Semaphore limiting concurrent journals of one publisher"""
+        with self._publisher_slots_lock:
+            if publisher_key not in self._publisher_slots:
+                cap = self.publisher_caps.get(publisher_key, DEFAULT_PUBLISHER_CAP)
+                self._publisher_slots[publisher_key] = threading.Semaphore(max(1, cap))
+            return self._publisher_slots[publisher_key]
+    
+    def process_journal(self, journal_info: Dict, existing: Optional[Dict], refresh: bool = False) -> Dict:
+        """Collect publisher data for one journal (runs in a worker thread)"""
+        journal_name = journal_info['name']
+        url = journal_info.get('url', '')
+        tags = journal_info.get('tag', [])
         
-        journal_list, existing_data = self.load_journal_data()
+        logger.info(f"Processing {journal_name}...")
         
-        # Create a dictionary for quick lookup of existing data
-        existing_dict = {item['journal']: item for item in existing_data}
+        # 获取现有数据或创建新条目（保留所有现有字段）
+        if existing is not None:
+            journal_data = existing.copy()
+            # 更新 tag（如果有新的）
+            if tags and not journal_data.get('tag'):
+                journal_data['tag'] = tags
+        else:
+            # 新期刊，创建基础条目
+            journal_data = {
+                'journal': journal_name,
+                'publisher': '',
+                'tag': tags,
+                'purple_quartile': '',
+                'orange_quartile': '',
+                'orange_percentile': '',
+                'red_division': '',
+                'orange_score': '',
+                'documents_published': '',
+                'purple_score': '',
+                'acceptance_rate': '',
+                'first_decision_time': '',
+                'review_time': '',
+                'acceptance_time': '',
+                'publication_time': '',
+                'hm_score': ''
+            }
         
-        updated_count = 0
+        # Determine publisher from URL
+        if url:
+            publisher_key = self.get_publisher_from_url(url)
+            if publisher_key:
+                journal_data['publisher'] = publisher_key
         
-        for journal_info in journal_list:
-            journal_name = journal_info['name']
-            url = journal_info.get('url', '')
-            sourceid = journal_info.get('sourceid')
-            tags = journal_info.get('tag', [])
-            
-            logger.info(f"Processing {journal_name}...")
-            
-            # 获取现有数据或创建新条目（保留所有现有字段）
-            if journal_name in existing_dict:
-                journal_data = existing_dict[journal_name].copy()
-                # 更新 tag（如果有新的）
-                if tags and not journal_data.get('tag'):
-                    journal_data['tag'] = tags
-            else:
-                # 新期刊，创建基础条目
-                journal_data = {
-                    'journal': journal_name,
-                    'publisher': '',
-                    'tag': tags,
-                    'purple_quartile': '',
-                    'orange_quartile': '',
-                    'orange_percentile': '',
-                    'red_division': '',
-                    'orange_score': '',
-                    'documents_published': '',
-                    'purple_score': '',
-                    'acceptance_rate': '',
-                    'first_decision_time': '',
-                    'review_time': '',
-                    'acceptance_time': '',
-                    'publication_time': '',
-                    'hm_score': ''
-                }
-            
-            # Determine publisher from URL
-            if url:
-                publisher_key = self.get_publisher_from_url(url)
-                if publisher_key:
-                    journal_data['publisher'] = publisher_key
-            
-            # Get publisher-specific metrics
-            if url and journal_data.get('publisher'):
-                publisher_key = journal_data['publisher']
-                if publisher_key in self.publisher_crawlers:
+        # Get publisher-specific metrics
+        if url and journal_data.get('publisher'):
+            publisher_key = journal_data['publisher']
+            if publisher_key in self.publisher_crawlers:
+                publisher_metrics, fetched = self.get_publisher_metrics(publisher_key, url, journal_name, refresh)
+                # Update only if we got data
+                for key, value in publisher_metrics.items():
+                    if value:
+                        journal_data[key] = value
+                # 缓存中的值不算本次取得，不刷新数据库中的最后检查时间
+                if fetched:
+                    self._mark_fetched(journal_name, [key for key, value in publisher_metrics.items() if value])
+        
+        return journal_data
+    
+    def get_publisher_metrics(self, publisher_key: str, url: str, journal_name: str,
+                              refresh: bool = False) -> Tuple[Dict[str, Any], bool]:
+        """(metrics, fetched): from the cache when fresh, otherwise fetched through FlareSolverr
+        
+        fetched is False when the values came from the cache (fresh, or stale after a failed fetch)
+        """
+        cache_key = MetricsCache.make_key(publisher_key, url)
+        if not (self.refresh_metrics or refresh):
+            cached = self.metrics_cache.get(cache_key)
+            if cached is not None:
+                logger.info(f"   💾 Using cached {publisher_key} metrics for {journal_name}")
+                return dict(cached), False
+        
+        publisher_metrics: Dict[str, Any] = {}
+        if not self._circuit_open(url, journal_name):
+            with self._publisher_slot(publisher_key):
+                # 排队等待期间主机可能已熔断
+                if not self._circuit_open(url, journal_name):
                     try:
-                        publisher_metrics = self.publisher_crawlers[publisher_key].extract_metrics(url)
-                        # Update only if we got data
-                        for key, value in publisher_metrics.items():
-                            if value:
-                                journal_data[key] = value
+                        # 分级抓取：只有需要时才签出 FlareSolverr session
+                        crawler = self.publisher_crawlers[publisher_key](self.fetcher)
+                        publisher_metrics = crawler.extract_metrics(url)
                     except Exception as e:
                         logger.error(f"Error getting publisher metrics for {journal_name}: {e}")
-            
-            # Get EasyScholar data (紫色分区、红色分区、紫色分数) - 优先级最高
-            if self.easyscholar_crawler:
-                try:
-                    easyscholar_data = self.easyscholar_crawler.get_journal_rank(journal_name)
                     
-                    # 更新 3 个字段（EasyScholar 数据优先级最高，会覆盖之前的值）
-                    if easyscholar_data.get('purple_quartile'):
-                        journal_data['purple_quartile'] = easyscholar_data['purple_quartile']
-                    if easyscholar_data.get('red_division'):
-                        journal_data['red_division'] = easyscholar_data['red_division']
-                    if easyscholar_data.get('purple_score'):
-                        journal_data['purple_score'] = easyscholar_data['purple_score']
-                        
+                    # Add delay to avoid rate limiting (同一出版商内的请求间隔)
+                    CASSETTE.sleep(random.uniform(2, 5))
+        
+        # 只缓存真正提取到指标的结果（空结果可能是被拦截或页面改版）
+        if any(value for key, value in publisher_metrics.items() if key != 'publisher'):
+            self.metrics_cache.put(cache_key, publisher_metrics)
+            return publisher_metrics, True
+        
+        stale = self.metrics_cache.get_entry(cache_key, allow_stale=True)
+        if stale:
+            logger.warning(f"   ⚠️ Fetch failed for {journal_name}, keeping metrics from {stale['fetched_at']}")
+            return dict(stale['value']), False
+        return publisher_metrics, False
+    
+    def _mark_fetched(self, journal_name: str, fields: List[str]):
+        with self._fetched_lock:
+            self.fetched_fields.setdefault(journal_name, set()).update(fields)
+    
+    def _circuit_open(self, url: str, journal_name: str) -> bool:
+        """Skip (and remember) a journal whose publisher host or FlareSolverr is circuit-broken"""
+        for target in (url, self.session_pool.base_url):
+            if self.breaker.is_open(target):
+                host = host_of(target)
+                logger.warning(f"   ⛔ Circuit open for {host}, keeping existing data for {journal_name}")
+                with self._skipped_lock:
+                    self.skipped_journals.setdefault(host, []).append(journal_name)
+                return True
+        return False
+    
+    def apply_easyscholar(self, journal_data: Dict, easyscholar_data: Dict, fetched: bool = True):
+        """Merge EasyScholar data (紫色分区、红色分区、紫色分数) - 优先级最高
+        
+        fetched=False (cache hit) merges the values without marking them as checked now
+        """
+        if fetched:
+            self._mark_fetched(journal_data['journal'],
+                               [key for key in EASYSCHOLAR_FIELDS if easyscholar_data.get(key)])
+        # 更新 3 个字段（EasyScholar 数据优先级最高，会覆盖之前的值）
+        if easyscholar_data.get('purple_quartile'):
+            journal_data['purple_quartile'] = easyscholar_data['purple_quartile']
+        if easyscholar_data.get('red_division'):
+            journal_data['red_division'] = easyscholar_data['red_division']
+        if easyscholar_data.get('purple_score'):
+            journal_data['purple_score'] = easyscholar_data['purple_score']
+    
+    def collect_updates(self, journal_list: List[Dict], existing_data: List[Dict],
+                        progress: Optional[Callable[[str, int, int, str], None]] = None,
+                        refresh: bool = False):
+        """Crawl publisher pages and EasyScholar without writing anything
+        
+        Returns (results, publisher_updates, easyscholar_updates): the full record of every processed
+        journal, and {journal: {field: value}} for the fields this stage changed, split by source.
+        progress('publisher', done, total, journal) is called as each journal finishes.
+        refresh=True bypasses the metrics and EasyScholar caches (targeted runs: the journals were picked
+        because their data is suspect, so cached values would only be stamped fresh again).
+        
+        The session pool is opened here and closed (all FlareSolverr sessions destroyed) before returning,
+        so the same updater can run collect_updates again.
+        """
+        self.session_pool.open()
+        self.fetched_fields = {}
+        self.skipped_journals = {}
+        # Create a dictionary for quick lookup of existing data
+        existing_dict = {item['journal']: item for item in existing_data}
+        
+        results: Dict[str, Dict] = {}
+        
+        # EasyScholar 查询在后台按限流执行，与出版商抓取并行
+        easyscholar_futures: Dict[str, Future] = {}
+        if self.easyscholar_crawler:
+            easyscholar_futures = self.easyscholar_crawler.get_journal_ranks_async(
+                [journal_info['name'] for journal_info in journal_list], refresh=refresh)
+        
+        logger.info(f"Dispatching {len(journal_list)} journals to {self.max_workers} workers")
+        executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='journal')
+        try:
+            futures = {
+                executor.submit(self.process_journal, journal_info,
+                                existing_dict.get(journal_info['name']), refresh): journal_info['name']
+                for journal_info in journal_list
+            }
+            for done, future in enumerate(as_completed(futures), 1):
+                journal_name = futures[future]
+                try:
+                    results[journal_name] = future.result()
+                except Exception as e:
+                    logger.error(f"Error processing {journal_name}: {e}")
+                if progress:
+                    progress('publisher', done, len(futures), journal_name)
+            for journal_name, future in easyscholar_futures.items():
+                if journal_name not in results:
+                    continue
+                try:
+                    self.apply_easyscholar(results[journal_name], *future.result())
                 except Exception as e:
                     logger.error(f"Error getting EasyScholar data for {journal_name}: {e}")
-            
-            # Calculate HM score
-            journal_data['hm_score'] = self.calculate_hm_score(journal_data)
-            
-            # 更新到 existing_dict
-            existing_dict[journal_name] = journal_data
-            updated_count += 1
-            
-            # Add delay to avoid rate limiting
-            time.sleep(random.uniform(2, 5))
+        except BaseException:
+            # KeyboardInterrupt 等：取消排队中的期刊，session 由 finally 统一销毁
+            executor.shutdown(wait=False, cancel_futures=True)
+            if self.easyscholar_crawler:
+                self.easyscholar_crawler.close(cancel=True)
+            raise
+        finally:
+            # Clean up FlareSolverr sessions
+            self.session_pool.close()
+            self.metrics_cache.save()
+        executor.shutdown(wait=True)
+        if self.easyscholar_crawler:
+            self.easyscholar_crawler.close()
+        
+        # 只写入本阶段实际改动的字段，避免覆盖并行阶段（如 Scopus）写入的值
+        publisher_updates: Dict[str, Dict[str, Any]] = {}
+        easyscholar_updates: Dict[str, Dict[str, Any]] = {}
+        for journal_info in journal_list:
+            journal_name = journal_info['name']
+            if journal_name not in results:
+                continue
+            existing = existing_dict.get(journal_name, {})
+            fetched = self.fetched_fields.get(journal_name, set())
+            for key, value in results[journal_name].items():
+                # 未变化且本次没有重新取得的字段不写（可能是并行阶段负责的字段）
+                if key == 'journal' or (key in existing and existing[key] == value and key not in fetched):
+                    continue
+                target = easyscholar_updates if key in EASYSCHOLAR_FIELDS else publisher_updates
+                target.setdefault(journal_name, {})[key] = value
+        
+        self.fetcher.log_report()
+        FETCH.log_stats()
+        for host, journals in self.skipped_journals.items():
+            logger.warning(f"⛔ Skipped {len(journals)} journals while {host} was circuit-broken: {', '.join(journals)}")
+        return results, publisher_updates, easyscholar_updates
+    
+    def update_journal_rankings(self, dry_run: bool = False, export: bool = True,
+                                selector: Optional[JournalSelector] = None):
+        """Main function to update all (or only the selected) journal rankings"""
+        if dry_run:
+            logger.info("Running in DRY-RUN mode - data will NOT be saved")
+        
+        store = open_store(self.store_path)
+        try:
+            self._update_journal_rankings(store, dry_run, export, selector)
+        finally:
+            store.close()
+    
+    def _update_journal_rankings(self, store: JournalStore, dry_run: bool, export: bool,
+                                 selector: Optional[JournalSelector] = None):
+        journal_list, existing_data = self.load_journal_data(store)
+        if selector:
+            journal_list = selector.select(journal_list, existing_data, store.field_timestamps(),
+                                           PUBLISHER_FIELDS + EASYSCHOLAR_FIELDS, stage='publisher')
+        # 选中的期刊绕过缓存重新抓取
+        results, publisher_updates, easyscholar_updates = self.collect_updates(
+            journal_list, existing_data, refresh=bool(selector and selector.active))
+        updated_count = len(results)
         
         # Save updated data (skip if dry-run or no updates)
         if dry_run:
             logger.info("DRY-RUN: Skipping file save. Would have updated %d journals", updated_count)
             logger.info("DRY-RUN: Sample data (first journal):")
-            if existing_dict:
-                first_journal = list(existing_dict.values())[0]
-                logger.info(yaml.dump([first_journal], default_flow_style=False, allow_unicode=True))
+            for journal_info in journal_list:
+                journal_data = results.get(journal_info['name'])
+                if journal_data is not None:
+                    journal_data['hm_score'] = calculate_hm_score(journal_data)
+                    logger.info(yaml.dump([journal_data], default_flow_style=False, allow_unicode=True))
+                    break
         elif updated_count == 0:
             logger.info("ℹ️ 没有数据更新，跳过保存")
         else:
             try:
-                # 转换回列表（保留所有期刊数据）
-                updated_data = list(existing_dict.values())
-                with open('_data/jrank.yml', 'w', encoding='utf-8') as f:
-                    yaml.dump(updated_data, f, default_flow_style=False, allow_unicode=True)
-                logger.info("Successfully updated jrank.yml with %d journals", len(updated_data))
+                changed = store.upsert_many(publisher_updates, source='publisher')
+                changed += store.upsert_many(easyscholar_updates, source='easyscholar')
+                
+                # HM score 基于库中最新的完整记录（含其他阶段写入的橙色指标）批量计算
+                records = [record for record in store.all_records() if record['journal'] in results]
+                scores = {record['journal']: {'hm_score': score}
+                          for record, score in zip(records, batch_hm_scores(records))}
+                changed += store.upsert_many(scores, source='hm_score')
+                logger.info("Updated %d journals in the journal store (%d fields changed)", updated_count, changed)
+                
+                if export:
+                    count = store.export_yaml('_data/jrank.yml')
+                    logger.info("Successfully updated jrank.yml with %d journals", count)
             except Exception as e:
                 logger.error(f"Error saving updated data: {e}")
-        
-        # Clean up FlareSolverr session
-        self.flaresolverr_client.destroy_session()
     
     def calculate_hm_score(self, journal_data):
-        """Calculate HM (Haoming) custom score based on multiple factors
-        
-        计算公式:
-        - 紫色分区 (purple_quartile): 20分 (Q1=20, Q2=15, Q3=10, Q4=5)
-        - 紫色分数 (purple_score): 直接加
-        - 橙色分数 (orange_score): 除以2直接加
-        - 橙色百分位 (orange_percentile): 20分 (按百分比计算)
-        - 接受率 (acceptance_rate): 反向加分 (100-rate)/10，默认4分
-        - 发文量 (documents_last_year): >200加10分, >100加5分, >50加3分
-        """
-        score = 0
-        
-        # 1. 紫色分区 scoring (20分满分)
-        jcr = journal_data.get('purple_quartile', '').upper()
-        if 'Q1' in jcr:
-            score += 20
-        elif 'Q2' in jcr:
-            score += 15
-        elif 'Q3' in jcr:
-            score += 10
-        elif 'Q4' in jcr:
-            score += 5
-            
-        # 2. 紫色分数 - 乘以2直接加
-        try:
-            purple_score = float(journal_data.get('purple_score', 0) or 0)
-            score += purple_score * 2
-        except (ValueError, TypeError):
-            pass
-            
-        # 3. 橙色分数 - 直接加
-        try:
-            orange_score = float(journal_data.get('orange_score', 0) or 0)
-            score += orange_score
-        except (ValueError, TypeError):
-            pass
-            
-        # 4. 橙色百分位 scoring (20分满分，按百分比计算)
-        try:
-            orange_percentile = float(journal_data.get('orange_percentile', 0) or 0)
-            score += orange_percentile * 0.2  # 99 -> 19.8, 50 -> 10
-        except (ValueError, TypeError):
-            pass
-            
-        # 5. 接受率 - 直接加分，默认4分
-        try:
-            acceptance_rate = journal_data.get('acceptance_rate', '')
-            if acceptance_rate and '%' in str(acceptance_rate):
-                rate = float(str(acceptance_rate).replace('%', ''))
-                # 接受率直接加: 10% -> 10分, 20% -> 20分
-                score += rate
-            else:
-                # 没有接受率数据，默认加4分
-                score += 4
-        except (ValueError, TypeError):
-            score += 4
-            
-        # 6. 发文量加分 (documents_last_year)
-        try:
-            docs_last_year = journal_data.get('documents_last_year', '')
-            if docs_last_year:
-                # 格式可能是 "127 (2024)" 或纯数字
-                docs_str = str(docs_last_year).split('(')[0].strip()
-                docs_count = int(docs_str)
-                if docs_count > 200:
-                    score += 10
-                elif docs_count > 100:
-                    score += 5
-                elif docs_count > 50:
-                    score += 3
-        except (ValueError, TypeError):
-            pass
-            
-        return round(score, 1)  # 四舍五入到小数点后1位
+        """Calculate HM (Haoming) custom score (see hm_score.calculate_hm_score)"""
+        return calculate_hm_score(journal_data)
 
 def main():
     # Parse command line arguments
@@ -798,6 +1461,30 @@ def main():
     parser.add_argument('--debug', '-d', action='store_true', help='Enable debug logging')
     parser.add_argument('--dry-run', '-n', action='store_true', 
                        help='Dry run - collect data but don\'t save')
+    parser.add_argument('--breaker-failures', type=int, default=BREAKER_FAILURES, metavar='N',
+                       help=f'Consecutive failures before a host is skipped (default: {BREAKER_FAILURES})')
+    parser.add_argument('--breaker-cooldown', type=float, default=BREAKER_COOLDOWN, metavar='SECONDS',
+                       help=f'How long a failing host is skipped before one trial request (default: {BREAKER_COOLDOWN})')
+    parser.add_argument('--no-export', action='store_true',
+                       help='Only write to the journal store, do not export jrank.yml')
+    parser.add_argument('--min-sessions', type=int, default=MIN_SESSIONS,
+                       help=f'Minimum FlareSolverr sessions kept in the pool (default: {MIN_SESSIONS})')
+    parser.add_argument('--max-sessions', '-w', type=int, default=MAX_SESSIONS,
+                       help=f'Maximum FlareSolverr sessions / concurrent workers (default: {MAX_SESSIONS})')
+    parser.add_argument('--publisher-cap', action='append', default=[], metavar='PUBLISHER=N',
+                       help=f'Concurrent journals per publisher, e.g. wiley=1 (default: {DEFAULT_PUBLISHER_CAP})')
+    parser.add_argument('--easyscholar-ttl', type=float, default=EASYSCHOLAR_TTL_DAYS, metavar='DAYS',
+                       help=f'Days to reuse cached EasyScholar rankings (default: {EASYSCHOLAR_TTL_DAYS})')
+    parser.add_argument('--easyscholar-negative-ttl', type=float, default=EASYSCHOLAR_NEGATIVE_TTL_DAYS,
+                       metavar='DAYS',
+                       help=f'Days to remember "not found" journals (default: {EASYSCHOLAR_NEGATIVE_TTL_DAYS})')
+    parser.add_argument('--refresh-easyscholar', action='store_true',
+                       help='Ignore cached EasyScholar rankings and query the API for every journal')
+    parser.add_argument('--metrics-ttl', type=float, default=METRICS_TTL_DAYS, metavar='DAYS',
+                       help=f'Days to reuse cached publisher-page metrics (default: {METRICS_TTL_DAYS})')
+    parser.add_argument('--refresh-metrics', action='store_true',
+                       help='Ignore cached publisher metrics and fetch every publisher page')
+    add_selector_arguments(parser)
     args = parser.parse_args()
     
     # Set logging level
@@ -807,22 +1494,41 @@ def main():
     # Get EasyScholar key from args or environment variable
     easyscholar_key = args.easyscholar_key or os.environ.get('EASYSCHOLAR_KEY')
     
+    publisher_caps = {}
+    for item in args.publisher_cap:
+        key, _, value = item.partition('=')
+        try:
+            publisher_caps[key.strip()] = int(value)
+        except ValueError:
+            parser.error(f"Invalid --publisher-cap value: {item}")
+    
     # Create and run updater
-    updater = JournalRankingUpdater(args.flaresolverr, easyscholar_key=easyscholar_key)
+    updater = JournalRankingUpdater(args.flaresolverr, easyscholar_key=easyscholar_key,
+                                    min_sessions=args.min_sessions, max_sessions=args.max_sessions,
+                                    publisher_caps=publisher_caps,
+                                    easyscholar_ttl_days=args.easyscholar_ttl,
+                                    easyscholar_negative_ttl_days=args.easyscholar_negative_ttl,
+                                    refresh_easyscholar=args.refresh_easyscholar,
+                                    metrics_ttl_days=args.metrics_ttl,
+                                    refresh_metrics=args.refresh_metrics,
+                                    breaker_failures=args.breaker_failures,
+                                    breaker_cooldown=args.breaker_cooldown,
+                                    dry_run=args.dry_run)
     
     try:
         logger.info("Starting journal ranking update...")
-        updater.update_journal_rankings(dry_run=args.dry_run)
+        updater.update_journal_rankings(dry_run=args.dry_run, export=not args.no_export,
+                                        selector=JournalSelector.from_args(args))
         logger.info("Journal ranking update completed successfully")
     except KeyboardInterrupt:
         logger.info("Update interrupted by user")
-        # Clean up session
-        updater.flaresolverr_client.destroy_session()
-        sys.exit(1)
+        # Clean up sessions
+        updater.session_pool.close()
+        exit_now(130)
     except Exception as e:
         logger.error(f"Update failed with error: {e}")
-        # Clean up session
-        updater.flaresolverr_client.destroy_session()
+        # Clean up sessions
+        updater.session_pool.close()
         sys.exit(1)
 
 if __name__ == "__main__":
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+期刊选择器：只更新部分期刊
+三个更新脚本共用的参数 --journal / --publisher / --missing-field / --stale-older-than，
+按期刊名、出版商、缺失字段或字段的最后检查时间（期刊数据库中每个字段单独记录）筛选 journal_rank.json
+
+不同类型的条件同时给出时取交集，同一参数重复给出时取并集；
+选中的期刊绕过出版商指标和 EasyScholar 缓存重新抓取（修正错误数据时不会再拿回缓存里的旧值）
+"""
+
+import re
+import argparse
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, List, Any, Optional, Sequence
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+AGE_UNITS = {'m': 'minutes', 'h': 'hours', 'd': 'days', 'w': 'weeks'}
+
+
+def parse_age(text: str) -> timedelta:
+    """'30d' / '12h' / '2w' / '45m' (a bare number means days)"""
+    match = re.fullmatch(r'\s*(\d+(?:\.\d+)?)\s*([mhdw]?)\s*', text.lower())
+    if not match:
+        raise argparse.ArgumentTypeError(f"invalid age '{text}', expected e.g. 30d, 12h, 2w")
+    return timedelta(**{AGE_UNITS[match.group(2) or 'd']: float(match.group(1))})
+
+
+def _normalize(text: str) -> str:
+    return re.sub(r'[^a-z0-9]', '', str(text or '').lower())
+
+
+def add_selector_arguments(parser: argparse.ArgumentParser):
+    group = parser.add_argument_group('journal selection (default: all journals)')
+    group.add_argument('--journal', action='append', default=[], metavar='NAME',
+                       help='Only this journal (case-insensitive, repeatable)')
+    group.add_argument('--publisher', action='append', default=[], metavar='PUBLISHER',
+                       help='Only journals of this publisher, e.g. wiley, taylor_francis (repeatable)')
+    group.add_argument('--missing-field', action='append', default=[], metavar='FIELD',
+                       help='Only journals where this field is empty or absent (repeatable)')
+    group.add_argument('--stale-older-than', type=parse_age, metavar='AGE',
+                       help="Only journals this stage last fetched longer ago than AGE, e.g. 30d")
+
+
+def selector_cli_args(args: argparse.Namespace) -> List[str]:
+    """The selector options of a parsed command line, to pass on to a child script"""
+    cli: List[str] = []
+    for name in args.journal:
+        cli.extend(['--journal', name])
+    for publisher in args.publisher:
+        cli.extend(['--publisher', publisher])
+    for field in args.missing_field:
+        cli.extend(['--missing-field', field])
+    if args.stale_older_than is not None:
+        cli.extend(['--stale-older-than', f"{round(args.stale_older_than.total_seconds() / 60)}m"])
+    return cli
+
+
+class JournalSelector:
+    """Filters the journal_rank.json list by name, publisher, missing fields and field staleness"""
+
+    def __init__(self, journals: Sequence[str] = (), publishers: Sequence[str] = (),
+                 missing_fields: Sequence[str] = (), stale_older_than: Optional[timedelta] = None):
+        self.journals = {name.strip().lower() for name in journals}
+        self.publishers = [_normalize(p) for p in publishers]
+        self.missing_fields = list(missing_fields)
+        self.stale_older_than = stale_older_than
+
+    @classmethod
+    def from_args(cls, args: argparse.Namespace) -> 'JournalSelector':
+        return cls(args.journal, args.publisher, args.missing_field, args.stale_older_than)
+
+    @property
+    def active(self) -> bool:
+        return bool(self.journals or self.publishers or self.missing_fields or self.stale_older_than)
+
+    def describe(self) -> str:
+        parts = []
+        if self.journals:
+            parts.append(f"journal in {sorted(self.journals)}")
+        if self.publishers:
+            parts.append(f"publisher in {self.publishers}")
+        if self.missing_fields:
+            parts.append(f"missing any of {self.missing_fields}")
+        if self.stale_older_than:
+            parts.append(f"checked before {self.stale_older_than} ago")
+        return ' and '.join(parts) or 'all journals'
+
+    def _publisher_matches(self, journal_info: Dict[str, Any], record: Dict[str, Any]) -> bool:
+        publisher = _normalize(record.get('publisher'))
+        host = _normalize(urlparse(journal_info.get('url', '')).netloc)
+        return any(p and (p in publisher or p in host) for p in self.publishers)
+
+    def _is_stale(self, record_times: Dict[str, Optional[str]], fields: Optional[Sequence[str]],
+                  now: datetime) -> bool:
+        cutoff = (now - self.stale_older_than).isoformat(timespec='seconds')
+        checked = [record_times.get(f) for f in fields] if fields else list(record_times.values())
+        # 以本阶段最近一次取得任一字段的时间为准（某些期刊页面本来就没有的字段不会让它永远过期）；
+        # 从未取得过的期刊视为过期
+        latest = max((ts for ts in checked if ts), default=None)
+        return latest is None or latest < cutoff
+
+    def select(self, journal_list: List[Dict[str, Any]], records: List[Dict[str, Any]],
+               timestamps: Optional[Dict[str, Dict[str, str]]] = None,
+               fields: Optional[Sequence[str]] = None, stage: str = '') -> List[Dict[str, Any]]:
+        """Journals of journal_list that match every given condition
+
+        Args:
+            records: 期刊数据库中的现有记录
+            timestamps: {期刊名: {字段: 最后取得时间}}（JournalStore.field_timestamps）
+            fields: 本阶段负责的字段，过期判断只看这些字段（None 表示全部字段）
+        """
+        if not self.active:
+            return journal_list
+
+        by_name = {record['journal']: record for record in records}
+        timestamps = timestamps or {}
+        now = datetime.now()
+        selected = []
+        for journal_info in journal_list:
+            name = journal_info['name']
+            record = by_name.get(name, {})
+            if self.journals and name.lower() not in self.journals:
+                continue
+            if self.publishers and not self._publisher_matches(journal_info, record):
+                continue
+            if self.missing_fields and all(record.get(f) not in (None, '', []) for f in self.missing_fields):
+                continue
+            if self.stale_older_than and not self._is_stale(timestamps.get(name, {}), fields, now):
+                continue
+            selected.append(journal_info)
+
+        unknown = self.journals - {journal_info['name'].lower() for journal_info in journal_list}
+        if unknown:
+            logger.warning(f"⚠️ Not in journal_rank.json: {', '.join(sorted(unknown))}")
+        prefix = f"[{stage}] " if stage else ''
+        logger.info(f"🎯 {prefix}Selected {len(selected)}/{len(journal_list)} journals ({self.describe()})")
+        return selected
@@ -0,0 +1,377 @@
+#!/usr/bin/env python3
+"""
+期刊数据存储 (SQLite)
+jrank.yml 的规范数据源：每个字段单独一行，记录写入来源和时间，各更新阶段只写自己负责的字段，
+可以并行运行而不会互相覆盖；Jekyll 使用的 jrank.yml 在最后一步统一导出
+
+数据库本身不提交（CI 和新克隆会从 jrank.yml 重建），每个字段的最后取得时间在导出时另存到
+随仓库提交的 checked_at.json，重建时恢复，供 --stale-older-than 使用
+
+用法:
+  python bin/journal_store.py --import    # 从 jrank.yml 导入
+  python bin/journal_store.py --export    # 导出到 jrank.yml
+  python bin/journal_store.py --sources "Journal Name"   # 查看字段来源
+"""
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import argparse
+import logging
+import threading
+from datetime import datetime
+from typing import Dict, List, Any, Optional, Tuple
+
+import yaml
+
+from stable_yaml import write_records
+
+logger = logging.getLogger(__name__)
+
+JRANK_FILE = '_data/jrank.yml'
+STORE_FILE = '.cache/journal_store.sqlite3'
+CHECKED_FILE = '.cache/journal_rankings/checked_at.json'  # {期刊: {字段: 最后取得时间}}，随仓库提交
+BUSY_TIMEOUT = 30  # 秒，其他进程持有写锁时的等待时间
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS journals (
+    journal    TEXT PRIMARY KEY,
+    position   INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS fields (
+    journal    TEXT NOT NULL REFERENCES journals(journal) ON DELETE CASCADE,
+    field      TEXT NOT NULL,
+    value      TEXT NOT NULL,
+    source     TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    checked_at TEXT,
+    PRIMARY KEY (journal, field)
+);
+CREATE INDEX IF NOT EXISTS idx_fields_field ON fields(field);
+CREATE INDEX IF NOT EXISTS idx_fields_source ON fields(source);
+CREATE TABLE IF NOT EXISTS meta (
+    key        TEXT PRIMARY KEY,
+    value      TEXT NOT NULL
+);
+"""
+
+UPSERT_SQL = """
+INSERT INTO fields (journal, field, value, source, updated_at) VALUES (?, ?, ?, ?, ?)
+ON CONFLICT(journal, field) DO UPDATE SET
+    value = excluded.value, source = excluded.source, updated_at = excluded.updated_at
+WHERE fields.value != excluded.value
+"""
+
+# 每次阶段写入字段（即使值没变）都刷新最后检查时间，供 --stale-older-than 使用
+TOUCH_SQL = 'UPDATE fields SET checked_at = ? WHERE journal = ? AND field = ?'
+# 从 checked_at.json 恢复时只前移，不覆盖本地更新的时间
+RESTORE_CHECKED_SQL = ('UPDATE fields SET checked_at = ? WHERE journal = ? AND field = ? '
+                       'AND (checked_at IS NULL OR checked_at < ?)')
+
+
+def _encode(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, sort_keys=True)
+
+
+def _file_hash(path: str) -> Optional[str]:
+    try:
+        with open(path, 'rb') as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except FileNotFoundError:
+        return None
+
+
+class JournalStore:
+    """SQLite (WAL) journal store with field-level upserts stamped by source"""
+
+    def __init__(self, path: str = STORE_FILE, checked_file: Optional[str] = CHECKED_FILE):
+        self.path = path
+        self.checked_file = checked_file
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        # 同一连接在线程间共享，写操作由锁串行化；跨进程并发由 WAL + busy_timeout 处理
+        self._conn = sqlite3.connect(path, timeout=BUSY_TIMEOUT, check_same_thread=False,
+                                     isolation_level=None)
+        self._lock = threading.Lock()
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute('PRAGMA foreign_keys=ON')
+        self._conn.executescript(SCHEMA)
+        self._migrate()
+    
+    def _migrate(self):
+        columns = {row[1] for row in self._conn.execute('PRAGMA table_info(fields)')}
+        if 'checked_at' not in columns:
+            self._conn.execute('ALTER TABLE fields ADD COLUMN checked_at TEXT')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def _write(self, func, *args):
+        """Run func(conn, *args) inside one IMMEDIATE transaction"""
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                result = func(self._conn, *args)
+                self._conn.execute('COMMIT')
+                return result
+            except BaseException:
+                self._conn.execute('ROLLBACK')
+                raise
+
+    # ------------------------------------------
+    # 写入
+    # ------------------------------------------
+    @staticmethod
+    def _ensure_journal(conn: sqlite3.Connection, journal: str):
+        conn.execute('INSERT OR IGNORE INTO journals (journal, position) '
+                     'VALUES (?, (SELECT COALESCE(MAX(position), -1) + 1 FROM journals))', (journal,))
+
+    @classmethod
+    def _upsert_locked(cls, conn: sqlite3.Connection, records: Dict[str, Dict[str, Any]],
+                       source: str, checked: bool = True) -> int:
+        now = datetime.now().isoformat(timespec='seconds')
+        changed = 0
+        for journal, fields in records.items():
+            cls._ensure_journal(conn, journal)
+            for field, value in fields.items():
+                if field == 'journal':
+                    continue
+                cur = conn.execute(UPSERT_SQL, (journal, field, _encode(value), source, now))
+                changed += cur.rowcount
+                if checked:
+                    conn.execute(TOUCH_SQL, (now, journal, field))
+        return changed
+
+    def upsert(self, journal: str, fields: Dict[str, Any], source: str) -> int:
+        """Upsert the given fields of one journal; returns the number of fields whose value changed"""
+        return self.upsert_many({journal: fields}, source)
+
+    def upsert_many(self, records: Dict[str, Dict[str, Any]], source: str) -> int:
+        """Upsert {journal: {field: value}} in a single transaction"""
+        if not records:
+            return 0
+        return self._write(self._upsert_locked, records, source)
+    
+    def upsert_batches(self, batches: List[Tuple[str, Dict[str, Dict[str, Any]]]]) -> int:
+        """Upsert several (source, records) batches in one transaction, later batches winning"""
+        def _upsert_all(conn: sqlite3.Connection) -> int:
+            return sum(self._upsert_locked(conn, records, source) for source, records in batches if records)
+        return self._write(_upsert_all)
+
+    # ------------------------------------------
+    # 读取
+    # ------------------------------------------
+    def get(self, journal: str) -> Optional[Dict[str, Any]]:
+        records = self._read('WHERE j.journal = ?', (journal,))
+        return records[0] if records else None
+
+    def all_records(self) -> List[Dict[str, Any]]:
+        """All journals in their original order"""
+        return self._read('', ())
+
+    def _read(self, where: str, params: tuple) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT j.journal, f.field, f.value FROM journals j '
+                f'LEFT JOIN fields f ON f.journal = j.journal {where} '
+                'ORDER BY j.position, f.field', params).fetchall()
+        records: Dict[str, Dict[str, Any]] = {}
+        for journal, field, value in rows:
+            record = records.setdefault(journal, {'journal': journal})
+            if field is not None:
+                record[field] = json.loads(value)
+        return list(records.values())
+
+    def field_sources(self, journal: str) -> Dict[str, Dict[str, str]]:
+        """{field: {'source', 'updated_at', 'checked_at'}} for one journal"""
+        with self._lock:
+            rows = self._conn.execute('SELECT field, source, updated_at, checked_at FROM fields '
+                                      'WHERE journal = ? ORDER BY field', (journal,)).fetchall()
+        return {field: {'source': source, 'updated_at': updated_at, 'checked_at': checked_at or ''}
+                for field, source, updated_at, checked_at in rows}
+    
+    def field_timestamps(self) -> Dict[str, Dict[str, Optional[str]]]:
+        """{journal: {field: last time a stage fetched it}} (None = never fetched, e.g. only imported)"""
+        with self._lock:
+            rows = self._conn.execute('SELECT journal, field, checked_at FROM fields').fetchall()
+        timestamps: Dict[str, Dict[str, str]] = {}
+        for journal, field, ts in rows:
+            timestamps.setdefault(journal, {})[field] = ts
+        return timestamps
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM journals').fetchone()[0]
+
+    # ------------------------------------------
+    # YAML 导入 / 导出
+    # ------------------------------------------
+    def _get_meta(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else None
+
+    @staticmethod
+    def _set_meta_locked(conn: sqlite3.Connection, key: str, value: str):
+        conn.execute('INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)', (key, value))
+
+    def import_yaml(self, path: str = JRANK_FILE, source: str = 'yaml') -> int:
+        """Make the store mirror a YAML file (journals/fields missing from it are removed)
+        
+        Fields written to the store after the last import/export (e.g. by a --no-export run) are not
+        in the YAML yet; they keep their store value instead of being overwritten or deleted.
+        """
+        with open(path, 'r', encoding='utf-8') as f:
+            data = yaml.safe_load(f) or []
+        file_hash = _file_hash(path)
+        kept: List[Tuple[str, str]] = []
+
+        def _import(conn: sqlite3.Connection) -> int:
+            synced_at = conn.execute("SELECT value FROM meta WHERE key = 'synced_at'").fetchone()
+            local = set()
+            if synced_at:
+                local = set(conn.execute('SELECT journal, field FROM fields WHERE updated_at > ?',
+                                         (synced_at[0],)).fetchall())
+            kept.extend(sorted(local))
+            names = [item['journal'] for item in data if item.get('journal')]
+            conn.execute('CREATE TEMP TABLE IF NOT EXISTS keep (journal TEXT, field TEXT)')
+            conn.execute('DELETE FROM keep')
+            conn.executemany('INSERT INTO keep VALUES (?, NULL)', [(n,) for n in names])
+            conn.executemany('INSERT INTO keep VALUES (?, ?)',
+                             [(item['journal'], field) for item in data if item.get('journal')
+                              for field in item if field != 'journal'])
+            conn.executemany('INSERT INTO keep VALUES (?, ?)', list(local))
+            conn.execute('DELETE FROM journals WHERE journal NOT IN (SELECT journal FROM keep)')
+            conn.execute('DELETE FROM fields WHERE NOT EXISTS (SELECT 1 FROM keep k WHERE '
+                         'k.journal = fields.journal AND k.field = fields.field)')
+            # 导入不算一次检查：手工编辑或 git pull 带来的值不刷新 checked_at
+            records = {item['journal']: {field: value for field, value in item.items()
+                                         if (item['journal'], field) not in local}
+                       for item in data if item.get('journal')}
+            changed = self._upsert_locked(conn, records, source, checked=False)
+            conn.executemany('UPDATE journals SET position = ? WHERE journal = ?',
+                             [(i, name) for i, name in enumerate(names)])
+            self._set_meta_locked(conn, 'yaml_hash', file_hash or '')
+            self._set_meta_locked(conn, 'synced_at', datetime.now().isoformat(timespec='seconds'))
+            return changed
+
+        changed = self._write(_import)
+        logger.info(f"📥 从 {path} 导入 {len(data)} 个期刊 ({changed} 个字段变化)")
+        if kept:
+            logger.warning(f"⚠️ 保留了 {len(kept)} 个尚未导出的字段 (如 {kept[0][0]}: {kept[0][1]})，"
+                           f"下次导出时写入 {path}")
+        return changed
+
+    def sync_from_yaml(self, path: str = JRANK_FILE) -> bool:
+        """Import the YAML only if it changed since the last import/export (e.g. git pull, manual edit)"""
+        file_hash = _file_hash(path)
+        if file_hash is None:
+            return False
+        if len(self) and self._get_meta('yaml_hash') == file_hash:
+            self.restore_checked()
+            return False
+        self.import_yaml(path)
+        self.restore_checked()
+        return True
+
+    def export_yaml(self, path: str = JRANK_FILE) -> int:
+        """Write all journals to the Jekyll data file (skipped when no journal changed); returns the count"""
+        records = self.all_records()
+        changes = write_records(path, records, key='journal')
+        file_hash = _file_hash(path)
+
+        def _synced(conn: sqlite3.Connection):
+            self._set_meta_locked(conn, 'yaml_hash', file_hash)
+            self._set_meta_locked(conn, 'synced_at', datetime.now().isoformat(timespec='seconds'))
+        self._write(_synced)
+        self.save_checked()
+        if changes['written']:
+            logger.info(f"📤 导出 {len(records)} 个期刊到 {path}")
+        return len(records)
+
+    # ------------------------------------------
+    # 最后取得时间（随仓库提交）
+    # ------------------------------------------
+    def _load_checked(self) -> Dict[str, Dict[str, str]]:
+        try:
+            with open(self.checked_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"⚠️ 无法读取 {self.checked_file}: {e}")
+            return {}
+
+    def restore_checked(self) -> int:
+        """Move checked_at forward to the committed timestamps (a rebuilt store starts with none)"""
+        if not self.checked_file:
+            return 0
+        rows = [(ts, journal, field, ts) for journal, fields in self._load_checked().items()
+                for field, ts in fields.items() if ts]
+        if not rows:
+            return 0
+
+        def _restore(conn: sqlite3.Connection) -> int:
+            return sum(conn.execute(RESTORE_CHECKED_SQL, row).rowcount for row in rows)
+        return self._write(_restore)
+
+    def save_checked(self) -> bool:
+        """Write the checked_at of every field to the committed file; untouched when nothing changed"""
+        if not self.checked_file:
+            return False
+        checked = {journal: {field: ts for field, ts in sorted(fields.items()) if ts}
+                   for journal, fields in sorted(self.field_timestamps().items())}
+        checked = {journal: fields for journal, fields in checked.items() if fields}
+        if checked == self._load_checked():
+            return False
+        if os.path.dirname(self.checked_file):
+            os.makedirs(os.path.dirname(self.checked_file), exist_ok=True)
+        with open(self.checked_file, 'w', encoding='utf-8') as f:
+            json.dump(checked, f, ensure_ascii=False, indent=1, sort_keys=True)
+            f.write('\n')
+        return True
+
+
+def open_store(path: str = STORE_FILE, jrank_file: str = JRANK_FILE) -> JournalStore:
+    """Open the store and pull in any changes made to the YAML outside of it"""
+    store = JournalStore(path)
+    store.sync_from_yaml(jrank_file)
+    return store
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description='期刊数据 SQLite 存储')
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument('--import', dest='do_import', action='store_true', help=f'从 {JRANK_FILE} 导入')
+    group.add_argument('--export', action='store_true', help=f'导出到 {JRANK_FILE}')
+    group.add_argument('--sources', metavar='JOURNAL', help='显示某期刊各字段的来源和更新时间')
+    parser.add_argument('--db', default=STORE_FILE, help=f'数据库路径 (默认 {STORE_FILE})')
+    args = parser.parse_args()
+
+    with JournalStore(args.db) as store:
+        start = time.perf_counter()
+        if args.do_import:
+            store.import_yaml(JRANK_FILE)
+        elif args.export:
+            store.export_yaml(JRANK_FILE)
+        else:
+            for field, info in store.field_sources(args.sources).items():
+                print(f"{field:28} {info['source']:14} {info['updated_at']:20} {info['checked_at']}")
+        logger.info(f"⏱️ {(time.perf_counter() - start) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
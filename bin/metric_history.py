@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+指标历史记录 (只追加)
+每次运行只记录相对上一次的变化：每个运行一段独立的 gzip 数据追加到 <dataset>.jsonl.gz，
+<dataset>.index.json 记录每段的时间、偏移量以及每个条目被哪些运行修改过，
+查询时只解压相关的段，无需重新加载和深拷贝整个 YAML
+
+用法:
+  python bin/metric_history.py --runs                              # 列出运行记录
+  python bin/metric_history.py --series "Journal Name" orange_score
+  python bin/metric_history.py --at 2025-06-01 "Journal Name" hm_score
+  python bin/metric_history.py --changes 3 5                       # 运行 3 与 5 之间的变化
+  python bin/metric_history.py --dataset citations --series <pub_id> citations
+"""
+
+import os
+import json
+import gzip
+import argparse
+import logging
+from datetime import datetime
+from typing import Dict, List, Any, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+HISTORY_DIR = '.cache/metric_history'
+
+# 段内每行一条变化: [key, field, value] 设置字段, [key, field] 删除字段, [key] 删除条目
+Change = list
+
+
+def _as_time(when: str) -> str:
+    """'2025-06-01' -> end of that day; full ISO timestamps are used as is"""
+    return f"{when}T23:59:59" if len(when) == 10 else when
+
+
+class MetricHistory:
+    """Append-only, delta-encoded, gzip-segmented history of {key: {field: value}} snapshots"""
+
+    def __init__(self, dataset: str, history_dir: str = HISTORY_DIR):
+        self.dataset = dataset
+        self.data_path = os.path.join(history_dir, f"{dataset}.jsonl.gz")
+        self.index_path = os.path.join(history_dir, f"{dataset}.index.json")
+        self.index = self._load_index()
+        self._segments: Dict[int, List[Change]] = {}
+
+    def _load_index(self) -> Dict[str, Any]:
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {'runs': [], 'keys': {}}
+
+    @property
+    def runs(self) -> List[Dict[str, Any]]:
+        return self.index['runs']
+
+    @property
+    def latest_run(self) -> Optional[int]:
+        return self.runs[-1]['run'] if self.runs else None
+
+    # ------------------------------------------
+    # 读取段
+    # ------------------------------------------
+    def _segment(self, run: int) -> List[Change]:
+        if run not in self._segments:
+            info = self.runs[run]
+            with open(self.data_path, 'rb') as f:
+                f.seek(info['offset'])
+                raw = gzip.decompress(f.read(info['length']))
+            self._segments[run] = [json.loads(line) for line in raw.decode('utf-8').splitlines()]
+        return self._segments[run]
+
+    def _replay(self, runs: List[int], keys: Optional[set] = None) -> Dict[str, Dict[str, Any]]:
+        state: Dict[str, Dict[str, Any]] = {}
+        for run in runs:
+            for change in self._segment(run):
+                key = change[0]
+                if keys is not None and key not in keys:
+                    continue
+                if len(change) == 1:
+                    state.pop(key, None)
+                elif len(change) == 2:
+                    state.get(key, {}).pop(change[1], None)
+                else:
+                    state.setdefault(key, {})[change[1]] = change[2]
+        return state
+
+    def resolve_run(self, ref: str) -> Optional[int]:
+        """Run number ('3', '-1' = latest) or a date/timestamp (latest run at or before it)"""
+        try:
+            run = int(ref)
+            return self.runs[run]['run'] if self.runs else None
+        except ValueError:
+            when = _as_time(ref)
+            candidates = [r['run'] for r in self.runs if r['at'] <= when]
+            return candidates[-1] if candidates else None
+
+    # ------------------------------------------
+    # 查询
+    # ------------------------------------------
+    def snapshot_at(self, run: Optional[int]) -> Dict[str, Dict[str, Any]]:
+        """Full state after the given run"""
+        if run is None:
+            return {}
+        return self._replay(list(range(run + 1)))
+
+    def value_at(self, key: str, field: str, when: str) -> Any:
+        """Value of one field as of a date/timestamp (None if unknown then)"""
+        when = _as_time(when)
+        runs = [r for r in self.index['keys'].get(key, []) if self.runs[r]['at'] <= when]
+        return self._replay(runs, {key}).get(key, {}).get(field)
+
+    def series(self, key: str, field: str) -> List[Tuple[str, Any]]:
+        """[(timestamp, value)] for every run that changed the field"""
+        points = []
+        value: Any = None
+        for run in self.index['keys'].get(key, []):
+            new_value = self._replay_key_run(run, key, field, value)
+            if new_value != value or not points:
+                points.append((self.runs[run]['at'], new_value))
+            value = new_value
+        return points
+
+    def _replay_key_run(self, run: int, key: str, field: str, value: Any) -> Any:
+        for change in self._segment(run):
+            if change[0] != key:
+                continue
+            if len(change) == 1 or (len(change) == 2 and change[1] == field):
+                value = None
+            elif len(change) == 3 and change[1] == field:
+                value = change[2]
+        return value
+
+    def changes_between(self, run_a: Optional[int], run_b: Optional[int]) -> Dict[str, List]:
+        """Journal-level diff between two runs, in JournalDataManager.compare_data format"""
+        diff = {'added': [], 'removed': [], 'modified': [], 'unchanged': []}
+        if run_b is None:
+            return diff
+        start = -1 if run_a is None else run_a
+        touched = {key for key, runs in self.index['keys'].items()
+                   if any(start < r <= run_b for r in runs)}
+        before = self._replay(self._runs_of(touched, start), touched)
+        after = self._replay(self._runs_of(touched, run_b), touched)
+
+        for key in sorted(touched):
+            if key not in before and key in after:
+                diff['added'].append(key)
+            elif key in before and key not in after:
+                diff['removed'].append(key)
+            elif key in after:
+                old_item, new_item = before[key], after[key]
+                changes = [{'field': field, 'old': str(old_item.get(field) or ''),
+                            'new': str(new_item.get(field) or '')}
+                           for field in sorted(set(old_item) | set(new_item))
+                           if str(old_item.get(field) or '') != str(new_item.get(field) or '')]
+                if changes:
+                    diff['modified'].append({'journal': key, 'changes': changes})
+
+        listed = set(diff['added']) | set(diff['removed']) | {mod['journal'] for mod in diff['modified']}
+        diff['unchanged'] = [key for key in self.index['keys']
+                             if key not in listed and self._alive(key, run_b)]
+        return diff
+
+    def _runs_of(self, keys: set, last_run: int) -> List[int]:
+        """Runs up to last_run that touched any of the keys, in order"""
+        return sorted({r for key in keys for r in self.index['keys'][key] if r <= last_run})
+
+    def _alive(self, key: str, run: int) -> bool:
+        """Whether the key exists after the given run (only its last touching segment matters)"""
+        runs = [r for r in self.index['keys'][key] if r <= run]
+        if not runs:
+            return False
+        return not any(change[0] == key and len(change) == 1 for change in self._segment(runs[-1]))
+
+    # ------------------------------------------
+    # 写入
+    # ------------------------------------------
+    def record_run(self, snapshot: Dict[str, Dict[str, Any]], source: str,
+                   at: Optional[str] = None) -> Optional[int]:
+        """Append the delta between the snapshot and the latest recorded state
+
+        返回本次的运行编号；没有任何变化时不追加，返回最近一次运行的编号
+        """
+        current = self.snapshot_at(self.latest_run)
+        changes: List[Change] = []
+        for key in sorted(snapshot):
+            old_item, new_item = current.get(key, {}), snapshot[key]
+            for field in sorted(new_item):
+                if field not in old_item or old_item[field] != new_item[field]:
+                    changes.append([key, field, new_item[field]])
+            changes.extend([key, field] for field in sorted(old_item) if field not in new_item)
+        changes.extend([key] for key in sorted(current) if key not in snapshot)
+        if not changes:
+            return self.latest_run
+
+        payload = ''.join(json.dumps(c, ensure_ascii=False, default=str) + '\n' for c in changes)
+        member = gzip.compress(payload.encode('utf-8'), mtime=0)
+
+        os.makedirs(os.path.dirname(self.data_path) or '.', exist_ok=True)
+        # 只追加：从索引记录的末尾写入（丢弃上次中断后未写入索引的残留字节）
+        end = self.runs[-1]['offset'] + self.runs[-1]['length'] if self.runs else 0
+        mode = 'r+b' if os.path.exists(self.data_path) else 'wb'
+        with open(self.data_path, mode) as f:
+            f.seek(end)
+            f.truncate()
+            f.write(member)
+
+        run = len(self.runs)
+        self.runs.append({'run': run, 'at': at or datetime.now().isoformat(timespec='seconds'),
+                          'source': source, 'offset': end, 'length': len(member),
+                          'changes': len(changes)})
+        for key in dict.fromkeys(c[0] for c in changes):
+            self.index['keys'].setdefault(key, []).append(run)
+        self._segments[run] = changes
+        self._save_index()
+        logger.info(f"🗂️ {self.dataset} 历史记录 #{run}: {len(changes)} 项变化 ({len(member)} 字节)")
+        return run
+
+    def _save_index(self):
+        tmp_path = f"{self.index_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.index, f, ensure_ascii=False, separators=(',', ':'), sort_keys=True)
+        os.replace(tmp_path, self.index_path)
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description='查询指标历史记录')
+    parser.add_argument('--dataset', default='jrank', help='数据集 (jrank / citations，默认 jrank)')
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument('--runs', action='store_true', help='列出所有运行')
+    group.add_argument('--series', nargs=2, metavar=('KEY', 'FIELD'), help='某字段的历史变化')
+    group.add_argument('--at', nargs=3, metavar=('DATE', 'KEY', 'FIELD'), help='某日期时的字段值')
+    group.add_argument('--changes', nargs=2, metavar=('A', 'B'), help='两次运行（编号或日期）之间的变化')
+    args = parser.parse_args()
+
+    history = MetricHistory(args.dataset)
+    if args.runs:
+        for run in history.runs:
+            print(f"#{run['run']:<4} {run['at']}  {run['source']:10} {run['changes']:6} 项变化")
+    elif args.series:
+        for at, value in history.series(*args.series):
+            print(f"{at}  {value}")
+    elif args.at:
+        print(history.value_at(args.at[1], args.at[2], args.at[0]))
+    else:
+        run_a, run_b = history.resolve_run(args.changes[0]), history.resolve_run(args.changes[1])
+        diff = history.changes_between(run_a, run_b)
+        print(f"#{run_a} -> #{run_b}: 新增 {len(diff['added'])} | 删除 {len(diff['removed'])} | "
+              f"修改 {len(diff['modified'])} | 未变 {len(diff['unchanged'])}")
+        for mod in diff['modified']:
+            print(f"  📌 {mod['journal']}")
+            for change in mod['changes']:
+                print(f"     {change['field']}: {change['old'] or '(空)'} → {change['new'] or '(空)'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,21 +1,32 @@
 import re
+import html
 import time
 import os
+import json
 import yaml
 import random
+import logging
 from datetime import datetime, timedelta
 from urllib.parse import urljoin
 from bs4 import BeautifulSoup
 
 # === 核心库 ===
-from curl_cffi import requests
 from DrissionPage import ChromiumPage, ChromiumOptions
 
+from circuit_breaker import CircuitBreaker, host_of, is_host_failure
+from cassette import CASSETTE
+from fetch import FETCH, BROWSER_HEADERS, FetchConnectionError
+from stable_yaml import write_records
+
 # ==========================================
 # ⚙️ 配置区域
 # ==========================================
 FLARESOLVERR_URL = "http://localhost:8191"  # GitHub Actions 中自动启动
 
+# 熔断：同一主机连续失败 N 次（每个页面最多计一次，4xx 不计）后，冷却期内跳过该主机的期刊（保留历史数据）
+BREAKER_FAILURES = 5
+BREAKER_COOLDOWN = 600
+
 # 2. 从 YAML 加载期刊列表
 def load_journals(filepath="_data/journal_cfp.json"):
     try:
@@ -34,6 +45,11 @@ JOURNALS = load_journals()
 
 OUTPUT_YML_PATH = "_data/cfps.yml"
 
+# 前端分页数据源：cfp 页面只加载 manifest + 第一页，其余按需 fetch
+CFP_FEED_DIR = "assets/json/cfps"
+CFP_FEED_PAGE_SIZE = 20
+CFP_FEED_DESC_LIMIT = 350  # 与原页面 truncate: 350 保持一致
+
 MONTH_MAP = {
     'jan': 1, 'january': 1, 'feb': 2, 'february': 2,
     'mar': 3, 'march': 3, 'apr': 4, 'april': 4, 'may': 5,
@@ -52,6 +68,11 @@ CF_PROTECTED_SITES = [
 ]
 
 
+def cfp_record_key(record):
+    """CFP 记录的唯一键（与 merge_and_clean_records 的去重键一致）"""
+    return f"{record.get('title')}|{record.get('link')}"
+
+
 class JournalCFPScraper:
     def __init__(self):
         self.date_pattern = re.compile(
@@ -65,8 +86,9 @@ class JournalCFPScraper:
             re.I,
         )
         
-        # Session 用于快速抓取 (Elsevier/Springer/Cambridge)
-        self.session = requests.Session()
+        # 按主机熔断（出版商站点和 FlareSolverr 服务本身）
+        self.breaker = CircuitBreaker(failure_threshold=BREAKER_FAILURES, cooldown=BREAKER_COOLDOWN)
+        self.skipped_journals = {}
         
         # DrissionPage 延迟初始化（仅 T&F 需要）
         self._browser = None
@@ -87,7 +109,7 @@ class JournalCFPScraper:
             co.set_argument("--window-size=1920,1080")
             co.set_argument("--start-maximized")
             co.set_argument("--lang=en-US")
-            self._browser = ChromiumPage(co)
+            self._browser = CASSETTE.open_page(ChromiumPage, co)
             self._browser.run_js("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
         return self._browser
 
@@ -110,19 +132,23 @@ class JournalCFPScraper:
         使用 FlareSolverr 获取页面
         返回: (html, cookies) 或 (None, None)
         """
-        import requests as std_requests  # 用标准 requests 调用 FlareSolverr API
+        if self.breaker.is_open(FLARESOLVERR_URL) or not self.breaker.allow(url):
+            print(f"   ⛔ [FlareSolverr] 熔断中，跳过: {url}")
+            return None, None, None
         
         try:
             print(f"   🛡️ [FlareSolverr] 正在过盾: {url}")
-            resp = std_requests.post(
-                f"{FLARESOLVERR_URL}/v1",
+            resp = FETCH.post(
+                "flaresolverr", f"{FLARESOLVERR_URL}/v1",
                 json={
                     "cmd": "request.get",
                     "url": url,
                     "maxTimeout": max_timeout
                 },
-                timeout=120
+                timeout=120,
+                retries=0,  # 一次过盾最多等 max_timeout，失败交给熔断器
             )
+            self.breaker.record_success(FLARESOLVERR_URL)
             data = resp.json()
             
             if data.get("status") == "ok":
@@ -131,13 +157,21 @@ class JournalCFPScraper:
                 cookies = solution.get("cookies", [])
                 user_agent = solution.get("userAgent", "")
                 print(f"   ✅ [FlareSolverr] 成功! 获取 {len(html)} 字节, {len(cookies)} 个 cookies")
+                self.breaker.record_success(url)
                 return html, cookies, user_agent
             else:
                 print(f"   ❌ [FlareSolverr] 失败: {data.get('message')}")
+                self.breaker.record_failure(url)
                 return None, None, None
-                
+        
+        except FetchConnectionError as e:
+            # 连不上 FlareSolverr 本身，不算目标站点的失败
+            print(f"   ❌ [FlareSolverr] 无法连接: {e}")
+            self.breaker.record_failure(FLARESOLVERR_URL)
+            return None, None, None
         except Exception as e:
             print(f"   ❌ [FlareSolverr] 异常: {e}")
+            self.breaker.record_failure(url)
             return None, None, None
 
     def inject_cookies_to_browser(self, url, cookies, user_agent=None):
@@ -221,22 +255,27 @@ class JournalCFPScraper:
 
     def fetch_page_fast(self, url, timeout=30):
         """非 Cloudflare 站点用 curl_cffi"""
+        if not self.breaker.allow(url):
+            print(f"   ⛔ [curl_cffi] 熔断中，跳过: {url}")
+            return None
         try:
             print(f"   🚀 [curl_cffi] 正在访问: {url}")
-            resp = self.session.get(
-                url,
+            resp = FETCH.get(
+                "curl_cffi", url,
                 impersonate="chrome120",
                 timeout=timeout,
-                headers={
-                    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
-                    "Accept-Language": "en-US,en;q=0.9",
-                },
+                headers=BROWSER_HEADERS,
             )
             if resp.status_code == 200:
+                self.breaker.record_success(url)
                 return resp.text
             print(f"   ❌ 状态码错误 {resp.status_code}")
+            # 404 等客户端错误只说明这个链接失效，不代表整个主机不可用
+            if not is_host_failure(resp.status_code):
+                return None
         except Exception as e:
             print(f"   ❌ 请求异常: {e}")
+        self.breaker.record_failure(url)
         return None
 
     # --------------------------
@@ -418,7 +457,7 @@ class JournalCFPScraper:
                     if detail_html:
                         result = self._tf_parse_detail_page_html(detail_html, link_url)
                         results.append(result)
-                    time.sleep(random.uniform(2, 4))  # 避免请求过快
+                    CASSETTE.sleep(random.uniform(2, 4))  # 避免请求过快
                 except Exception as e:
                     print(f"   ⚠️ T&F 子页面处理失败: {e}")
                     
@@ -587,9 +626,88 @@ class JournalCFPScraper:
             except ValueError:
                 final_list.append(item)
 
-        final_list.sort(key=lambda x: x.get("fullpaper_deadline_sort") or "9999-99-99")
+        # 截止日期相同时按标题/链接排序，保证每次输出顺序一致
+        final_list.sort(key=lambda x: (x.get("fullpaper_deadline_sort") or "9999-99-99",
+                                       x.get("title") or "", x.get("link") or ""))
         return final_list
 
+    # ==========================================
+    # 前端分页 JSON 输出
+    # ==========================================
+    def _feed_description(self, text):
+        """等价于 Liquid 的 strip_html | truncate: 350（前端用 textContent 渲染，实体需先解码）"""
+        text = html.unescape(re.sub(r'<[^>]+>', '', text or ""))
+        if len(text) > CFP_FEED_DESC_LIMIT:
+            text = text[:CFP_FEED_DESC_LIMIT - 3] + "..."
+        return text
+
+    def write_json_feed(self, records, feed_dir=CFP_FEED_DIR, page_size=CFP_FEED_PAGE_SIZE):
+        """
+        将（已按截止日期排序的）记录切分为分页 JSON + manifest
+        manifest 不带时间戳，数据不变时文件内容也不变
+        """
+        os.makedirs(feed_dir, exist_ok=True)
+
+        # 标签按忽略大小写归并，显示最常见的写法（相同时取排序靠前者）
+        spellings = {}
+        for r in records:
+            for t in r.get("tag") or []:
+                t = str(t).strip()
+                if t:
+                    counts = spellings.setdefault(t.casefold(), {})
+                    counts[t] = counts.get(t, 0) + 1
+        canonical = {key: min(counts, key=lambda t: (-counts[t], t)) for key, counts in spellings.items()}
+
+        items = []
+        tag_counts = {}
+        for r in records:
+            tags = []
+            for t in r.get("tag") or []:
+                t = canonical.get(str(t).strip().casefold())
+                if t and t not in tags:
+                    tags.append(t)
+            for t in tags:
+                tag_counts[t] = tag_counts.get(t, 0) + 1
+            items.append({
+                "journal": r.get("journal", ""),
+                "publisher": r.get("publisher", ""),
+                "tag": tags,
+                "title": r.get("title", ""),
+                "abstract_deadline": r.get("abstract_deadline", ""),
+                "fullpaper_deadline": r.get("fullpaper_deadline", ""),
+                "fullpaper_deadline_sort": r.get("fullpaper_deadline_sort") or "9999-99-99",
+                "editors": r.get("editors", ""),
+                "link": r.get("link", ""),
+                "description": self._feed_description(r.get("description", "")),
+            })
+
+        pages = []
+        for start in range(0, len(items), page_size):
+            name = f"page-{len(pages) + 1:03d}.json"
+            with open(os.path.join(feed_dir, name), "w", encoding="utf-8") as f:
+                json.dump({"page": len(pages) + 1, "items": items[start:start + page_size]},
+                          f, ensure_ascii=False, separators=(",", ":"))
+                f.write("\n")
+            pages.append(name)
+
+        # 清理上一次运行遗留的多余分页
+        for name in os.listdir(feed_dir):
+            if re.fullmatch(r"page-\d+\.json", name) and name not in pages:
+                os.remove(os.path.join(feed_dir, name))
+
+        manifest = {
+            "total": len(items),
+            "page_size": page_size,
+            "pages": pages,
+            "tags": dict(sorted(tag_counts.items())),
+        }
+        with open(os.path.join(feed_dir, "manifest.json"), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=1)
+            f.write("\n")
+
+        print(f"🗂️ 分页数据: {len(items)} 条 / {len(pages)} 页 -> {feed_dir}")
+        return manifest
+
     # ==========================================
     # 主运行逻辑 (修改为使用 FlareSolverr)
     # ==========================================
@@ -606,6 +724,15 @@ class JournalCFPScraper:
             
             print(f"📖 处理: {j_name}")
             
+            # 主机（或所需的 FlareSolverr）熔断中：直接跳过，保留历史数据
+            blocked = [t for t in ([j_url, FLARESOLVERR_URL] if self.needs_flaresolverr(j_url) else [j_url])
+                       if self.breaker.is_open(t)]
+            if blocked:
+                host = host_of(blocked[0])
+                print(f"   ⛔ {host} 熔断中，跳过并保留历史数据\n")
+                self.skipped_journals.setdefault(host, []).append(j_name)
+                continue
+            
             try:
                 # === T&F: FlareSolverr 获取主页 + 子页面 ===
                 if "tandfonline.com" in url_l:
@@ -662,18 +789,27 @@ class JournalCFPScraper:
                 print(f"   ❌ 处理异常: {e}\n")
             
             # 请求间隔
-            time.sleep(random.uniform(1, 2))
+            CASSETTE.sleep(random.uniform(1, 2))
 
+        for host, names in self.skipped_journals.items():
+            print(f"⛔ {host} 熔断期间跳过 {len(names)} 个期刊: {', '.join(names)}")
+        FETCH.log_stats()
+        
         # 合并与保存
         final_records = self.merge_and_clean_records(new_scraped_records, output_yml_path)
         
-        os.makedirs(os.path.dirname(output_yml_path), exist_ok=True)
-        with open(output_yml_path, "w", encoding="utf-8") as f:
-            yaml.safe_dump(final_records, f, allow_unicode=True, sort_keys=False, default_flow_style=False, width=120)
+        # 确定性、无别名的 YAML；没有任何记录的内容哈希变化时不重写文件（write_records 输出变化统计）
+        changes = write_records(output_yml_path, final_records, key=cfp_record_key,
+                                sort_keys=False, width=120)
+
+        if changes["written"] or not os.path.exists(os.path.join(CFP_FEED_DIR, "manifest.json")):
+            self.write_json_feed(final_records)
         
         print(f"🎉 任务结束! 总条目: {len(final_records)}")
 
 
 if __name__ == "__main__":
+    # 共用模块（熔断、HTTP 重试与统计）通过 logging 输出
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
     scraper = JournalCFPScraper()
     scraper.run()
\ No newline at end of file
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+确定性 YAML 输出与记录内容哈希
+每条记录按字段排序后的规范 JSON 计算内容哈希；写入时没有任何记录的哈希（或顺序）变化就完全跳过写文件，
+避免 YAML 锚点/别名重新编号 (&id001) 或字典顺序变化导致无意义的提交和 Jekyll 全量重建
+
+每次写入都会在 .cache/changes/<文件名>.json 输出变化的记录列表，供后续步骤读取
+"""
+
+import os
+import json
+import hashlib
+import logging
+from typing import Any, Callable, Dict, List, Optional, Union
+
+import yaml
+
+logger = logging.getLogger(__name__)
+
+CHANGES_DIR = '.cache/changes'
+HASH_LENGTH = 16
+
+Key = Union[str, Callable[[Dict[str, Any]], str]]
+
+
+class NoAliasDumper(yaml.SafeDumper):
+    """SafeDumper that never emits anchors/aliases for shared objects"""
+
+    def ignore_aliases(self, data: Any) -> bool:
+        return True
+
+
+def canonical(value: Any) -> str:
+    """Canonical JSON text: sorted keys, no whitespace"""
+    return json.dumps(value, ensure_ascii=False, sort_keys=True, separators=(',', ':'), default=str)
+
+
+def record_hash(record: Dict[str, Any]) -> str:
+    """Stable content hash of one record (independent of field order)"""
+    return hashlib.sha256(canonical(record).encode('utf-8')).hexdigest()[:HASH_LENGTH]
+
+
+def record_hashes(records: Union[List[Dict[str, Any]], Dict[str, Dict[str, Any]]],
+                  key: Optional[Key] = None) -> Dict[str, str]:
+    """{record key: hash}, in record order; dicts are keyed by their own keys"""
+    if isinstance(records, dict):
+        return {str(k): record_hash(v) for k, v in records.items()}
+    key_of = key if callable(key) else (lambda record: str(record.get(key, '')))
+    return {key_of(record): record_hash(record) for record in records}
+
+
+def diff_hashes(old: Dict[str, str], new: Dict[str, str]) -> Dict[str, List[str]]:
+    """Keys added, removed and modified between two {key: hash} maps"""
+    return {
+        'added': [k for k in new if k not in old],
+        'removed': [k for k in old if k not in new],
+        'modified': [k for k in new if k in old and old[k] != new[k]],
+    }
+
+
+def dump_yaml(data: Any, **options) -> str:
+    """Deterministic, alias-free YAML text"""
+    options.setdefault('allow_unicode', True)
+    options.setdefault('default_flow_style', False)
+    return yaml.dump(data, Dumper=NoAliasDumper, **options)
+
+
+def write_text(path: str, text: str):
+    """Atomic write (readers never see a half-written file)"""
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+def save_changes(path: str, changes: Dict[str, Any]) -> str:
+    """Write the machine-readable change list for a data file to CHANGES_DIR"""
+    name = os.path.splitext(os.path.basename(path))[0]
+    changes_path = os.path.join(CHANGES_DIR, f"{name}.json")
+    write_text(changes_path, json.dumps({'file': path, **changes}, ensure_ascii=False, indent=1))
+    return changes_path
+
+
+def write_records(path: str, records: List[Dict[str, Any]], key: Key, **dump_options) -> Dict[str, Any]:
+    """Write a list of records as deterministic YAML, skipping the write when no record hash changed
+
+    返回 {'written': bool, 'added': [...], 'removed': [...], 'modified': [...]}（同时写入 CHANGES_DIR）
+    """
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            old_records = yaml.safe_load(f) or []
+        old_hashes = record_hashes(old_records, key)
+        exists = True
+    except FileNotFoundError:
+        old_hashes, exists = {}, False
+
+    new_hashes = record_hashes(records, key)
+    changes: Dict[str, Any] = diff_hashes(old_hashes, new_hashes)
+    # 记录内容和顺序都没变：不重写文件（即使旧文件的格式不同）
+    unchanged = exists and list(old_hashes.items()) == list(new_hashes.items())
+    if not unchanged:
+        write_text(path, dump_yaml(records, **dump_options))
+    changes = {'written': not unchanged, **changes}
+    save_changes(path, changes)
+
+    if unchanged:
+        logger.info(f"ℹ️ {path} 内容无变化，跳过写入")
+    else:
+        logger.info(f"💾 {path}: 新增 {len(changes['added'])} | 删除 {len(changes['removed'])} | "
+                    f"修改 {len(changes['modified'])}")
+    return changes
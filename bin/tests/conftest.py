@@ -0,0 +1,9 @@
+# bin/ 脚本的离线测试（使用 bin/fixtures 中保存的响应），运行: python -m pytest bin/tests
+
+import os
+import sys
+
+# bin/ 下的脚本互相按模块名导入
+BIN_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES_DIR = os.path.join(BIN_DIR, 'fixtures')
+sys.path.insert(0, BIN_DIR)
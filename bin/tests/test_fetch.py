@@ -0,0 +1,90 @@
+"""Fetcher 的同步/异步接口、重试和每次请求的计时钩子"""
+
+import asyncio
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from fetch import Fetcher, FetchConnectionError
+
+
+class FakeSession:
+    """按 URL 返回预设的状态码序列（用完后重复最后一个），记录请求所在的线程"""
+
+    def __init__(self, statuses):
+        self.statuses = statuses
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def _respond(self, url, **kwargs):
+        with self.lock:
+            self.calls.append((url, threading.current_thread().name, kwargs))
+            queue = self.statuses[url]
+            status = queue.pop(0) if len(queue) > 1 else queue[0]
+        if isinstance(status, Exception):
+            raise status
+        return SimpleNamespace(status_code=status, content=b'x' * 10, text='x' * 10, headers={})
+
+    get = post = _respond
+
+
+@pytest.fixture
+def fetcher(monkeypatch):
+    fetcher = Fetcher(backoff=0)
+    session = FakeSession({})
+    monkeypatch.setattr(fetcher, '_session', lambda: session)
+    fetcher.session = session
+    return fetcher
+
+
+def test_sync_retry_and_hooks(fetcher):
+    fetcher.session.statuses['https://a.example/x'] = [503, 200]
+    events = []
+    fetcher.add_hook(events.append)
+    fetcher.add_hook(lambda event: 1 / 0)  # 钩子出错不影响请求
+    response = fetcher.get('test', 'https://a.example/x', params={'q': 1})
+    assert response.status_code == 200
+    assert [(e['attempt'], e['status'], e['host'], e['bytes']) for e in events] == \
+        [(0, 503, 'a.example', 10), (1, 200, 'a.example', 10)]
+    assert all(e['elapsed'] >= 0 and e['kind'] == 'test' and e['method'] == 'GET' for e in events)
+    assert fetcher.stats()['a.example'] == {'requests': 2, 'errors': 1, 'retries': 1,
+                                            'seconds': pytest.approx(sum(e['elapsed'] for e in events)),
+                                            'bytes': 20}
+
+
+def test_connection_error_after_retries(fetcher):
+    error = ConnectionError('refused')
+    error.code = 7
+    fetcher.session.statuses['https://down.example/'] = [error]
+    with pytest.raises(FetchConnectionError):
+        fetcher.get('test', 'https://down.example/', retries=1)
+    assert len(fetcher.session.calls) == 2
+
+
+def test_async_api_runs_in_threads(fetcher):
+    fetcher.session.statuses.update({'https://a.example/1': [200], 'https://a.example/2': [404]})
+    events = []
+    fetcher.add_hook(events.append)
+
+    async def run():
+        got = await fetcher.aget('test', 'https://a.example/1')
+        posted = await fetcher.apost('test', 'https://a.example/2', json={'k': 'v'})
+        return got, posted
+
+    got, posted = asyncio.run(run())
+    assert (got.status_code, posted.status_code) == (200, 404)
+    assert fetcher.session.calls[1][2] == {'json': {'k': 'v'}, 'timeout': fetcher.timeout}
+    assert all(thread != threading.main_thread().name for _, thread, _ in fetcher.session.calls)
+    assert [e['method'] for e in events] == ['GET', 'POST']
+
+
+def test_fetch_many_keeps_order_and_returns_exceptions(fetcher):
+    error = ValueError('bad')
+    fetcher.session.statuses.update({f'https://b.example/{i}': [200 + i] for i in range(5)})
+    fetcher.session.statuses['https://b.example/bad'] = [error]
+    urls = [f'https://b.example/{i}' for i in range(5)] + ['https://b.example/bad']
+    results = fetcher.fetch_many('test', urls, concurrency=2, retries=0)
+    assert [r.status_code for r in results[:5]] == [200, 201, 202, 203, 204]
+    assert 'bad' in str(results[5])
+    assert fetcher.stats()['b.example']['requests'] == 6
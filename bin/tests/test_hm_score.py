@@ -0,0 +1,37 @@
+"""batch_hm_scores 与逐条计算 calculate_hm_score 的一致性"""
+
+import os
+
+import yaml
+
+from conftest import BIN_DIR
+from hm_score import JRANK_FILE, batch_hm_scores, calculate_hm_score, check_parity
+
+EDGE_RECORDS = [
+    {'journal': 'empty'},
+    {'journal': 'none fields', 'purple_quartile': None, 'purple_score': None, 'orange_score': None,
+     'orange_percentile': None, 'acceptance_rate': None, 'documents_last_year': None},
+    {'journal': 'blank fields', 'purple_quartile': '', 'purple_score': '', 'orange_score': '',
+     'orange_percentile': '', 'acceptance_rate': '', 'documents_last_year': ''},
+    {'journal': 'no quartile', 'purple_score': '3.2', 'orange_score': '8.1', 'orange_percentile': '91'},
+    {'journal': 'lowercase quartile', 'purple_quartile': 'q2', 'acceptance_rate': '12%'},
+    {'journal': 'non-numeric', 'purple_quartile': 'N/A', 'purple_score': 'n/a', 'orange_score': '-',
+     'orange_percentile': '95th', 'acceptance_rate': 'about%', 'documents_last_year': 'N/A (2024)'},
+    {'journal': 'numbers', 'purple_quartile': 'Q1', 'purple_score': 7.5, 'orange_score': 24,
+     'orange_percentile': 99, 'acceptance_rate': '6.5%', 'documents_last_year': 127},
+    {'journal': 'docs with year', 'purple_quartile': 'Q4', 'documents_last_year': '201 (2024)',
+     'acceptance_rate': '30'},
+]
+
+
+def test_parity_on_jrank_and_edge_records():
+    with open(os.path.join(os.path.dirname(BIN_DIR), JRANK_FILE), encoding='utf-8') as f:
+        records = yaml.safe_load(f) or []
+    assert records
+    assert check_parity(records + EDGE_RECORDS) == []
+
+
+def test_edge_record_scores():
+    assert batch_hm_scores(EDGE_RECORDS) == [calculate_hm_score(r) for r in EDGE_RECORDS]
+    assert calculate_hm_score(EDGE_RECORDS[1]) == 4
+    assert calculate_hm_score(EDGE_RECORDS[6]) == 20 + 15.0 + 24 + 19.8 + 6.5 + 5
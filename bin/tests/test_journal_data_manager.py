@@ -0,0 +1,21 @@
+"""journal_data_manager --all：并行更新失败时以非零状态退出"""
+
+import sys
+
+import pytest
+
+import journal_data_manager
+from journal_data_manager import JournalDataManager
+
+
+@pytest.mark.parametrize('argv', [['--all'], []])
+def test_failed_pipeline_exits_nonzero(monkeypatch, argv):
+    finished = []
+    monkeypatch.setattr(JournalDataManager, 'begin_update', lambda self, dry_run: None)
+    monkeypatch.setattr(JournalDataManager, 'run_pipeline', lambda self, **kwargs: False)
+    monkeypatch.setattr(JournalDataManager, 'finish_update', lambda self, *args, **kwargs: finished.append(args))
+    monkeypatch.setattr(sys, 'argv', ['journal_data_manager.py', '--no-diff', *argv])
+    with pytest.raises(SystemExit) as exc:
+        journal_data_manager.main()
+    assert exc.value.code == 1
+    assert finished == []
@@ -0,0 +1,40 @@
+"""出版商指标区域的切分：零星出现的锚点词不截断真正的指标区域，所有窗口里都没有指标时解析整个页面"""
+
+from types import SimpleNamespace
+
+from journal_ranking_updater import WileyCrawler
+
+METRICS = ('<section class="journal-metrics"><h4><span class="label">Acceptance rate: </span></h4><p> 11%</p>'
+           '<h4><span class="label">Submission to first decision <span> (median) </span>: </span></h4><p> 29 days </p>'
+           '<h4><span class="label">Submission to acceptance: </span></h4><p> 120 days </p>'
+           '<h4><span class="label">Acceptance to publication: </span></h4><p> 14 days </p></section>')
+FILLER = '<p>' + 'lorem ipsum ' * 8000 + '</p>'
+EXPECTED = {'acceptance_rate': '11%', 'first_decision_time': '29 days', 'review_time': '',
+            'acceptance_time': '120 days', 'publication_time': '14 days', 'publisher': 'Wiley'}
+
+
+def crawler(html):
+    return WileyCrawler(SimpleNamespace(get_page=lambda url: html))
+
+
+def test_stray_anchor_before_metrics_block():
+    html = f'<nav><a href="/about">Acceptance rate</a></nav>{FILLER}{METRICS}'
+    assert len(FILLER) > WileyCrawler.REGION_MAX
+    regions = crawler(html).metrics_regions(html)
+    assert '<p> 14 days </p>' in regions[0]
+    assert crawler(html).extract_metrics('https://example.org/journal-metrics/1') == EXPECTED
+
+
+def test_next_cluster_tried_when_first_has_no_values():
+    # 说明文字里同样齐全的标签（没有数值）排在前面
+    blurb = ('<p>We report acceptance rate, submission to first decision, submission to acceptance '
+             'and acceptance to publication.</p>')
+    html = f'{blurb}{FILLER}{METRICS}'
+    assert len(crawler(html).metrics_regions(html)) == 2
+    assert crawler(html).extract_metrics('https://example.org/journal-metrics/1') == EXPECTED
+
+
+def test_whole_page_parsed_when_regions_have_no_values():
+    html = '<h4><span class="label">Acceptance rate: </span></h4>' + ' ' * 1500 + '<p> 11%</p>'
+    assert '11%' not in crawler(html).metrics_regions(html)[0]
+    assert crawler(html).extract_metrics('https://example.org/journal-metrics/1')['acceptance_rate'] == '11%'
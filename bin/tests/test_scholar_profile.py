@@ -0,0 +1,93 @@
+"""parse_profile_page、DirectProfile 分页和 fetch_author 回退到 scholarly（使用保存的个人主页 HTML）"""
+
+import importlib
+import os
+from types import SimpleNamespace
+
+import pytest
+
+from conftest import BIN_DIR, FIXTURES_DIR
+
+
+def fixture(name):
+    with open(os.path.join(FIXTURES_DIR, name), encoding='utf-8') as f:
+        return f.read()
+
+
+@pytest.fixture
+def citations(monkeypatch):
+    # 模块导入时从 _data/socials.yml 读取 Scholar ID
+    monkeypatch.chdir(os.path.dirname(BIN_DIR))
+    return importlib.import_module('update_scholar_citations')
+
+
+def serve(monkeypatch, citations, pages):
+    """FETCH.get 按 cstart 返回保存的页面，记录请求的 cstart"""
+    requested = []
+
+    def get(kind, url, params=None, **kwargs):
+        requested.append(params['cstart'])
+        return SimpleNamespace(status_code=200, text=pages[params['cstart']])
+
+    monkeypatch.setattr(citations.FETCH, 'get', get)
+    return requested
+
+
+def test_parse_profile_page_matches_scholarly_shape(citations):
+    author = citations.parse_profile_page(fixture('scholar_profile.html'))
+    assert author['citedby'] == 525
+    assert author['has_more'] is False
+    assert len(author['publications']) == 16
+    assert author['publications'][0] == {
+        'author_pub_id': 'VV0nEt4AAAAJ:UeHWp8X0CEIC',
+        'bib': {'title': 'Factors influencing university students’ behavioral intention to use generative artificial '
+                         'intelligence: Integrating the theory of planned behavior and AI literacy',
+                'pub_year': '2025'},
+        'num_citations': 217,
+    }
+    for pub in author['publications']:
+        assert set(pub) == {'author_pub_id', 'bib', 'num_citations'}
+        assert set(pub['bib']) <= {'title', 'pub_year'} and pub['bib']['title']
+        assert isinstance(pub['num_citations'], int)
+    # "77*"（合并的引用数）按 77 计；没有引用、没有年份的条目
+    assert 77 in [pub['num_citations'] for pub in author['publications']]
+    assert any(pub['num_citations'] == 0 for pub in author['publications'])
+    assert any('pub_year' not in pub['bib'] for pub in author['publications'])
+
+
+def test_direct_profile_follows_pages(monkeypatch, citations):
+    monkeypatch.setattr(citations, 'PROFILE_PAGE_SIZE', 10)
+    requested = serve(monkeypatch, citations, {0: fixture('scholar_profile_page1.html'),
+                                               10: fixture('scholar_profile_page2.html')})
+    profile = citations.DirectProfile('VV0nEt4AAAAJ')
+    assert 'publication_count' not in profile.probe()
+    author = profile.fill_publications()
+    assert requested == [0, 10]
+    assert author['publications'] == citations.parse_profile_page(fixture('scholar_profile.html'))['publications']
+
+
+def test_captcha_page_is_unavailable(citations):
+    with pytest.raises(citations.ProfileUnavailable):
+        citations.parse_profile_page(fixture('scholar_profile_captcha.html'))
+
+
+def test_fetch_author_falls_back_to_scholarly(monkeypatch, citations):
+    serve(monkeypatch, citations, {0: fixture('scholar_profile_captcha.html')})
+    scholarly_author = {'citedby': 525, 'publications': []}
+
+    class FakeScholarly:
+        name = 'scholarly'
+
+        def __init__(self, user_id):
+            pass
+
+        def probe(self):
+            return scholarly_author
+
+        def fill_publications(self):
+            return scholarly_author
+
+    monkeypatch.setattr(citations, 'ScholarlyProfile', FakeScholarly)
+    assert citations.fetch_author('auto', True, None, {}, '2026-10-19') is scholarly_author
+    with pytest.raises(citations.ProfileUnavailable):
+        citations.fetch_author('direct', True, None, {}, '2026-10-19')
@@ -0,0 +1,131 @@
+"""parse_scopus_json 与 scrape_journal_metrics 对保存的 Serial Title JSON 的处理"""
+
+import json
+import os
+from types import SimpleNamespace
+
+import pytest
+
+from conftest import FIXTURES_DIR
+import update_scopus_metrics
+from update_scopus_metrics import ScopusDrissionCrawler, parse_scopus_json, TABLE_ROWS_JS
+
+
+@pytest.fixture
+def serial_title():
+    with open(os.path.join(FIXTURES_DIR, 'scopus_serial_title.json'), encoding='utf-8') as f:
+        return json.load(f)
+
+
+def test_parse_scopus_json_reads_pinned_paths(serial_title):
+    assert parse_scopus_json([serial_title]) == {
+        'orange_score': '24.1',
+        'citescore_year': '2024',
+        # 当前年份（2024）docType=all 的排名，不取 2025 Tracker 或 ar 类型；与页面一样按 Percentile 从高到低
+        'citescore_rank_data': [
+            {'category': 'Education', 'rank': '2', 'percentile': '99'},
+            {'category': 'General Computer Science', 'rank': '5', 'percentile': '96'},
+        ],
+        'orange_percentile': '99',
+        'documents_data': [{'year': '2025', 'documents': '1001'}, {'year': '2024', 'documents': '231'}],
+    }
+
+
+def test_parse_scopus_json_ignores_other_shapes():
+    bodies = [{'name': 'Education', 'percentile': 80, 'year': 2024, 'count': 12},
+              [{'citeScore': '3.0'}], {'serial-metadata-response': {'entry': 'oops'}}]
+    assert parse_scopus_json(bodies) == {}
+
+
+class FakePage:
+    """只提供 scrape_journal_metrics 用到的接口：监听返回保存的 JSON，页面元素由参数给出"""
+
+    def __init__(self, bodies, score='', category_rows=()):
+        self.bodies = bodies
+        self.score = score
+        self.category_rows = [list(row) for row in category_rows]
+        self.listen = SimpleNamespace(start=lambda targets: None, stop=lambda: None, steps=self._steps)
+
+    def _steps(self, timeout=None):
+        for body in self.bodies:
+            yield SimpleNamespace(response=SimpleNamespace(body=body))
+
+    def get(self, url, timeout=None):
+        return True
+
+    def ele(self, selector, timeout=None):
+        if selector == '#rpResult' and self.score:
+            return SimpleNamespace(text=self.score)
+        return None
+
+    def run_js(self, script, *args):
+        if script == TABLE_ROWS_JS and args == ('#CSCategoryTBody',):
+            return self.category_rows
+        return None
+
+    def close(self):
+        pass
+
+
+def scrape(monkeypatch, page, all_categories=False):
+    crawler = ScopusDrissionCrawler(headless=False, lean=False, all_categories=all_categories, capture_json=True)
+    monkeypatch.setattr(crawler, '_open_tab', lambda: page)
+    monkeypatch.setattr(update_scopus_metrics, 'JSON_CAPTURE_IDLE', 0.1)
+    return crawler.scrape_journal_metrics(17645)
+
+
+def test_json_used_when_page_not_rendered(monkeypatch, serial_title):
+    result = scrape(monkeypatch, FakePage([json.dumps(serial_title)]))
+    assert (result['orange_score'], result['orange_percentile'], result['orange_quartile']) == ('24.1', '99', 'Q1')
+    assert result['citescore_year'] == '2024'
+    assert (result['docs_current_year'], result['docs_last_year']) == ('1001 (2025)', '231 (2024)')
+    assert result['citescore_rank_data'] == []
+
+
+def test_page_wins_when_json_disagrees(monkeypatch, serial_title):
+    rows = [('Education', '#3/1543', '98th'), ('General Computer Science', '#5/232', '96th')]
+    page = FakePage([serial_title], score='24.3', category_rows=rows)
+    result = scrape(monkeypatch, page, all_categories=True)
+    assert (result['orange_score'], result['orange_percentile'], result['orange_quartile']) == ('24.3', '98', 'Q1')
+    assert result['citescore_rank_data'] == [{'category': c, 'rank': r, 'percentile': p} for c, r, p in rows]
+    # 页面没有渲染的字段（Content Coverage）仍使用 JSON
+    assert result['docs_current_year'] == '1001 (2025)'
+
+
+def test_select_due_journals_tolerates_odd_citescore_years():
+    from datetime import date
+    from update_scopus_metrics import REQUIRED_SCOPUS_FIELDS, select_due_journals
+    complete = {field: 'x' for field in REQUIRED_SCOPUS_FIELDS}
+    years = {'A': '2024', 'B': '2024 (prov.)', 'C': 'N/A', 'D': '', 'E': 2023}
+    records = [dict(complete, journal=name, citescore_year=year) for name, year in years.items()]
+    due = select_due_journals([{'name': name} for name in years], records, today=date(2025, 7, 1))
+    assert [journal['name'] for journal in due] == ['C', 'D', 'E']
+
+
+def test_json_capture_is_opt_in(monkeypatch, serial_title):
+    page = FakePage([serial_title], score='24.3', category_rows=[('Education', '#3/1543', '98th')])
+    page.listen = None  # 默认不监听：不会访问 page.listen
+    crawler = ScopusDrissionCrawler(headless=False, lean=False)
+    monkeypatch.setattr(crawler, '_open_tab', lambda: page)
+    monkeypatch.setattr(crawler, '_coverage_rows', lambda page, source_id, deadline: [])
+    result = crawler.scrape_journal_metrics(17645)
+    assert (result['orange_score'], result['orange_percentile']) == ('24.3', '98')
+    assert crawler.json_hits == 0
+
+
+def test_page_weight_counts_cdp_bytes(monkeypatch, tmp_path, caplog):
+    from update_scopus_metrics import NetworkMeter
+    monkeypatch.setattr(update_scopus_metrics, 'PAGE_WEIGHT_FILE', str(tmp_path / 'weight.json'))
+    page = FakePage([])
+    page.run_js = lambda script, *args: {'bytes': 0, 'requests': 3, 'load': 1.5}
+    meter = NetworkMeter()
+    # 跨域资源的 Resource Timing transferSize 为 0，CDP 事件仍有 encodedDataLength
+    meter.finished(requestId='1', encodedDataLength=30 * 1024)
+    meter.finished(requestId='2', encodedDataLength=10 * 1024)
+    meter.failed(requestId='3', blockedReason='inspector')
+    crawler = ScopusDrissionCrawler(headless=False)
+    crawler._record_page_weight(page, meter)
+    assert crawler.page_weights == [{'bytes': 40 * 1024, 'requests': 2, 'blocked': 1, 'load': 1.5, 'source': 'cdp'}]
+    with caplog.at_level('INFO'):
+        crawler._report_page_weight()
+    assert '40 KB / 2 个请求，屏蔽 1 个请求' in caplog.text and 'CDP encodedDataLength' in caplog.text
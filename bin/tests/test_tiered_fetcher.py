@@ -0,0 +1,46 @@
+"""TieredFetcher：只有挑战/拦截页让主机改走 FlareSolverr，其他失败只影响当前 URL"""
+
+from types import SimpleNamespace
+
+import pytest
+
+import journal_ranking_updater
+from journal_ranking_updater import TIER_BROWSER, TIER_HTTP, TieredFetcher
+
+CHALLENGE = '<html><title>Just a moment...</title><script>window._cf_chl_opt={}</script></html>'
+PAGE = '<html><body>' + 'journal metrics ' * 10 + '</body></html>'
+
+
+@pytest.fixture
+def fetcher(monkeypatch):
+    responses = {}
+
+    def get(kind, url, **kwargs):
+        response = responses[url]
+        if isinstance(response, Exception):
+            raise response
+        return SimpleNamespace(status_code=response[0], text=response[1])
+
+    monkeypatch.setattr(journal_ranking_updater.FETCH, 'get', get)
+    tiered = TieredFetcher(SimpleNamespace(get_page=lambda url: f'rendered {url}'))
+    tiered.responses = responses
+    return tiered
+
+
+@pytest.mark.parametrize('failure', [(404, 'Not Found'), (500, 'oops'), (503, 'Service Unavailable'),
+                                     (200, ''), TimeoutError('timed out')])
+def test_ordinary_failure_falls_back_for_that_url_only(fetcher, failure):
+    fetcher.responses.update({'https://pub.example/a': failure, 'https://pub.example/b': (200, PAGE)})
+    assert fetcher.get_page('https://pub.example/a') == 'rendered https://pub.example/a'
+    assert fetcher.get_page('https://pub.example/b') == PAGE
+    assert fetcher.tier_of('https://pub.example/a') == TIER_BROWSER
+    assert fetcher.tier_of('https://pub.example/b') == TIER_HTTP
+
+
+@pytest.mark.parametrize('challenge', [(403, CHALLENGE), (503, CHALLENGE), (200, CHALLENGE),
+                                       (403, '<h1>Access Denied</h1>')])
+def test_challenge_makes_host_sticky(fetcher, challenge):
+    fetcher.responses.update({'https://pub.example/a': challenge, 'https://pub.example/b': (200, PAGE)})
+    assert fetcher.get_page('https://pub.example/a') == 'rendered https://pub.example/a'
+    assert fetcher.get_page('https://pub.example/b') == 'rendered https://pub.example/b'
+    assert fetcher.tier_of('https://pub.example/b') == TIER_BROWSER
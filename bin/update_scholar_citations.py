@@ -1,11 +1,18 @@
 #!/usr/bin/env python
 
 import os
+import re
 import sys
 import yaml
-from datetime import datetime
+import argparse
+from datetime import datetime, timedelta
+from lxml import html as lxml_html
 from scholarly import scholarly
 
+from fetch import FETCH, BROWSER_HEADERS
+from metric_history import MetricHistory
+from stable_yaml import diff_hashes, dump_yaml, record_hashes, save_changes, write_text
+
 
 def load_scholar_user_id() -> str:
     """Load the Google Scholar user ID from the configuration file."""
@@ -35,13 +42,196 @@ def load_scholar_user_id() -> str:
 SCHOLAR_USER_ID: str = load_scholar_user_id()
 OUTPUT_FILE: str = "_data/citations.yml"
 
+# The scholarly probe (and the direct one, for profiles longer than one page) only sees the citation
+# totals, so a new publication without citations is picked up by a full fetch at least this often.
+FULL_REFRESH_DAYS: int = 30
+PROBE_SECTIONS = ["basics", "indices", "counts"]
+
+# Direct profile fetch: the largest page size Scholar serves, impersonating Chrome
+PROFILE_URL = "https://scholar.google.com/citations"
+PROFILE_PAGE_SIZE = 100
+PROFILE_IMPERSONATE = "chrome120"
+PROFILE_TIMEOUT = 20
+BACKENDS = ("auto", "direct", "scholarly")
+
+
+def _has_class(name: str) -> str:
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+class ProfileUnavailable(Exception):
+    """The direct fetch got no usable profile page (blocked, CAPTCHA or changed markup)."""
+
+
+def parse_profile_page(html: str) -> dict:
+    """Parse one profile page in a single pass.
+
+    Returns a scholarly-shaped author dict: {"citedby", "publications": [{"author_pub_id",
+    "bib": {"title", "pub_year"}, "num_citations"}], "has_more"}.
+    """
+    tree = lxml_html.fromstring(html)
+    stats = tree.xpath(f"//td[{_has_class('gsc_rsb_std')}]")
+    rows = tree.xpath(f"//tr[{_has_class('gsc_a_tr')}]")
+    if not stats and not rows:
+        raise ProfileUnavailable("no citation table or publication rows on the page")
+
+    publications = []
+    for row in rows:
+        link = row.xpath(f".//a[{_has_class('gsc_a_at')}]")
+        if not link:
+            continue
+        match = re.search(r"citation_for_view=([\w-]*:[\w-]*)", link[0].get("href") or link[0].get("data-href") or "")
+        pub = {"bib": {"title": link[0].text_content()}, "num_citations": 0}
+        if match:
+            pub["author_pub_id"] = match.group(1)
+        # "12*" marks merged citation counts
+        cited = re.search(r"\d+", "".join(row.xpath(f".//a[{_has_class('gsc_a_ac')}]//text()")))
+        if cited:
+            pub["num_citations"] = int(cited.group())
+        year = "".join(row.xpath(f".//span[{_has_class('gsc_a_h')}]//text()")).strip()
+        if year:
+            pub["bib"]["pub_year"] = year
+        publications.append(pub)
+
+    more = tree.xpath("//button[@id='gsc_bpf_more']")
+    return {
+        "citedby": int(stats[0].text_content().strip()) if stats and stats[0].text_content().strip().isdigit() else None,
+        "publications": publications,
+        "has_more": bool(more) and more[0].get("disabled") is None and len(rows) >= PROFILE_PAGE_SIZE,
+    }
+
+
+class DirectProfile:
+    """Profile pages fetched with the shared curl_cffi client and parsed with lxml (no search call)."""
+
+    name = "direct"
+
+    def __init__(self, user_id: str):
+        self.user_id = user_id
+        self.author = None
+
+    def _page(self, cstart: int) -> dict:
+        response = FETCH.get(
+            "scholar",
+            PROFILE_URL,
+            params={"hl": "en", "user": self.user_id, "cstart": cstart, "pagesize": PROFILE_PAGE_SIZE},
+            impersonate=PROFILE_IMPERSONATE,
+            timeout=PROFILE_TIMEOUT,
+            headers=BROWSER_HEADERS,
+            # A blocked profile fetch falls back to scholarly instead of waiting out a rate limit
+            retries=0,
+        )
+        if response.status_code != 200:
+            raise ProfileUnavailable(f"HTTP {response.status_code}")
+        return parse_profile_page(response.text)
+
+    def probe(self) -> dict:
+        """First page only: total citations, plus the publication count when the list fits on it."""
+        self.author = self._page(0)
+        if self.author["citedby"] is None:
+            raise ProfileUnavailable("no total citation count on the profile page")
+        if not self.author["has_more"]:
+            self.author["publication_count"] = len(self.author["publications"])
+        return self.author
+
+    def fill_publications(self) -> dict:
+        author = self.author or self.probe()
+        while author["has_more"]:
+            page = self._page(len(author["publications"]))
+            if not page["publications"]:
+                break
+            author["publications"].extend(page["publications"])
+            author["has_more"] = page["has_more"]
+        return author
+
+
+class ScholarlyProfile:
+    """The scholarly package: slower, but handles layouts the direct parser does not."""
+
+    name = "scholarly"
 
-def get_scholar_citations() -> None:
-    """Fetch and update Google Scholar citation data."""
+    def __init__(self, user_id: str):
+        self.user_id = user_id
+        self.author = None
+        scholarly.set_timeout(15)
+        scholarly.set_retries(3)
+
+    def probe(self) -> dict:
+        # Probe: one profile request for the totals, no publication pages, co-authors or mandates
+        self.author = scholarly.fill(scholarly.search_author_id(self.user_id), sections=PROBE_SECTIONS)
+        return self.author
+
+    def fill_publications(self) -> dict:
+        return scholarly.fill(self.author or self.probe(), sections=["publications"])
+
+
+def probe_unchanged(author: dict, metadata: dict, today: str) -> bool:
+    """Whether the cheap profile probe matches the totals saved by the last full fetch."""
+    last_full = metadata.get("last_full_update")
+    if not last_full or "total_citations" not in metadata:
+        return False
+    if datetime.strptime(today, "%Y-%m-%d") - datetime.strptime(str(last_full), "%Y-%m-%d") >= timedelta(
+        days=FULL_REFRESH_DAYS
+    ):
+        print(f"Last full fetch on {last_full}, more than {FULL_REFRESH_DAYS} days ago.")
+        return False
+    print(f"Probe: {author.get('citedby')} total citations (citations.yml: {metadata['total_citations']}).")
+    if "publication_count" in author and author["publication_count"] != metadata.get("publications"):
+        print(f"Probe: {author['publication_count']} publications (citations.yml: {metadata.get('publications')}).")
+        return False
+    return author.get("citedby") == metadata["total_citations"]
+
+
+def merge_papers(old_papers: dict, fetched: dict) -> dict:
+    """Keep unchanged entries as they are and only replace the publications whose data moved."""
+    papers = {}
+    for pub_id, paper in fetched.items():
+        old = old_papers.get(pub_id)
+        if old == paper:
+            papers[pub_id] = old
+            continue
+        if old is None:
+            print(f"New: {paper['title']} ({paper['year']}) - Citations: {paper['citations']}")
+        else:
+            print(f"Updated: {paper['title']} - Citations: {old.get('citations')} -> {paper['citations']}")
+        papers[pub_id] = paper
+    return papers
+
+
+def fetch_author(backend: str, full: bool, existing_data, old_metadata: dict, today: str):
+    """Probe and, when needed, fill the profile; returns the author dict or None if unchanged.
+
+    backend "auto" tries the direct fetch first and falls back to scholarly on any failure.
+    """
+    profiles = {"direct": [DirectProfile], "scholarly": [ScholarlyProfile]}.get(
+        backend, [DirectProfile, ScholarlyProfile]
+    )
+    for i, profile_class in enumerate(profiles):
+        profile = profile_class(SCHOLAR_USER_ID)
+        try:
+            author = profile.probe()
+            if not full and existing_data and probe_unchanged(author, old_metadata, today):
+                return None
+            author = profile.fill_publications()
+            print(f"Fetched profile with the {profile.name} backend.")
+            return author
+        except Exception as e:
+            if i == len(profiles) - 1:
+                raise
+            print(f"Warning: {profile.name} fetch failed ({e}), falling back to scholarly.")
+
+
+def get_scholar_citations(full: bool = False, backend: str = "auto") -> None:
+    """Fetch and update Google Scholar citation data.
+
+    A cheap probe of the profile totals runs first; the publication list is only fetched
+    when the total citation count moved (or full=True / the last full fetch is too old).
+    """
     print(f"Fetching citations for Google Scholar ID: {SCHOLAR_USER_ID}")
     today = datetime.now().strftime("%Y-%m-%d")
 
     # Check if the output file was already updated today
+    existing_data = None
     if os.path.exists(OUTPUT_FILE):
         try:
             with open(OUTPUT_FILE, "r") as f:
@@ -61,12 +251,14 @@ def get_scholar_citations() -> None:
             )
 
     citation_data = {"metadata": {"last_updated": today}, "papers": {}}
+    old_metadata = (existing_data or {}).get("metadata") or {}
 
-    scholarly.set_timeout(15)
-    scholarly.set_retries(3)
     try:
-        author = scholarly.search_author_id(SCHOLAR_USER_ID)
-        author_data = scholarly.fill(author)
+        author_data = fetch_author(backend, full, existing_data, old_metadata, today)
+        if author_data is None:
+            print("Citation totals unchanged since the last full fetch. Skipping publication fetch.")
+            save_changes(OUTPUT_FILE, {"written": False, "added": [], "removed": [], "modified": []})
+            return
     except Exception as e:
         print(
             f"Error fetching author data from Google Scholar for user ID '{SCHOLAR_USER_ID}': {e}. Please check your internet connection and Scholar user ID."
@@ -96,8 +288,6 @@ def get_scholar_citations() -> None:
             year = pub.get("bib", {}).get("pub_year", "Unknown Year")
             citations = pub.get("num_citations", 0)
 
-            print(f"Found: {title} ({year}) - Citations: {citations}")
-
             citation_data["papers"][pub_id] = {
                 "title": title,
                 "year": year,
@@ -108,25 +298,63 @@ def get_scholar_citations() -> None:
                 f"Error processing publication '{pub.get('bib', {}).get('title', 'Unknown')}': {e}. This publication will be skipped."
             )
 
-    # Compare new data with existing data
-    if existing_data and existing_data.get("papers") == citation_data["papers"]:
+    # Only the publications whose counts moved are replaced
+    old_papers = (existing_data or {}).get("papers") or {}
+    citation_data["papers"] = merge_papers(old_papers, citation_data["papers"])
+    citation_data["metadata"].update(
+        {
+            "last_full_update": today,
+            "total_citations": author_data.get("citedby"),
+            "publications": len(citation_data["papers"]),
+        }
+    )
+    print(f"Fetched {len(citation_data['papers'])} publications, {author_data.get('citedby')} total citations.")
+
+    # Compare per-paper content hashes with the existing data
+    changes = diff_hashes(record_hashes(old_papers), record_hashes(citation_data["papers"]))
+    # The probe totals and the full-fetch date are saved even when no paper changed
+    probe_fields = ("last_full_update", "total_citations", "publications")
+    metadata_changed = any(old_metadata.get(k) != citation_data["metadata"][k] for k in probe_fields)
+    if existing_data and not any(changes.values()) and not metadata_changed:
+        save_changes(OUTPUT_FILE, {"written": False, **changes})
         print("No changes in citation data. Skipping file update.")
         return
 
     try:
-        with open(OUTPUT_FILE, "w") as f:
-            yaml.dump(citation_data, f, width=1000, sort_keys=True)
-        print(f"Citation data saved to {OUTPUT_FILE}")
+        write_text(OUTPUT_FILE, dump_yaml(citation_data, width=1000, sort_keys=True))
+        save_changes(OUTPUT_FILE, {"written": True, **changes})
+        print(
+            f"Citation data saved to {OUTPUT_FILE} ({len(changes['added'])} added, "
+            f"{len(changes['removed'])} removed, {len(changes['modified'])} modified)"
+        )
     except Exception as e:
         print(
             f"Error writing citation data to {OUTPUT_FILE}: {e}. Please check file permissions and disk space."
         )
         sys.exit(1)
 
+    # Append this run's citation counts to the metric history
+    try:
+        MetricHistory("citations").record_run(
+            {pub_id: {"citations": paper["citations"]} for pub_id, paper in citation_data["papers"].items()},
+            source="scholar",
+        )
+    except Exception as e:
+        print(f"Warning: Could not record citation history: {e}")
+
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Update Google Scholar citation counts in _data/citations.yml")
+    parser.add_argument("--full", action="store_true", help="Always fetch the full publication list (skip the probe)")
+    parser.add_argument(
+        "--backend",
+        choices=BACKENDS,
+        default="auto",
+        help="direct: fetch profile pages with curl_cffi; scholarly: the scholarly package; auto: direct, then scholarly",
+    )
+    args = parser.parse_args()
     try:
-        get_scholar_citations()
+        get_scholar_citations(full=args.full, backend=args.backend)
     except Exception as e:
         print(f"Unexpected error: {e}")
         sys.exit(1)
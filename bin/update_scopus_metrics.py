@@ -4,25 +4,231 @@
 独立运行，专门更新：橙色分数、橙色分区、Documents Published、Percentile
 """
 
+import os
 import json
-import yaml
 import time
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from DrissionPage import WebPage, ChromiumOptions
-from typing import Dict, Any, Optional
+from typing import Dict, List, Any, Optional, Set, Tuple, Callable
 import re
+from datetime import date, datetime
+
+from journal_store import open_store
+from cassette import CASSETTE
+from journal_selector import JournalSelector, add_selector_arguments
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# 多标签页并行：同一个浏览器内同时处理的期刊数、同时向 Scopus 发起的页面加载数、每个标签页的总时限（秒）
+SCOPUS_TABS = 1
+SCOPUS_MAX_REQUESTS = 2
+SCOPUS_TAB_TIMEOUT = 120
+
+# Content Coverage 标签：点击页面上的标签元素（站内切换，不重新加载页面），
+# 找不到标签元素或点击后 TAB_SWITCH_TIMEOUT 秒内表格没有出现时，才整页加载 #tabs=2
+COVERAGE_TAB_LOCATORS = (
+    'css:a[href*="tabs=2"]',
+    'xpath://*[@role="tab" or self::a or self::button][contains(translate(normalize-space(.), '
+    '"CONTEVRAG", "contevrag"), "content coverage")]',
+)
+TAB_SWITCH_TIMEOUT = 8
+
+# 一次读出表格所有行的单元格文本（与逐个元素读取一致：有 td 用 td，否则用 th）
+TABLE_ROWS_JS = """
+return Array.from(document.querySelectorAll(arguments[0] + ' tr')).map(row => {
+    const td = row.querySelectorAll('td');
+    return Array.from(td.length ? td : row.querySelectorAll('th')).map(cell => cell.innerText.trim());
+});
+"""
+
+# Serial Title JSON 接口（网络监听的目标，按 URL 子串匹配）；尚未确认来源页面会请求该接口，
+# 监听默认关闭（--capture-json 开启）。超过 JSON_CAPTURE_IDLE 秒没有新的响应就停止等待，缺少的字段从页面元素读取
+SCOPUS_JSON_TARGETS = ('/serial/title',)
+JSON_CAPTURE_IDLE = 3
+
+# 精简的浏览器配置 (lean profile)：不加载图片、媒体、字体和第三方统计/广告脚本，关闭后台网络和扩展，小窗口
+LEAN_WINDOW_SIZE = '1280,800'
+LEAN_ARGUMENTS = ('--disable-extensions', '--disable-background-networking', '--disable-component-update',
+                  '--disable-sync', '--disable-default-apps', '--no-first-run', '--mute-audio',
+                  '--autoplay-policy=user-gesture-required', '--blink-settings=imagesEnabled=false')
+LEAN_BLOCKED_TYPES = ('*.png', '*.jpg', '*.jpeg', '*.gif', '*.webp', '*.ico', '*.svg',
+                      '*.woff', '*.woff2', '*.ttf', '*.otf', '*.eot',
+                      '*.mp4', '*.webm', '*.mp3')
+LEAN_BLOCKED_HOSTS = ('googletagmanager.com', 'google-analytics.com', 'doubleclick.net', 'googlesyndication.com',
+                      'assets.adobedtm.com', 'omtrdc.net', 'demdex.net', 'hotjar.com', 'nr-data.net',
+                      'newrelic.com', 'pendo.io', 'optimizely.com', 'facebook.net', 'bat.bing.com',
+                      'linkedin.com/px', 'qualtrics.com')
+
+# 页面传输的字节数（主文档 + 所有子资源）、请求数和加载耗时，用于比较两种浏览器配置；
+# 每种配置最近一次运行的平均值保存在 PAGE_WEIGHT_FILE，运行结束时与另一种配置对比。
+# 字节数优先用 CDP 的 Network.loadingFinished.encodedDataLength（包括跨域资源），另记被屏蔽的请求数；
+# 没有 CDP 事件时退回 Resource Timing 的 transferSize（跨域且没有 Timing-Allow-Origin 的资源记为 0）
+PAGE_WEIGHT_FILE = '.cache/scopus_page_weight.json'
+PAGE_WEIGHT_JS = """
+const nav = performance.getEntriesByType('navigation')[0];
+const resources = performance.getEntriesByType('resource');
+return {
+    bytes: (nav ? nav.transferSize : 0) + resources.reduce((sum, r) => sum + (r.transferSize || 0), 0),
+    requests: resources.length + 1,
+    load: nav ? (nav.loadEventEnd || nav.domContentLoadedEventEnd) / 1000 : null
+};
+"""
+PAGE_WEIGHT_SOURCES = {
+    'cdp': 'CDP encodedDataLength，包括跨域资源',
+    'resource-timing': 'Resource Timing transferSize，不含跨域且没有 Timing-Allow-Origin 的资源',
+}
+
+# 页面上显示的 CiteScore 年份（"CiteScore 2024"，不匹配 CiteScoreTracker）
+CITESCORE_YEAR_JS = "const m = document.body.innerText.match(/CiteScore\\s+(\\d{4})/); return m ? m[1] : null;"
+CITESCORE_YEAR_PATTERN = re.compile(r'CiteScore\s+(?:<[^>]*>\s*)*(\d{4})')
+
+# CiteScore 每年发布一次：N 年的 CiteScore 在 N+1 年 6 月左右发布。已有当前发布年份数据且字段齐全的期刊不再重新抓取
+CITESCORE_RELEASE_MONTH = 6
+REQUIRED_SCOPUS_FIELDS = ('orange_score', 'orange_quartile', 'orange_percentile',
+                          'documents_current_year', 'documents_last_year')
+
+# 本阶段负责的字段（写入期刊数据库时来源记为 scopus）
+SCOPUS_FIELDS = ('orange_score', 'orange_quartile', 'orange_percentile',
+                 'documents_current_year', 'documents_last_year', 'documents_published',
+                 'orange_categories', 'citescore_year', 'scopus_fetched_at')
+
+
+def current_citescore_year(today: Optional[date] = None) -> int:
+    """Scopus 当前显示的 CiteScore 年份（N 年的数据在 N+1 年 CITESCORE_RELEASE_MONTH 月发布）"""
+    today = today or date.today()
+    return today.year - 1 if today.month >= CITESCORE_RELEASE_MONTH else today.year - 2
+
+
+def _citescore_year_value(value: Any) -> Optional[int]:
+    """记录中的 CiteScore 年份（如 "2024"、"2024 (prov.)"）；没有四位年份时返回 None"""
+    match = re.search(r'\b(\d{4})\b', str(value)) if value not in (None, '') else None
+    return int(match.group(1)) if match else None
+
+
+def select_due_journals(journal_list: List[Dict[str, Any]], records: List[Dict[str, Any]],
+                        today: Optional[date] = None) -> List[Dict[str, Any]]:
+    """需要重新抓取的期刊：新期刊、缺少橙色字段的期刊，以及 CiteScore 年份早于当前发布年份（或无法识别）的期刊"""
+    year = current_citescore_year(today)
+    by_name = {record['journal']: record for record in records}
+    due = []
+    for journal_info in journal_list:
+        record = by_name.get(journal_info['name'])
+        if (record is None
+                or any(record.get(field) in (None, '') for field in REQUIRED_SCOPUS_FIELDS)
+                or (_citescore_year_value(record.get('citescore_year')) or 0) < year):
+            due.append(journal_info)
+    logger.info(f"📅 CiteScore {year}: {len(due)}/{len(journal_list)} 个期刊需要更新 "
+                f"(其余已有 {year} 年的数据，--force 重新抓取全部期刊)")
+    return due
+
+
+def _number(value: Any) -> Optional[str]:
+    match = re.search(r'\d+(?:\.\d+)?', str(value).replace(',', '')) if value is not None else None
+    return match.group(0) if match else None
+
+
+def _items(value: Any) -> List[Dict[str, Any]]:
+    """JSON 中的对象列表（只有一个元素时接口直接返回对象）"""
+    if isinstance(value, dict):
+        return [value]
+    return [item for item in value if isinstance(item, dict)] if isinstance(value, list) else []
+
+
+def parse_scopus_json(bodies: List[Any]) -> Dict[str, Any]:
+    """从 Serial Title 接口的 JSON 响应中提取指标，只返回找到的字段
+
+    只读取固定路径 serial-metadata-response.entry[]：
+    - citeScoreYearInfoList.citeScoreCurrentMetric / citeScoreCurrentMetricYear
+    - citeScoreYearInfoList.citeScoreYearInfo[@year=当前年份].citeScoreInformationList[].citeScoreInfo[docType=all]
+      .citeScoreSubjectRank[]（subjectCode、rank、percentile；学科名称来自 subject-area[] 的 @code 和 $）
+    - yearly-data.info[]（@year、publicationCount）
+    其他结构的响应直接忽略
+    """
+    found: Dict[str, Any] = {}
+    entries = [entry for body in bodies if isinstance(body, dict)
+               for entry in _items((body.get('serial-metadata-response') or {}).get('entry'))]
+    for entry in entries:
+        info = entry.get('citeScoreYearInfoList') or {}
+        year = str(info.get('citeScoreCurrentMetricYear') or '')
+        score = _number(info.get('citeScoreCurrentMetric'))
+        if score and 'orange_score' not in found:
+            found['orange_score'] = score
+            if re.fullmatch(r'\d{4}', year):
+                found['citescore_year'] = year
+
+        if 'citescore_rank_data' not in found:
+            names = {str(area.get('@code')): str(area.get('$') or '') for area in _items(entry.get('subject-area'))}
+            categories = [
+                {'category': names.get(str(rank.get('subjectCode')), str(rank.get('subjectCode') or '')),
+                 'rank': str(rank.get('rank') or ''),
+                 'percentile': _number(rank.get('percentile'))}
+                for year_info in _items(info.get('citeScoreYearInfo')) if str(year_info.get('@year')) == year
+                for info_list in _items(year_info.get('citeScoreInformationList'))
+                for score_info in _items(info_list.get('citeScoreInfo')) if score_info.get('docType') == 'all'
+                for rank in _items(score_info.get('citeScoreSubjectRank'))
+            ]
+            categories = [category for category in categories if category['percentile'] is not None]
+            if categories:
+                # 与页面分类表一致：按 Percentile 从高到低，第一个（最高的）决定橙色分区
+                categories.sort(key=lambda category: -float(category['percentile']))
+                found['citescore_rank_data'] = categories
+                found['orange_percentile'] = str(int(float(categories[0]['percentile'])))
+
+        if 'documents_data' not in found:
+            documents = {str(item.get('@year')): _number(item.get('publicationCount'))
+                         for item in _items((entry.get('yearly-data') or {}).get('info'))}
+            documents = {year: count for year, count in documents.items()
+                         if count is not None and re.fullmatch(r'\d{4}', year)}
+            if documents:
+                # 最近两年：当年 & 去年
+                found['documents_data'] = [{'year': year, 'documents': documents[year]}
+                                           for year in sorted(documents, reverse=True)[:2]]
+    return found
+
+
+class NetworkMeter:
+    """一个标签页的 CDP 网络事件计数：已完成请求的 encodedDataLength 之和、发出的请求数和被屏蔽的请求数"""
+    
+    def __init__(self):
+        self.bytes = 0
+        self.requests = 0
+        self.blocked = 0
+        self._lock = threading.Lock()
+    
+    def finished(self, **params):
+        with self._lock:
+            self.bytes += params.get('encodedDataLength') or 0
+            self.requests += 1
+    
+    def failed(self, **params):
+        with self._lock:
+            if params.get('blockedReason'):
+                self.blocked += 1
+            else:
+                self.requests += 1
+    
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            return {'bytes': self.bytes, 'requests': self.requests, 'blocked': self.blocked}
+
 
 class ScopusDrissionCrawler:
     """使用 DrissionPage 爬取期刊橙色系指标"""
     
-    def __init__(self, headless: bool = True):
+    def __init__(self, headless: bool = True, reuse_browser: bool = True,
+                 max_requests: int = SCOPUS_MAX_REQUESTS, tab_timeout: float = SCOPUS_TAB_TIMEOUT,
+                 all_categories: bool = False, capture_json: bool = False,
+                 base_url: str = "https://www.scopus.com/sourceid", lean: bool = True):
         self.headless = headless
-        self.base_url = "https://www.scopus.com/sourceid"
+        self.all_categories = all_categories  # 记录 CiteScore 全部学科分类（citescore_rank_data）
+        # 开启时优先从页面的 XHR/JSON 响应中读取指标，缺少的字段再从 DOM 读取
+        self.capture_json = capture_json
+        self.base_url = base_url.rstrip('/')
+        self.json_hits = 0
         
         # 配置浏览器选项
         self.options = ChromiumOptions()
@@ -42,7 +248,293 @@ class ScopusDrissionCrawler:
         self.options.set_argument('--no-sandbox')
         self.options.set_argument('--disable-gpu')
         
+        # 4. 精简配置：屏蔽图片/媒体/字体和第三方跟踪脚本（每个标签页打开时设置 URL 屏蔽列表）
+        self.lean = lean
+        if lean:
+            for argument in LEAN_ARGUMENTS:
+                self.options.set_argument(argument)
+            self.options.set_argument('--window-size', LEAN_WINDOW_SIZE)
+        self.page_weights: List[Dict[str, float]] = []
+        
         # DrissionPage 默认已经处理了很多 WebDriver 特征，通常不需要像 Selenium 那样做很多 mask
+        
+        # 整个运行只启动一个浏览器，每个期刊开一个标签页；reuse_browser=False 时恢复为每个期刊启动一次（用于对比耗时）
+        self.reuse_browser = reuse_browser
+        self._browser = None
+        self._browser_lock = threading.RLock()
+        self._generation = 0  # 每次启动浏览器加一，避免多个标签页同时重启
+        self.browser_starts = 0
+        self.browser_start_time = 0.0
+        self.journal_times: List[float] = []
+        
+        # 多个标签页共用：限制同时进行的页面加载数，每个标签页处理一个期刊的总时限
+        self._request_slots = threading.Semaphore(max(1, max_requests))
+        self.tab_timeout = tab_timeout
+    
+    def __enter__(self):
+        # 浏览器在第一个期刊时才启动，没有期刊要处理时不启动 Chrome
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+    
+    def start(self):
+        """启动浏览器（已启动则不做任何事）"""
+        with self._browser_lock:
+            if self._browser is not None:
+                return
+            start = time.perf_counter()
+            self._browser = CASSETTE.open_page(WebPage, chromium_options=self.options)
+            elapsed = time.perf_counter() - start
+            self._generation += 1
+            self.browser_starts += 1
+            self.browser_start_time += elapsed
+            logger.info(f"🌐 浏览器已启动 ({elapsed:.1f}s)")
+    
+    def close(self):
+        with self._browser_lock:
+            if self._browser is None:
+                return
+            try:
+                self._browser.quit()
+            except Exception:
+                pass
+            self._browser = None
+    
+    def restart(self):
+        logger.warning("🔄 浏览器无响应，重新启动")
+        with self._browser_lock:
+            self.close()
+            self.start()
+    
+    def _open_tab(self):
+        """新标签页；浏览器崩溃（无法开新标签页）时重启一次"""
+        with self._browser_lock:
+            self.start()
+            browser, generation = self._browser, self._generation
+        try:
+            tab = browser.new_tab()
+        except Exception as e:
+            logger.warning(f"⚠️ 无法打开新标签页: {e}")
+            with self._browser_lock:
+                # 其他标签页已经重启过浏览器时直接使用新浏览器
+                if self._generation == generation:
+                    self.restart()
+                browser = self._browser
+            tab = browser.new_tab()
+        if self.lean:
+            self._block_resources(tab)
+        return tab
+    
+    @staticmethod
+    def _block_resources(tab):
+        """通过 CDP 为标签页设置 URL 屏蔽列表（回放的页面没有 CDP，直接跳过）"""
+        patterns = list(LEAN_BLOCKED_TYPES) + [f"*{host}*" for host in LEAN_BLOCKED_HOSTS]
+        try:
+            tab.run_cdp('Network.enable')
+            tab.run_cdp('Network.setBlockedURLs', urls=patterns)
+        except Exception as e:
+            logger.debug(f"无法设置资源屏蔽: {e}")
+    
+    @staticmethod
+    def _start_meter(tab) -> Optional['NetworkMeter']:
+        """订阅标签页的 CDP 网络事件（回放的页面或不支持事件回调时返回 None）"""
+        try:
+            meter = NetworkMeter()
+            tab.run_cdp('Network.enable')
+            tab.driver.set_callback('Network.loadingFinished', meter.finished)
+            tab.driver.set_callback('Network.loadingFailed', meter.failed)
+            return meter
+        except Exception as e:
+            logger.debug(f"无法订阅网络事件: {e}")
+            return None
+    
+    def _record_page_weight(self, page, meter: Optional['NetworkMeter'] = None):
+        try:
+            weight = page.run_js(PAGE_WEIGHT_JS)
+        except Exception:
+            weight = None
+        if not weight or not weight.get('load'):
+            return
+        weight['source'] = 'resource-timing'
+        if meter and meter.requests:
+            weight.update(meter.snapshot(), source='cdp')
+        self.page_weights.append(weight)
+    
+    @staticmethod
+    def _timeout(deadline: float, cap: float) -> float:
+        """本步骤可用的等待时间：不超过 cap，也不超过标签页的剩余时限"""
+        remaining = deadline - time.perf_counter()
+        if remaining <= 0:
+            raise TimeoutError("标签页处理超时")
+        return min(cap, remaining)
+    
+    def _load(self, page, url: str, deadline: float):
+        """限制同时进行的页面加载数"""
+        with self._request_slots:
+            page.get(url, timeout=self._timeout(deadline, 30))
+    
+    def log_timing(self):
+        if not self.journal_times:
+            return
+        total = sum(self.journal_times)
+        logger.info(f"⏱️ Scopus: {len(self.journal_times)} 个期刊，平均 {total / len(self.journal_times):.1f}s/期刊 "
+                    f"(共 {total:.0f}s)，浏览器启动 {self.browser_starts} 次 ({self.browser_start_time:.1f}s)")
+        if self.capture_json:
+            logger.info(f"📡 {self.json_hits}/{len(self.journal_times)} 个期刊从 JSON 响应中取得指标")
+        if self.page_weights:
+            self._report_page_weight()
+    
+    def _report_page_weight(self):
+        # 同一次运行中两种来源的页面都有时只统计 CDP 的（数值不可比）
+        sources = {w['source'] for w in self.page_weights}
+        source = 'cdp' if 'cdp' in sources else 'resource-timing'
+        weights = [w for w in self.page_weights if w['source'] == source]
+        count = len(weights)
+        current = {'kb': sum(w['bytes'] for w in weights) / count / 1024,
+                   'requests': sum(w['requests'] for w in weights) / count,
+                   'blocked': sum(w.get('blocked', 0) for w in weights) / count,
+                   'load': sum(w['load'] for w in weights) / count,
+                   'pages': count, 'source': source}
+        profile, other = ('lean', 'full') if self.lean else ('full', 'lean')
+        try:
+            with open(PAGE_WEIGHT_FILE, 'r', encoding='utf-8') as f:
+                saved = json.load(f)
+        except (FileNotFoundError, ValueError):
+            saved = {}
+        saved[profile] = current
+        os.makedirs(os.path.dirname(PAGE_WEIGHT_FILE), exist_ok=True)
+        with open(PAGE_WEIGHT_FILE, 'w', encoding='utf-8') as f:
+            json.dump(saved, f, indent=1)
+        
+        label = '精简配置' if self.lean else '完整配置 (--no-lean-profile)'
+        blocked = f"，屏蔽 {current['blocked']:.0f} 个请求" if source == 'cdp' else ''
+        logger.info(f"📦 {label}: 平均每页 {current['kb']:.0f} KB / {current['requests']:.0f} 个请求{blocked}，"
+                    f"加载 {current['load']:.1f}s ({count} 个页面；字节数来源: {PAGE_WEIGHT_SOURCES[source]})")
+        if other in saved and saved[other].get('source', 'resource-timing') != source:
+            logger.info(f"📦 {other} 配置上次的字节数来自 {PAGE_WEIGHT_SOURCES[saved[other].get('source', 'resource-timing')]}，"
+                        f"与本次不可比，用 {'--no-lean-profile' if self.lean else '默认配置'} 再运行一次")
+        elif other in saved:
+            lean, full = (current, saved[other]) if self.lean else (saved[other], current)
+            logger.info(f"📦 精简配置每页节省 {full['kb'] - lean['kb']:.0f} KB "
+                        f"({(1 - lean['kb'] / full['kb']) * 100 if full['kb'] else 0:.0f}%)，"
+                        f"{full['requests'] - lean['requests']:.0f} 个请求，加载快 {full['load'] - lean['load']:.1f}s "
+                        f"(字节数来源: {PAGE_WEIGHT_SOURCES[source]})")
+        else:
+            logger.info(f"📦 用 {'--no-lean-profile' if self.lean else '默认配置'} 再运行一次即可比较节省的流量和时间")
+    
+    def _wait_until(self, condition: Callable[[], Any], deadline: float, cap: float, interval: float = 0.2) -> Any:
+        """轮询直到 condition() 返回真值（元素已渲染出内容），返回该值；超时抛出 TimeoutError"""
+        end = time.perf_counter() + self._timeout(deadline, cap)
+        while True:
+            value = condition()
+            # 回放的页面是静态 HTML，不会再变化
+            if value or CASSETTE.replaying:
+                return value
+            if time.perf_counter() >= end:
+                raise TimeoutError("等待页面内容超时")
+            time.sleep(interval)
+    
+    @staticmethod
+    def _text(page, selector: str) -> str:
+        element = page.ele(selector, timeout=0)
+        return element.text.strip() if element else ''
+    
+    @staticmethod
+    def _table_rows(page, selector: str) -> List[List[str]]:
+        """表格所有行的单元格文本；一次 JS 调用读完整张表，不支持 JS 时逐个元素读取"""
+        try:
+            rows = page.run_js(TABLE_ROWS_JS, selector)
+        except Exception:
+            rows = None
+        if rows is None:
+            table = page.ele(selector, timeout=0)
+            rows = []
+            for row in (table.eles('tag:tr') if table else []):
+                cells = row.eles('tag:td') or row.eles('tag:th')
+                rows.append([cell.text.strip() for cell in cells])
+        return [cells for cells in rows if cells]
+    
+    def _coverage_rows(self, page, source_id: int, deadline: float) -> List[List[str]]:
+        """点击 Content Coverage 标签并读出表格；没有可点击的标签或点击不生效时才重新加载 #tabs=2"""
+        # 表格已经渲染（或回放的静态页面中已包含）时直接读取
+        rows = self._table_rows(page, '#contentCoverage')
+        if rows:
+            return rows
+        tab = next(filter(None, (page.ele(locator, timeout=0) for locator in COVERAGE_TAB_LOCATORS)), None)
+        if tab is None:
+            logger.info("   未找到 Content Coverage 标签元素，加载 Content Coverage 标签页 (#tabs=2)...")
+        else:
+            try:
+                tab.click()
+                return self._wait_until(lambda: self._table_rows(page, '#contentCoverage'), deadline,
+                                        TAB_SWITCH_TIMEOUT)
+            except Exception as e:
+                logger.warning(f"   ⚠️ 点击 Content Coverage 标签未生效 ({e or '超时'})，重新加载 Content Coverage 标签页 (#tabs=2)...")
+        self._load(page, f"{self.base_url}/{source_id}#tabs=2", deadline)
+        return self._wait_until(lambda: self._table_rows(page, '#contentCoverage'), deadline, 20)
+    
+    def _start_listening(self, page) -> bool:
+        """在加载页面之前开始监听来源页面的 JSON 请求；页面不支持监听（如回放）时返回 False"""
+        if not self.capture_json or getattr(page, 'listen', None) is None:
+            return False
+        try:
+            page.listen.start(list(SCOPUS_JSON_TARGETS))
+            return True
+        except Exception as e:
+            logger.warning(f"   ⚠️ 无法监听网络请求，改为读取页面元素: {e}")
+            return False
+    
+    def _capture_json(self, page, deadline: float) -> Dict[str, Any]:
+        """收集已监听到的 JSON 响应并提取指标，所有字段齐全、响应停止或标签页超时后结束"""
+        bodies: List[Any] = []
+        found: Dict[str, Any] = {}
+        try:
+            for packet in page.listen.steps(timeout=self._timeout(deadline, JSON_CAPTURE_IDLE)):
+                self._timeout(deadline, JSON_CAPTURE_IDLE)
+                body = getattr(packet.response, 'body', None) if packet.response else None
+                if isinstance(body, str):
+                    try:
+                        body = json.loads(body)
+                    except ValueError:
+                        continue
+                if not isinstance(body, (dict, list)):
+                    continue
+                bodies.append(body)
+                found = parse_scopus_json(bodies)
+                if {'orange_score', 'orange_percentile', 'documents_data'} <= found.keys():
+                    break
+        except Exception as e:
+            logger.warning(f"   ⚠️ 读取 JSON 响应失败: {e}")
+        finally:
+            try:
+                page.listen.stop()
+            except Exception:
+                pass
+        if found:
+            logger.info(f"   📡 从 {len(bodies)} 个 JSON 响应中取得: {', '.join(sorted(found))}")
+        return found
+    
+    @staticmethod
+    def _prefer_dom(label: str, json_value: Optional[str], dom_value: str) -> Optional[str]:
+        """页面元素的值优先：与 JSON 中的数值不一致时记录并使用页面上的值"""
+        if not _number(dom_value):
+            return json_value
+        if json_value and float(_number(json_value)) != float(_number(dom_value)):
+            logger.warning(f"   ⚠️ {label} 与 JSON 不一致 (JSON {json_value}, 页面 {dom_value})，使用页面数值")
+        return dom_value
+    
+    @staticmethod
+    def _citescore_year(page) -> Optional[str]:
+        """页面上 CiteScore 对应的年份；找不到时返回 None（该期刊下次运行会重新抓取）"""
+        try:
+            year = page.run_js(CITESCORE_YEAR_JS)
+        except Exception:
+            year = None
+        if not year:
+            match = CITESCORE_YEAR_PATTERN.search(getattr(page, 'html', '') or '')
+            year = match.group(1) if match else None
+        return str(year) if year else None
     
     def calculate_orange_quartile(self, percentile: float) -> str:
         """
@@ -86,137 +578,274 @@ class ScopusDrissionCrawler:
         "docs_last_year": None,     # 新增：去年发文量
         "citescore_rank_data": [],
         "documents_data": [],
+        "citescore_year": None,
         "success": False,
         "error": None
     }
         
-        # 创建 WebPage 实例，应用配置
-        page = WebPage(chromium_options=self.options)
+        # 在共享的浏览器中为本期刊开一个标签页
+        started = time.perf_counter()
+        deadline = started + self.tab_timeout
+        if not self.reuse_browser:
+            self.close()
+        page = self._open_tab()
+        meter = self._start_meter(page)
         
         try:
-            # 1. 访问 Scopus 期刊页面 (tabs=0 显示 CiteScore)
+            # 1. 只加载一次来源页面 (tabs=0 显示 CiteScore)，Content Coverage 在页面内切换
             url = f"{self.base_url}/{source_id}#tabs=0"
             logger.info(f"正在访问: {url}")
-            page.get(url, timeout=30)
+            listening = self._start_listening(page)
+            self._load(page, url, deadline)
             
-            # 等待页面加载
-            page.wait.ele_displayed('#rpResult', timeout=20)
-            time.sleep(2)
+            # 2. 优先使用页面请求的 JSON 数据（不需要等待渲染），缺少的字段再从页面元素读取；
+            #    页面元素已经渲染时用来核对 JSON，两者不一致时以页面为准
+            if listening:
+                captured = self._capture_json(page, deadline)
+                if captured:
+                    self.json_hits += 1
+                result.update(captured)
+                if not self.all_categories:
+                    result['citescore_rank_data'] = []
+                for i, entry in enumerate(result['documents_data']):
+                    result['docs_current_year' if i == 0 else 'docs_last_year'] = \
+                        f"{entry['documents']} ({entry['year']})"
             
-            # 2. 抓取 CiteScore
+            # 抓取 CiteScore（等待元素有内容，而不是固定等待）
             try:
-                citescore_element = page.ele('#rpResult')
-                if citescore_element:
-                    result['orange_score'] = citescore_element.text.strip()
-                    logger.info(f"   ✅ 橙色分数: {result['orange_score']}")
+                if result['orange_score']:
+                    result['orange_score'] = self._prefer_dom('CiteScore', result['orange_score'],
+                                                              self._text(page, '#rpResult'))
+                else:
+                    result['orange_score'] = self._wait_until(lambda: self._text(page, '#rpResult'), deadline, 20)
+                logger.info(f"   ✅ 橙色分数: {result['orange_score']}")
             except Exception as e:
                 logger.warning(f"   ⚠️ 无法获取橙色分数: {e}")
+            if result['orange_score'] and not result['citescore_year']:
+                result['citescore_year'] = self._citescore_year(page)
             
-            # 3. 抓取 Percentile (用于计算 SJR Quartile)
+            # 3. 抓取 Percentile (用于计算 SJR Quartile)，整张分类表一次读出
             try:
-                page.wait.ele_displayed('#rpCategoryDropDown', timeout=15)
-                # 查找分类表格
-                table = page.ele('#CSCategoryTBody')
-                if table:
-                    rows = table.eles('tag:tr')
-                    if rows:
-                        # 取第一个分类的 Percentile
-                        first_row = rows[0]
-                        cells = first_row.eles('tag:td')
-                        if len(cells) >= 3:
-                            percentile_text = cells[2].text.strip()
-                            # 提取数字：如 "95th" -> "95"
-                            percentile_match = re.search(r'(\d+)', percentile_text)
-                            if percentile_match:
-                                percentile = int(percentile_match.group(1))
-                                result['orange_percentile'] = str(percentile)
-                                result['orange_quartile'] = self.calculate_orange_quartile(percentile)
-                                logger.info(f"   ✅ Percentile: {percentile}th -> 橙色分区: {result['orange_quartile']}")
+                if result['orange_percentile']:
+                    rows = self._table_rows(page, '#CSCategoryTBody')
+                else:
+                    rows = self._wait_until(lambda: self._table_rows(page, '#CSCategoryTBody'), deadline, 15)
+                # 取第一个分类的 Percentile，如 "95th" -> "95"
+                if rows and len(rows[0]) >= 3:
+                    percentile = self._prefer_dom('Percentile', result['orange_percentile'], rows[0][2])
+                    result['orange_percentile'] = _number(percentile)
+                    if self.all_categories:
+                        result['citescore_rank_data'] = [
+                            {'category': cells[0], 'rank': cells[1], 'percentile': cells[2]}
+                            for cells in rows if len(cells) >= 3
+                        ]
+                        logger.info(f"   📋 {len(result['citescore_rank_data'])} 个学科分类")
+                if result['orange_percentile']:
+                    percentile = int(float(result['orange_percentile']))
+                    result['orange_percentile'] = str(percentile)
+                    result['orange_quartile'] = self.calculate_orange_quartile(percentile)
+                    logger.info(f"   ✅ Percentile: {percentile}th -> 橙色分区: {result['orange_quartile']}")
             except Exception as e:
                 logger.warning(f"   ⚠️ 无法获取 Percentile: {e}")
             
-            # ... (前面代码保持不变) ...
-
-            # 4. 导航到 Content Coverage 标签页 (#tabs=2) 获取 Documents Published 数据
-            print("\n=== 步骤 3: 获取 Documents Published 数据 (当年 & 去年) ===")
-            try:
-                # 确保 result 字典里有这两个字段 (建议在函数开头初始化时加上)
-                result["docs_current_year"] = "0"
-                result["docs_last_year"] = "0"
-
-                print("正在导航到 Content Coverage 标签页 (#tabs=2)...")
-                content_coverage_url = f"https://www.scopus.com/sourceid/{source_id}#tabs=2"
-                page.get(content_coverage_url, timeout=30)
-                time.sleep(3) # 等待渲染
-                
-                page.wait.ele_displayed("#contentCoverage", timeout=20)
-                
-                # 获取表格
-                table = page.ele('#contentCoverage')
-                rows = []
-                if table:
-                    rows = table.eles('tag:tr')
-                
-                print(f"找到 {len(rows)} 行数据")
-                
-                # 遍历前两行：第0行通常是当年(Header)，第1行通常是去年
-                for i, row in enumerate(rows):
-                    if i > 1: break # 我们只需要前两年，拿到后就退出循环
-
-                    cells = row.eles("tag:td")
-                    if not cells: 
-                         cells = row.eles("tag:th")
-
-                    if len(cells) >= 2:
+            # 4. 点击 Content Coverage 标签 (#tabs=2) 获取 Documents Published 数据（JSON 中已取得时跳过）
+            if not result['documents_data']:
+                logger.info("   获取 Documents Published 数据 (当年 & 去年)")
+                try:
+                    rows = self._coverage_rows(page, source_id, deadline)
+                    logger.info(f"   找到 {len(rows)} 行数据")
+                    
+                    # 前两行：第0行通常是当年，第1行通常是去年
+                    for i, cells in enumerate(rows[:2]):
+                        if len(cells) < 2:
+                            continue
                         # 提取年份和数量
-                        year_text = cells[0].text.strip()
-                        doc_text = cells[1].text.strip()
-                        
-                        # 使用正则提取纯数字 (处理 "176 documents" -> "176")
-                        # 先移除逗号（千位分隔符），处理 "1,001" -> "1001"
-                        doc_text_clean = doc_text.replace(',', '')
-                        doc_count_match = re.search(r'(\d+)', doc_text_clean)
+                        year_text = cells[0]
+                        # 先移除逗号（千位分隔符），再提取纯数字："1,001 documents" -> "1001"
+                        doc_count_match = re.search(r'(\d+)', cells[1].replace(',', ''))
                         doc_count = doc_count_match.group(1) if doc_count_match else "0"
-
-                        print(f"解析第 {i} 行 -> 年份: {year_text} | 数量: {doc_count}")
-
-                        # 逻辑判断：第0行视为“最新/当年”，第1行视为“去年”
+                        
+                        logger.info(f"   解析第 {i} 行 -> 年份: {year_text} | 数量: {doc_count}")
+                        
                         if i == 0:
                             result["docs_current_year"] = f"{doc_count} ({year_text})"
-                            result["documents_data"].append({"year": year_text, "documents": doc_count})
-                        elif i == 1:
+                        else:
                             result["docs_last_year"] = f"{doc_count} ({year_text})"
-                            result["documents_data"].append({"year": year_text, "documents": doc_count})
-
-                if result["documents_data"]:
-                    print(f"✅ 提取成功")
-                else:
-                    print(f"⚠️ 未提取到数据")
-
-            except Exception as e:
-                print(f"✗ 获取 Documents Published 数据失败: {e}")
+                        result["documents_data"].append({"year": year_text, "documents": doc_count})
+                    
+                    if result["documents_data"]:
+                        logger.info("   ✅ Documents Published 提取成功")
+                    else:
+                        logger.warning("   ⚠️ 未提取到 Documents Published 数据")
+                
+                except Exception as e:
+                    logger.warning(f"   ⚠️ 获取 Documents Published 数据失败: {e}")
             
-            # ... (后面代码保持不变) ...
+            self._record_page_weight(page, meter)
                 
         except Exception as e:
             logger.error(f"❌ 爬取失败: {e}")
         
         finally:
-            # 关闭页面
+            # 只关闭标签页，浏览器留给下一个期刊
             try:
-                page.quit()
+                page.close()
             except:
                 pass
+            if not self.reuse_browser:
+                self.close()
+            self.journal_times.append(time.perf_counter() - started)
         
         return result
 
 
-def update_scopus_metrics_in_yaml(dry_run: bool = False):
+def _scrape_journal(crawler: ScopusDrissionCrawler, journal_name: str, sourceid: int,
+                    is_new: bool) -> Tuple[Dict[str, Any], bool]:
+    """爬取一个期刊（在某个标签页的工作线程中运行），返回 (本阶段的字段更新, 是否成功)"""
+    journal_updates: Dict[str, Any] = {}
+    if is_new:
+        # 自动创建期刊条目
+        logger.info(f"➕ 创建新条目: {journal_name}")
+        journal_updates = {
+            'orange_score': '',
+            'orange_quartile': '',
+            'orange_percentile': '',
+            'documents_current_year': '',
+            'documents_last_year': '',
+            'documents_published': ''
+        }
+    
+    logger.info(f"\n{'='*80}")
+    logger.info(f"📊 处理: {journal_name} (ID: {sourceid})")
+    logger.info(f"{'='*80}")
+    
+    try:
+        # 爬取橙色系指标
+        scopus_metrics = crawler.scrape_journal_metrics(sourceid)
+        
+        # 记录本阶段负责的字段
+        if scopus_metrics['orange_score']:
+            journal_updates['orange_score'] = scopus_metrics['orange_score']
+        if scopus_metrics['orange_quartile']:
+            journal_updates['orange_quartile'] = scopus_metrics['orange_quartile']
+        if scopus_metrics['orange_percentile']:
+            journal_updates['orange_percentile'] = scopus_metrics['orange_percentile']
+        
+        # 使用 split 后的字段
+        if scopus_metrics['docs_current_year']:
+            journal_updates['documents_current_year'] = scopus_metrics['docs_current_year']
+        if scopus_metrics['docs_last_year']:
+            journal_updates['documents_last_year'] = scopus_metrics['docs_last_year']
+            # 保留 documents_published 用于兼容（如果需要），或者可以删除
+            journal_updates['documents_published'] = scopus_metrics['docs_last_year']
+        # 全部学科分类（仅 --all-categories 时读取）
+        if scopus_metrics['citescore_rank_data']:
+            journal_updates['orange_categories'] = scopus_metrics['citescore_rank_data']
+        # 数据对应的 CiteScore 年份和抓取时间，用于判断下次是否需要重新抓取
+        if scopus_metrics['orange_score']:
+            if scopus_metrics['citescore_year']:
+                journal_updates['citescore_year'] = scopus_metrics['citescore_year']
+            journal_updates['scopus_fetched_at'] = datetime.now().isoformat(timespec='seconds')
+        
+        logger.info(f"✅ {journal_name} 更新完成")
+        
+        # 延迟，避免请求过快（每个标签页各自等待）
+        CASSETTE.sleep(2)
+        return journal_updates, True
+    
+    except Exception as e:
+        logger.error(f"❌ {journal_name} 更新失败: {e}")
+        return journal_updates, False
+
+
+def collect_scopus_updates(journal_list: List[Dict[str, Any]], existing_names: Set[str],
+                           progress: Optional[Callable[[str, int, int, str], None]] = None,
+                           reuse_browser: bool = True, tabs: int = SCOPUS_TABS,
+                           max_requests: int = SCOPUS_MAX_REQUESTS,
+                           tab_timeout: float = SCOPUS_TAB_TIMEOUT,
+                           all_categories: bool = False, capture_json: bool = False,
+                           base_url: Optional[str] = None, lean: bool = True) -> Tuple[Dict[str, Dict[str, Any]], int]:
+    """
+    爬取橙色系指标，返回 ({期刊名: {字段: 值}}, 成功更新的期刊数)，不写入任何文件
+    
+    Args:
+        journal_list: journal_rank.json 中的期刊列表
+        existing_names: 已有数据的期刊名（不在其中的期刊会创建新条目）
+        progress: 每处理完一个期刊调用一次 progress('scopus', 已完成, 总数, 期刊名)
+        reuse_browser: 所有期刊共用一个浏览器（False 时每个期刊重新启动，用于对比耗时）
+        tabs: 同一浏览器内并行处理的标签页数，sourceid 队列依次分给空闲的标签页
+        max_requests: 同时向 Scopus 发起的页面加载数上限
+        tab_timeout: 每个标签页处理一个期刊的总时限（秒）
+        all_categories: 读取 CiteScore 全部学科分类，写入 orange_categories
+        capture_json: 监听来源页面的 JSON 响应并优先从中读取指标（默认 False，只读取页面元素）
+        base_url: 来源页面地址前缀（默认 Scopus；可指向提供保存页面和 JSON 的本地服务用于测试）
+        lean: 使用精简的浏览器配置（屏蔽图片、字体、媒体和跟踪脚本）
+    """
+    # 本阶段的字段更新 {期刊名: {字段: 值}}
+    updates: Dict[str, Dict[str, Any]] = {}
+    
+    if not reuse_browser and tabs > 1:
+        logger.warning("⚠️ 每个期刊重启浏览器时不能多标签页并行，改为单标签页")
+        tabs = 1
+    
+    # 创建爬虫实例（整个运行共用一个浏览器）
+    crawler = ScopusDrissionCrawler(headless=True, reuse_browser=reuse_browser,
+                                    max_requests=max_requests, tab_timeout=tab_timeout,
+                                    all_categories=all_categories, capture_json=capture_json, lean=lean,
+                                    **({'base_url': base_url} if base_url else {}))
+    
+    # 遍历期刊列表，更新橙色系指标
+    updated_count = 0
+    done = 0
+    with crawler, ThreadPoolExecutor(max_workers=max(1, tabs), thread_name_prefix='scopus-tab') as executor:
+        futures = {}
+        for journal_info in journal_list:
+            journal_name = journal_info['name']
+            sourceid = journal_info.get('sourceid')
+            if not sourceid:
+                logger.info(f"⏩ 跳过 {journal_name} (无 sourceid)")
+                done += 1
+                if progress:
+                    progress('scopus', done, len(journal_list), journal_name)
+                continue
+            futures[executor.submit(_scrape_journal, crawler, journal_name, sourceid,
+                                    journal_name not in existing_names)] = journal_name
+        
+        # 结果在主线程合并
+        for future in as_completed(futures):
+            journal_name = futures[future]
+            journal_updates, ok = future.result()
+            updated_count += ok
+            if journal_updates:
+                updates[journal_name] = journal_updates
+            done += 1
+            if progress:
+                progress('scopus', done, len(journal_list), journal_name)
+    crawler.log_timing()
+    
+    return updates, updated_count
+
+
+def update_scopus_metrics_in_yaml(dry_run: bool = False, export: bool = True,
+                                  selector: Optional[JournalSelector] = None, reuse_browser: bool = True,
+                                  tabs: int = SCOPUS_TABS, max_requests: int = SCOPUS_MAX_REQUESTS,
+                                  tab_timeout: float = SCOPUS_TAB_TIMEOUT, all_categories: bool = False,
+                                  capture_json: bool = False, base_url: Optional[str] = None, lean: bool = True,
+                                  force: bool = False):
     """
     更新 jrank.yml 中的橙色系指标
     
+    只把本阶段负责的橙色系字段写入期刊数据库（来源记为 scopus），再导出 jrank.yml
+    
     Args:
         dry_run: 是否为测试模式（不保存文件）
+        export: 是否在写入数据库后导出 jrank.yml（由 journal_data_manager 统一导出时关闭）
+        selector: 只更新选中的期刊（--journal / --publisher / --missing-field / --stale-older-than）
+        reuse_browser: 所有期刊共用一个浏览器
+        tabs / max_requests / tab_timeout: 多标签页并行参数（见 collect_scopus_updates）
+        all_categories: 读取 CiteScore 全部学科分类
+        capture_json / base_url / lean: 见 collect_scopus_updates
+        force: 忽略 CiteScore 年份，重新抓取所有期刊（指定了期刊选择条件时同样不做年份判断）
     """
     journal_rank_file = '_data/journal_rank.json'
     jrank_file = '_data/jrank.yml'
@@ -230,104 +859,51 @@ def update_scopus_metrics_in_yaml(dry_run: bool = False):
         logger.error(f"❌ 无法读取 {journal_rank_file}: {e}")
         return
     
-    # 2. 读取现有的 jrank.yml
+    # 2. 打开期刊数据库（jrank.yml 在库外被修改时会先同步进来）
     try:
-        with open(jrank_file, 'r', encoding='utf-8') as f:
-            jrank_data = yaml.safe_load(f) or []
-        logger.info(f"📖 加载了 {len(jrank_data)} 条现有数据")
-    except FileNotFoundError:
-        logger.error(f"❌ 文件不存在: {jrank_file}")
-        return
+        store = open_store(jrank_file=jrank_file)
+        existing_data = store.all_records()
+        existing_names = {item['journal'] for item in existing_data}
+        logger.info(f"📖 加载了 {len(existing_names)} 条现有数据")
+        if selector and selector.active:
+            journal_list = selector.select(journal_list, existing_data, store.field_timestamps(),
+                                           SCOPUS_FIELDS, stage='scopus')
+        elif not force:
+            journal_list = select_due_journals(journal_list, existing_data)
     except Exception as e:
-        logger.error(f"❌ 无法读取 {jrank_file}: {e}")
+        logger.error(f"❌ 无法打开期刊数据库: {e}")
         return
     
-    # 3. 创建期刊名称到数据的映射
-    jrank_dict = {item['journal']: item for item in jrank_data}
-    
-    # 4. 创建爬虫实例
-    crawler = ScopusDrissionCrawler(headless=True)
-    
-    # 5. 遍历期刊列表，更新橙色系指标
-    updated_count = 0
-    for journal_info in journal_list:
-        journal_name = journal_info['name']
-        sourceid = journal_info.get('sourceid')
-        
-        if not sourceid:
-            logger.info(f"⏩ 跳过 {journal_name} (无 sourceid)")
-            continue
-        
-        if journal_name not in jrank_dict:
-            # 自动创建期刊条目
-            logger.info(f"➕ 创建新条目: {journal_name}")
-            jrank_dict[journal_name] = {
-                'journal': journal_name,
-                'orange_score': '',
-                'orange_quartile': '',
-                'orange_percentile': '',
-                'documents_current_year': '',
-                'documents_last_year': '',
-                'documents_published': ''
-            }
-        
-        logger.info(f"\n{'='*80}")
-        logger.info(f"📊 处理: {journal_name} (ID: {sourceid})")
-        logger.info(f"{'='*80}")
-        
-        try:
-            # 爬取橙色系指标
-            scopus_metrics = crawler.scrape_journal_metrics(sourceid)
-            
-            # 更新 jrank_dict 中的数据
-            if scopus_metrics['orange_score']:
-                jrank_dict[journal_name]['orange_score'] = scopus_metrics['orange_score']
-            if scopus_metrics['orange_quartile']:
-                jrank_dict[journal_name]['orange_quartile'] = scopus_metrics['orange_quartile']
-            if scopus_metrics['orange_percentile']:
-                jrank_dict[journal_name]['orange_percentile'] = scopus_metrics['orange_percentile']
-            
-            # 使用 split 后的字段
-            if scopus_metrics['docs_current_year']:
-                jrank_dict[journal_name]['documents_current_year'] = scopus_metrics['docs_current_year']
-            if scopus_metrics['docs_last_year']:
-                jrank_dict[journal_name]['documents_last_year'] = scopus_metrics['docs_last_year']
-                # 保留 documents_published 用于兼容（如果需要），或者可以删除
-                jrank_dict[journal_name]['documents_published'] = scopus_metrics['docs_last_year']
-            
-            updated_count += 1
-            logger.info(f"✅ {journal_name} 更新完成")
-            
-            # 延迟，避免请求过快
-            time.sleep(2)
-            
-        except Exception as e:
-            logger.error(f"❌ {journal_name} 更新失败: {e}")
+    # 3. 爬取橙色系指标，得到本阶段的字段更新
+    updates, updated_count = collect_scopus_updates(journal_list, existing_names,
+                                                    reuse_browser=reuse_browser, tabs=tabs,
+                                                    max_requests=max_requests, tab_timeout=tab_timeout,
+                                                    all_categories=all_categories,
+                                                    capture_json=capture_json, base_url=base_url, lean=lean)
     
-    # 6. 保存更新后的数据
+    # 4. 保存更新后的数据
     if dry_run:
         logger.info("\n" + "="*80)
         logger.info("🧪 DRY-RUN 模式：不保存文件")
         logger.info(f"📊 已更新 {updated_count} 个期刊的橙色系指标")
         logger.info("="*80)
-    elif updated_count == 0:
+    elif updated_count == 0 and not updates:
         logger.info("\n" + "="*80)
         logger.info("ℹ️ 没有数据更新，跳过保存")
         logger.info("="*80)
     else:
         try:
-            # 转换回列表
-            updated_jrank_data = list(jrank_dict.values())
-            
-            with open(jrank_file, 'w', encoding='utf-8') as f:
-                yaml.dump(updated_jrank_data, f, default_flow_style=False, allow_unicode=True)
+            changed = store.upsert_many(updates, source='scopus')
+            if export:
+                store.export_yaml(jrank_file)
             
             logger.info("\n" + "="*80)
-            logger.info(f"✅ 成功更新 {jrank_file}")
+            logger.info(f"✅ 成功更新 {jrank_file if export else store.path} ({changed} 个字段变化)")
             logger.info(f"📊 已更新 {updated_count} 个期刊的橙色系指标")
             logger.info("="*80)
         except Exception as e:
             logger.error(f"❌ 保存文件失败: {e}")
+    store.close()
 
 
 def main():
@@ -337,6 +913,27 @@ def main():
     parser = argparse.ArgumentParser(description='更新期刊橙色系指标 (橙色分数, 橙色分区, Documents Published, Percentile)')
     parser.add_argument('--dry-run', '-n', action='store_true', 
                        help='测试模式 - 不保存文件')
+    parser.add_argument('--no-export', action='store_true',
+                       help='只写入期刊数据库，不导出 jrank.yml')
+    parser.add_argument('--no-reuse-browser', action='store_true',
+                       help='每个期刊重新启动浏览器（旧行为，用于对比每个期刊的耗时）')
+    parser.add_argument('--tabs', type=int, default=SCOPUS_TABS,
+                       help=f'同一浏览器内并行处理的标签页数 (默认 {SCOPUS_TABS})')
+    parser.add_argument('--max-requests', type=int, default=SCOPUS_MAX_REQUESTS,
+                       help=f'同时向 Scopus 发起的页面加载数上限 (默认 {SCOPUS_MAX_REQUESTS})')
+    parser.add_argument('--tab-timeout', type=float, default=SCOPUS_TAB_TIMEOUT,
+                       help=f'每个标签页处理一个期刊的总时限，秒 (默认 {SCOPUS_TAB_TIMEOUT})')
+    parser.add_argument('--all-categories', action='store_true',
+                       help='一次读取 CiteScore 全部学科分类并写入 orange_categories')
+    parser.add_argument('--capture-json', action='store_true',
+                       help='监听页面的 Serial Title JSON 响应并优先从中读取指标（默认只读取页面元素）')
+    parser.add_argument('--base-url', metavar='URL',
+                       help='来源页面地址前缀，如 http://localhost:8000/sourceid（本地测试服务）')
+    parser.add_argument('--force', action='store_true',
+                       help='忽略 CiteScore 发布年份，重新抓取所有期刊')
+    parser.add_argument('--no-lean-profile', action='store_true',
+                       help='不屏蔽图片/字体/媒体和跟踪脚本（用于比较每页流量和加载时间）')
+    add_selector_arguments(parser)
     args = parser.parse_args()
     
     logger.info("="*80)
@@ -344,7 +941,13 @@ def main():
     logger.info("="*80)
     
     try:
-        update_scopus_metrics_in_yaml(dry_run=args.dry_run)
+        update_scopus_metrics_in_yaml(dry_run=args.dry_run, export=not args.no_export,
+                                      selector=JournalSelector.from_args(args),
+                                      reuse_browser=not args.no_reuse_browser, tabs=args.tabs,
+                                      max_requests=args.max_requests, tab_timeout=args.tab_timeout,
+                                      all_categories=args.all_categories,
+                                      capture_json=args.capture_json, base_url=args.base_url,
+                                      lean=not args.no_lean_profile, force=args.force)
     except KeyboardInterrupt:
         logger.info("\n⚠️ 用户中断")
     except Exception as e: